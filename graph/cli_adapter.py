@@ -7,11 +7,12 @@ MidsceneAgent CLI 适配器
 
 from typing import Any, AsyncGenerator, Dict
 
+import aiohttp
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 
 from runner.agent.agent import MidsceneAgent
+from runner.agent.agent_pool import AgentPool, AgentPoolTimeout
 from runner.agent.config import Config
-from runner.agent.http_client import SessionConfig
 
 logger = __import__("logging").getLogger(__name__)
 
@@ -23,7 +24,7 @@ class MidsceneAgentAdapter:
     职责：
     1. 包装 MidsceneAgent，提供 LangGraph 标准接口
     2. 处理消息流转换（流式响应 → LangGraph 消息）
-    3. 管理会话生命周期
+    3. 通过智能体池复用已初始化的智能体（归还时重建浏览器会话，请求之间不共享 Cookie 和登录状态）
     """
 
     def __init__(self):
@@ -31,8 +32,18 @@ class MidsceneAgentAdapter:
         # 直接使用 Config 类属性（不需要实例化）
         self.config = Config
 
-        # 初始化 MidsceneAgent
-        self.agent = MidsceneAgent(
+        # 智能体池：按需创建，请求之间复用已初始化的智能体
+        self.pool = AgentPool(
+            self._create_agent,
+            size=self.config.AGENT_POOL_SIZE,
+            lease_timeout=self.config.AGENT_POOL_LEASE_TIMEOUT,
+        )
+
+        logger.info("🔧 MidsceneAgent 适配器初始化完成")
+
+    def _create_agent(self, connector: aiohttp.TCPConnector) -> MidsceneAgent:
+        """创建智能体（由智能体池调用）"""
+        return MidsceneAgent(
             deepseek_api_key=self.config.DEEPSEEK_API_KEY,
             deepseek_base_url=self.config.DEEPSEEK_BASE_URL,
             deepseek_model=self.config.DEEPSEEK_MODEL,
@@ -41,16 +52,20 @@ class MidsceneAgentAdapter:
             tool_set="full",
             enable_websocket=True,
             timeout=300,
+            llm_cache_path=self.config.LLM_CACHE_PATH or None,
+            checkpoint_path=self.config.CHECKPOINT_PATH or None,
+            checkpoint_max_threads=self.config.CHECKPOINT_MAX_THREADS,
+            checkpoint_idle_ttl=self.config.CHECKPOINT_IDLE_TTL,
+            checkpoint_max_bytes=self.config.CHECKPOINT_MAX_MB * 1024 * 1024,
+            fast_model=self.config.DEEPSEEK_FAST_MODEL or None,
+            connector=connector,
+            memory_store_path=self.config.MEMORY_STORE_PATH or None,
+            memory_max_age=self.config.MEMORY_MAX_AGE or None,
+            memory_max_bytes=self.config.MEMORY_MAX_KB * 1024 or None,
+            memory_spill_dir=self.config.MEMORY_SPILL_DIR or None,
+            similarity_threshold=self.config.SIMILARITY_THRESHOLD or None,
         )
 
-        # 活跃会话池
-        self.active_sessions: set[str] = set()
-
-        # 最大并发会话数
-        self.max_sessions = 50
-
-        logger.info("🔧 MidsceneAgent 适配器初始化完成")
-
     async def process(self, state: Dict[str, Any]) -> AsyncGenerator[BaseMessage, None]:
         """
         处理 LangGraph 消息流
@@ -60,17 +75,7 @@ class MidsceneAgentAdapter:
 
         Yields:
             BaseMessage: 转换后的消息
-
-        Raises:
-            RuntimeError: 当会话数超限时
         """
-        # 检查会话数限制
-        if len(self.active_sessions) >= self.max_sessions:
-            error_msg = f"活跃会话数已达上限 ({self.max_sessions})"
-            logger.error(error_msg)
-            yield AIMessage(content=f"❌ {error_msg}")
-            return
-
         # 获取最新用户消息
         if not state.get("messages"):
             yield AIMessage(content="❌ 未收到用户消息")
@@ -90,114 +95,57 @@ class MidsceneAgentAdapter:
             user_input = str(user_input)
         logger.info(f"📝 收到用户输入: {user_input[:100]}...")
 
-        # 创建 Midscene 会话
-        session_id = await self._create_session()
-        self.active_sessions.add(session_id)
-
         try:
-            # 初始化 MidsceneAgent（如果尚未初始化）
-            if not self.agent.initialized:
-                await self.agent.initialize()
-                logger.info("✅ MidsceneAgent 初始化完成")
-
-            # 执行用户输入
-            async for chunk in self._execute(user_input, session_id):
-                # 转换为 LangGraph 标准消息格式
-                if isinstance(chunk, dict):
-                    if "error" in chunk and isinstance(chunk.get("error"), str):
-                        yield AIMessage(content=f"❌ {chunk.get('error')}")
+            # 从智能体池租用已初始化的智能体，归还时清空记忆和线程状态
+            async with self.pool.agent() as agent:
+                async for chunk in self._execute(agent, user_input):
+                    # 转换为 LangGraph 标准消息格式
+                    if isinstance(chunk, dict):
+                        if "error" in chunk and isinstance(chunk.get("error"), str):
+                            yield AIMessage(content=f"❌ {chunk.get('error')}")
+                        else:
+                            yield AIMessage(content=str(chunk))
                     else:
                         yield AIMessage(content=str(chunk))
-                else:
-                    yield AIMessage(content=str(chunk))
+
+        except AgentPoolTimeout as e:
+            logger.error(str(e))
+            yield AIMessage(content=f"❌ {e}")
 
         except Exception as e:
             error_msg = f"❌ 执行失败: {str(e)}"
             logger.error(f"{error_msg}\n{__import__('traceback').format_exc()}")
             yield AIMessage(content=error_msg)
 
-        finally:
-            # 清理会话
-            await self._cleanup_session(session_id)
-            self.active_sessions.discard(session_id)
-            logger.info(f"🧹 会话已清理: {session_id}")
-
-    async def _create_session(self) -> str:
-        """
-        创建 Midscene 会话
+    async def close(self) -> None:
+        """关闭智能体池并清理所有智能体"""
+        await self.pool.close()
 
-        Returns:
-            会话 ID
-
-        Raises:
-            RuntimeError: 如果创建会话失败
-        """
-        try:
-            # 确保 HTTP 客户端已连接
-            if not self.agent.http_client.session:
-                await self.agent.http_client.connect()
-
-            # 创建会话配置
-            session_config = SessionConfig(
-                headless=True,
-                viewport_width=1920,
-                viewport_height=1080,
-            )
-
-            # 创建会话
-            session_id = await self.agent.http_client.create_session(session_config)
-
-            logger.info(f"✅ 创建 Midscene 会话: {session_id}")
-            return session_id
-
-        except Exception as e:
-            error_msg = f"创建会话失败: {str(e)}"
-            logger.error(error_msg)
-            raise RuntimeError(error_msg)
-
-    async def _cleanup_session(self, session_id: str):
-        """
-        清理 Midscene 会话
-
-        Args:
-            session_id: 会话 ID
-        """
-        try:
-            if self.agent.http_client.session and session_id:
-                # 删除会话
-                delete_url = (
-                    f"{self.agent.http_client.base_url}/api/sessions/{session_id}"
-                )
-                async with self.agent.http_client.session.delete(
-                    delete_url
-                ) as response:
-                    if response.status == 200:
-                        logger.info(f"✅ 删除会话成功: {session_id}")
-                    else:
-                        logger.warning(
-                            f"⚠️ 删除会话失败 ({response.status}): {session_id}"
-                        )
-        except Exception as e:
-            logger.error(f"清理会话时出错 {session_id}: {str(e)}")
+    def get_stats(self) -> Dict[str, Any]:
+        """获取智能体池统计信息"""
+        return self.pool.get_stats()
 
     async def _execute(
-        self, user_input: str, session_id: str
+        self, agent: MidsceneAgent, user_input: str
     ) -> AsyncGenerator[str, None]:
         """
         执行用户输入
 
         Args:
+            agent: 从智能体池租用的智能体
             user_input: 用户输入
-            session_id: 会话 ID
 
         Yields:
             str: 执行结果的文本片段
         """
         try:
             # 调用 MidsceneAgent 执行任务
-            async for chunk in self.agent.execute(user_input, stream=True):
+            async for chunk in agent.execute(user_input, stream=True):
                 # 提取 chunk 中的内容
                 if isinstance(chunk, dict):
+                    # 执行摘要只用于统计，不转发给用户
+                    if "execution_summary" in chunk:
+                        continue
                     # 处理来自 agent_executor.astream 的响应
                     if "messages" in chunk:
                         # 获取最新的 AI 消息
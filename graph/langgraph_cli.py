@@ -57,26 +57,18 @@ def create_midscene_graph():
         user_input = str(user_message.content)
         logger.info(f"📝 收到用户输入: {user_input[:100]}...")
 
-        # 创建 Midscene 会话
-        session_id = await adapter._create_session()
-        adapter.active_sessions.add(session_id)
-
         try:
-            # 初始化 MidsceneAgent（如果尚未初始化）
-            if not adapter.agent.initialized:
-                await adapter.agent.initialize()
-                logger.info("✅ MidsceneAgent 初始化完成")
-
-            # 执行用户输入并收集结果
+            # 从智能体池租用已初始化的智能体，执行用户输入并收集结果
             all_outputs = []
-            async for chunk in adapter._execute(user_input, session_id):
-                if isinstance(chunk, dict):
-                    if "error" in chunk:
-                        all_outputs.append(f"❌ {chunk.get('error')}")
+            async with adapter.pool.agent() as agent:
+                async for chunk in adapter._execute(agent, user_input):
+                    if isinstance(chunk, dict):
+                        if "error" in chunk:
+                            all_outputs.append(f"❌ {chunk.get('error')}")
+                        else:
+                            all_outputs.append(str(chunk))
                     else:
                         all_outputs.append(str(chunk))
-                else:
-                    all_outputs.append(str(chunk))
 
             # 返回包含 AI 响应的状态
             response_message = "\n".join(all_outputs) if all_outputs else "执行完成"
@@ -89,15 +81,6 @@ def create_midscene_graph():
             logger.error(f"{error_msg}\n{__import__('traceback').format_exc()}")
             return {"messages": state["messages"] + [AIMessage(content=error_msg)]}
 
-        finally:
-            # 清理会话
-            try:
-                await adapter._cleanup_session(session_id)
-            except Exception as e:
-                logger.error(f"清理会话时出错: {e}")
-            finally:
-                adapter.active_sessions.discard(session_id)
-
     # 添加节点
     workflow.add_node("midscene_agent", midscene_node)
 
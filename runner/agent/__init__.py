@@ -16,10 +16,13 @@ Usage:
 
 # 使用相对导入
 from .agent import MidsceneAgent
+from .agent_pool import AgentPool, AgentPoolTimeout
 
 __version__ = "1.0.0"
 __author__ = "AI Automation Team"
 
 __all__ = [
     "MidsceneAgent",
+    "AgentPool",
+    "AgentPoolTimeout",
 ]
@@ -6,25 +6,46 @@ Midscene Agent，使用 HTTP 客户端替代 MCP stdio
 实现更稳定、功能更完整的网页自动化。
 """
 
+import json
 import logging
 import asyncio
-from typing import Any, AsyncGenerator, Dict, List, Optional
-
-from langchain_core.messages import HumanMessage
+import time
+from dataclasses import asdict
+from typing import Any, AsyncGenerator, Awaitable, Dict, List, Optional, Tuple
+
+import aiohttp
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+    message_chunk_to_message,
+)
 from langchain_core.tools import BaseTool, tool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langchain_deepseek import ChatDeepSeek
 from langgraph.graph import END, START, MessagesState, StateGraph
-from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.prebuilt import tools_condition
 from pydantic import SecretStr
 
 from .http_client import MidsceneConnectionError, MidsceneHTTPClient, SessionConfig
 from .tools.definitions import (
+    ACTION_APIS,
+    QUERY_APIS,
     TOOL_DEFINITIONS,
     get_recommended_tool_set,
     get_tool_definition,
 )
+from .tools.result_shaper import DEFAULT_RESULT_BUDGET, ToolResultShaper
+from .tools.scheduler import ToolCallScheduler
 from .memory.simple_memory import SimpleMemory, MemoryContextBuilder
+from .memory.persistent_store import PersistentMemoryStore
+from .memory.message_compactor import MessageCompactor
+from .llm_cache import LLMResponseCache, strip_volatile_fields
+from .checkpointer import BoundedMemorySaver, SQLiteCheckpointSaver
+from .metrics import AgentMetrics
+from .model_router import ROUTE_FAST, ModelRouter
+from .loop_detector import LOOP_HINT_KEY, LOOP_STOP_KEY, LoopDetector, loop_stop_kind
 from .config import SYSTEM_PROMPT  # 导入系统提示
 
 # 配置日志
@@ -57,6 +78,23 @@ class MidsceneAgent:
         timeout: int = 300,
         session_id: Optional[str] = None,
         enable_memory_saver: bool = True,
+        context_token_budget: Optional[int] = 32000,
+        llm_cache_path: Optional[str] = None,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_max_threads: Optional[int] = 200,
+        checkpoint_idle_ttl: Optional[float] = 3600,
+        checkpoint_max_bytes: Optional[int] = 256 * 1024 * 1024,
+        tool_result_budget: Optional[int] = DEFAULT_RESULT_BUDGET,
+        fast_model: Optional[str] = None,
+        loop_max_repeats: Optional[int] = 3,
+        loop_max_oscillations: int = 2,
+        loop_max_hints: int = 1,
+        connector: Optional[aiohttp.TCPConnector] = None,
+        memory_store_path: Optional[str] = None,
+        memory_max_age: Optional[float] = None,
+        memory_max_bytes: Optional[int] = 1024 * 1024,
+        memory_spill_dir: Optional[str] = None,
+        similarity_threshold: Optional[float] = None,
     ):
         """
         初始化新版 Midscene Agent
@@ -73,6 +111,24 @@ class MidsceneAgent:
             timeout: 操作超时时间（秒）
             session_id: 会话ID，用于状态持久化（如果不提供会自动生成）
             enable_memory_saver: 是否启用 LangGraph MemorySaver 进行状态持久化
+            context_token_budget: 发送给 LLM 的对话历史 token 预算，超出时压缩旧轮次（None 表示不压缩）
+            llm_cache_path: LLM 响应缓存的 SQLite 文件路径（仅在 temperature=0 时生效，None 表示不缓存）
+            checkpoint_path: 线程检查点的 SQLite 文件路径（None 表示使用内存存储）
+            checkpoint_max_threads: 内存存储最多保留的线程数（None 表示不限制）
+            checkpoint_idle_ttl: 内存存储中线程的最大空闲时间（秒，None 表示不限制）
+            checkpoint_max_bytes: 内存存储的检查点占用上限（字节，None 表示不限制）
+            tool_result_budget: 工具结果进入消息历史前的默认字节预算（None 表示不整形）
+            fast_model: 简单步骤使用的快速模型名称（None 表示所有调用都使用 deepseek_model）
+            loop_max_repeats: 相同工具调用连续出现多少次视为循环（None 表示不检测循环）
+            loop_max_oscillations: 两组工具调用交替出现多少轮视为循环
+            loop_max_hints: 每个步骤最多注入的纠正提示次数，用完后仍然循环则结束步骤
+            connector: 多个智能体共享的 HTTP 连接池（由调用方负责关闭）
+            memory_store_path: 持久化记忆的 SQLite 文件路径（可由多个进程共享，None 表示不持久化）
+            memory_max_age: 记忆记录的最大年龄（秒），初始化后在后台定期清理过期记录（None 表示不清理）
+            memory_max_bytes: 记忆占用的估算字节上限，超过时淘汰最旧的记录（None 表示只按条数限制）
+            memory_spill_dir: 记忆中被压缩的大结果的完整内容写入的目录（None 表示丢弃完整结果）
+            similarity_threshold: 措辞不同的近似重复操作的 Jaccard 阈值（None 表示只识别参数完全相同的操作；
+                开启后记忆维护 MinHash 索引，循环检测也把措辞相近的调用视为相同）
         """
         self.deepseek_api_key = deepseek_api_key
         self.deepseek_base_url = deepseek_base_url
@@ -87,94 +143,255 @@ class MidsceneAgent:
             session_id or f"session_{int(asyncio.get_event_loop().time())}"
         )
         self.enable_memory_saver = enable_memory_saver
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_max_threads = checkpoint_max_threads
+        self.checkpoint_idle_ttl = checkpoint_idle_ttl
+        self.checkpoint_max_bytes = checkpoint_max_bytes
+        self.memory_max_age = memory_max_age
 
         # 初始化 HTTP 客户端
-        self.http_client = MidsceneHTTPClient(base_url=midscene_server_url)
+        self.http_client = MidsceneHTTPClient(
+            base_url=midscene_server_url, connector=connector
+        )
 
         # 内部状态
         self.llm: Optional[Any] = None
+        self.fast_llm: Optional[Any] = None
         self.agent_executor: Optional[Any] = None
         self.tools: List[BaseTool] = []
         self.initialized = False
-        self.checkpointer: Optional[Any] = None  # MemorySaver 实例
+        # BoundedMemorySaver 或 SQLiteCheckpointSaver 实例
+        self.checkpointer: Optional[Any] = None
+        self.tool_scheduler: Optional[ToolCallScheduler] = None
+        self._websocket_task: Optional[asyncio.Task] = None
+        self.init_timings: Dict[str, float] = {}  # 各初始化阶段耗时（毫秒）
+        self._recorded_steps = 0  # record_step 写入线程的步骤数（用于生成工具调用 ID）
 
         # 记忆组件
-        self.memory = SimpleMemory(max_size=50)  # 存储最近50个操作
+        self.memory = SimpleMemory(
+            max_size=50,  # 存储最近50个操作
+            max_bytes=memory_max_bytes,
+            spill_dir=memory_spill_dir,
+            similarity_threshold=similarity_threshold,
+            store=(
+                PersistentMemoryStore(memory_store_path) if memory_store_path else None
+            ),
+        )
         self.memory_builder = MemoryContextBuilder(self.memory)
 
+        # 对话压缩组件（长线程中控制每次 LLM 调用的消息量）
+        self.message_compactor: Optional[MessageCompactor] = (
+            MessageCompactor(
+                token_budget=context_token_budget, stable_prefix=SYSTEM_PROMPT
+            )
+            if context_token_budget
+            else None
+        )
+
+        # 工具结果整形（只有整形后的内容进入消息历史和检查点）
+        self.result_shaper: Optional[ToolResultShaper] = (
+            ToolResultShaper(default_budget=tool_result_budget)
+            if tool_result_budget
+            else None
+        )
+
+        # 耗时与 token 统计
+        self.metrics = AgentMetrics()
+
+        # 模型路由（简单步骤使用快速模型，复杂步骤和失败恢复使用强模型）
+        self.model_router: Optional[ModelRouter] = (
+            ModelRouter(self.memory, fast_model=fast_model, strong_model=deepseek_model)
+            if fast_model and fast_model != deepseek_model
+            else None
+        )
+
+        # 循环检测（重复调用或 A-B-A-B 交替时先提示 LLM，仍然循环则结束步骤）
+        self.loop_detector: Optional[LoopDetector] = (
+            LoopDetector(
+                self.memory,
+                max_repeats=loop_max_repeats,
+                max_oscillations=loop_max_oscillations,
+                max_hints=loop_max_hints,
+                similarity_threshold=similarity_threshold,
+            )
+            if loop_max_repeats
+            else None
+        )
+
+        # LLM 响应缓存（只有确定性输出才能复用）
+        self.llm_cache: Optional[LLMResponseCache] = None
+        self.tool_schemas: List[Dict[str, Any]] = []
+        if llm_cache_path:
+            if temperature == 0:
+                self.llm_cache = LLMResponseCache(llm_cache_path)
+            else:
+                logger.warning("⚠️ temperature 不为 0，已禁用 LLM 响应缓存")
+
         logger.info(f"Midscene Agent initialized - Session ID: {self.session_id}")
 
-    async def initialize(self) -> None:
+    async def initialize(self, llm_source: Optional["MidsceneAgent"] = None) -> None:
         """
         初始化智能体
 
         1. 创建 HTTP 客户端会话
-        2. 创建 Midscene 会话
-        3. 初始化 LLM
-        4. 创建 LangGraph 执行器
+        2. 并发执行：
+           - 浏览器阶段：健康检查、创建 Midscene 会话（启动浏览器）
+           - 本地阶段：创建工具、初始化 LLM、构建 LangGraph 执行器
+        3. 在后台连接 WebSocket，连接成功前动作通过 HTTP 执行
+
+        Args:
+            llm_source: 已初始化的智能体，提供时复用它的 LLM 客户端和工具 schema
+                （LLM 客户端只绑定工具 schema，可以在使用相同工具集的智能体之间共享）
         """
         try:
             logger.info("🚀 正在初始化 Midscene Agent...")
+            started = time.perf_counter()
 
             # 1. 启动 HTTP 客户端
             logger.info("📡 启动 HTTP 客户端...")
             await self.http_client.connect()
 
-            # 2. 健康检查
-            logger.info("🔍 检查服务器健康状态...")
-            health = await self.http_client.health_check()
-            if health.get("status") not in ("ok", "healthy"):
-                raise MidsceneConnectionError(f"服务器不健康: {health}")
-
-            # 3. 创建 Midscene 会话
-            # 注意：根据架构分离原则，只传递浏览器参数
-            # 视觉模型相关参数在 Node.js server 端通过环境变量配置
-            logger.info("🌐 创建 Midscene 会话...")
-            session_config = SessionConfig(
-                headless=self.midscene_config.get("headless", True),
-                viewport_width=self.midscene_config.get("viewport_width", 1920),
-                viewport_height=self.midscene_config.get("viewport_height", 1080),
-                device_scale_factor=self.midscene_config.get("device_scale_factor"),
+            # 2. 浏览器阶段与本地阶段互不依赖，并发执行
+            # 等待两个阶段都结束后再处理异常，避免会话创建到一半时被清理
+            results = await asyncio.gather(
+                self._timed_phase("browser", self._init_browser_session()),
+                self._timed_phase("local", self._init_local_components(llm_source)),
+                return_exceptions=True,
             )
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
 
-            await self.http_client.create_session(session_config)
-
-            # 4. 连接 WebSocket（如果启用）
+            # 3. 后台连接 WebSocket（如果启用）
             if self.enable_websocket:
-                logger.info("🔌 连接 WebSocket...")
-                connected = await self.http_client.connect_websocket()
-                if connected:
-                    logger.info("✅ WebSocket 连接成功")
-                else:
-                    logger.warning("⚠️ WebSocket 连接失败，使用 HTTP 模式")
+                self._websocket_task = asyncio.create_task(self._connect_websocket())
 
-            # 5. 创建工具
-            logger.info(f"🔧 创建工具集: {self.tool_set}")
-            self.tools = await self._create_tools()
-            logger.info(f"✅ 创建了 {len(self.tools)} 个工具")
-
-            # 6. 初始化 LLM
-            logger.info("🤖 初始化 DeepSeek LLM...")
-            self.llm = ChatDeepSeek(
-                model=self.deepseek_model,
-                api_key=SecretStr(self.deepseek_api_key),
-                base_url=self.deepseek_base_url,
-                temperature=self.temperature,
-                streaming=True,
-            ).bind_tools(self.tools)
-
-            # 7. 创建 LangGraph 执行器
-            logger.info("🔄 构建 LangGraph 执行器...")
-            self.agent_executor = await self._build_graph()
+            # 4. 长期存活的智能体在后台清理过期记忆
+            if self.memory_max_age:
+                self.memory.start_expiry(self.memory_max_age)
 
+            self.init_timings["total_ms"] = round(
+                (time.perf_counter() - started) * 1000, 1
+            )
             self.initialized = True
-            logger.info("✅ Midscene Agent 初始化完成")
+            logger.info(
+                f"✅ Midscene Agent 初始化完成 ({self.init_timings['total_ms']:.0f}ms)"
+            )
 
         except Exception as e:
             logger.error(f"❌ 初始化失败: {e}")
             await self.cleanup()
             raise RuntimeError(f"初始化智能体失败: {e}")
 
+    async def _timed_phase(self, name: str, phase: Awaitable[None]) -> None:
+        """执行初始化阶段并记录耗时"""
+        started = time.perf_counter()
+        try:
+            await phase
+        finally:
+            self.init_timings[f"{name}_ms"] = round(
+                (time.perf_counter() - started) * 1000, 1
+            )
+
+    async def _init_browser_session(self) -> None:
+        """浏览器阶段：健康检查并创建 Midscene 会话"""
+        logger.info("🔍 检查服务器健康状态...")
+        health = await self.http_client.health_check()
+        if health.get("status") not in ("ok", "healthy"):
+            raise MidsceneConnectionError(f"服务器不健康: {health}")
+
+        # 注意：根据架构分离原则，只传递浏览器参数
+        # 视觉模型相关参数在 Node.js server 端通过环境变量配置
+        logger.info("🌐 创建 Midscene 会话...")
+        session_config = SessionConfig(
+            headless=self.midscene_config.get("headless", True),
+            viewport_width=self.midscene_config.get("viewport_width", 1920),
+            viewport_height=self.midscene_config.get("viewport_height", 1080),
+            device_scale_factor=self.midscene_config.get("device_scale_factor"),
+        )
+
+        await self.http_client.create_session(session_config)
+
+    async def reset_browser_session(self) -> None:
+        """销毁当前浏览器会话并创建新会话
+
+        新会话没有上一个会话的 Cookie、登录状态和打开的页面；
+        LLM 客户端、工具和执行器保持不变。
+        """
+        if self._websocket_task and not self._websocket_task.done():
+            self._websocket_task.cancel()
+            await asyncio.gather(self._websocket_task, return_exceptions=True)
+        self._websocket_task = None
+
+        await self.http_client.close_session()
+        await self._init_browser_session()
+
+        if self.enable_websocket:
+            self._websocket_task = asyncio.create_task(self._connect_websocket())
+
+    async def _init_local_components(
+        self, llm_source: Optional["MidsceneAgent"] = None
+    ) -> None:
+        """本地阶段：创建工具、初始化 LLM 并构建执行器"""
+        logger.info(f"🔧 创建工具集: {self.tool_set}")
+        self.tools = await self._create_tools()
+        logger.info(f"✅ 创建了 {len(self.tools)} 个工具")
+
+        # LLM 客户端构建（SSL 上下文、工具 schema 转换）是同步的 CPU 密集操作，
+        # 放到线程中执行，避免阻塞事件循环上并发进行的浏览器阶段；
+        # 提供 llm_source 时直接复用已构建的客户端
+        if llm_source is not None and llm_source.llm is not None:
+            logger.info("🤖 复用共享的 DeepSeek LLM 客户端")
+            self.llm = llm_source.llm
+            self.fast_llm = llm_source.fast_llm
+            self.tool_schemas = llm_source.tool_schemas
+        elif self.model_router:
+            logger.info("🤖 初始化 DeepSeek LLM...")
+            self.llm, self.fast_llm = await asyncio.gather(
+                asyncio.to_thread(self._create_llm, self.deepseek_model),
+                asyncio.to_thread(
+                    self._create_llm, self.model_router.model_for(ROUTE_FAST)
+                ),
+            )
+        else:
+            logger.info("🤖 初始化 DeepSeek LLM...")
+            self.llm = await asyncio.to_thread(self._create_llm, self.deepseek_model)
+
+        logger.info("🔄 构建 LangGraph 执行器...")
+        self.agent_executor = await self._build_graph()
+
+        # 加载之前运行（或其他进程）写入持久化存储的记忆
+        if self.memory.store is not None:
+            loaded = self.memory.load_from_store(max_age=self.memory_max_age)
+            logger.info(f"📚 从持久化记忆加载了 {loaded} 条记录")
+
+    def _create_llm(self, model: str) -> Any:
+        """创建绑定工具的 LLM 客户端"""
+        if self.llm_cache:
+            self.tool_schemas = [convert_to_openai_tool(t) for t in self.tools]
+
+        return ChatDeepSeek(
+            model=model,
+            api_key=SecretStr(self.deepseek_api_key),
+            base_url=self.deepseek_base_url,
+            temperature=self.temperature,
+            streaming=True,
+            stream_usage=True,
+        ).bind_tools(self.tools)
+
+    async def _connect_websocket(self) -> None:
+        """后台连接 WebSocket，成功后动作自动切换为流式执行"""
+        logger.info("🔌 连接 WebSocket...")
+        started = time.perf_counter()
+        connected = await self.http_client.connect_websocket()
+        self.init_timings["websocket_ms"] = round(
+            (time.perf_counter() - started) * 1000, 1
+        )
+        if connected:
+            logger.info("✅ WebSocket 连接成功，后续动作使用流式响应")
+        else:
+            logger.warning("⚠️ WebSocket 连接失败，使用 HTTP 模式")
+
     async def _create_tools(self) -> List[BaseTool]:
         """创建 LangChain 工具"""
         tools = []
@@ -228,77 +445,87 @@ class MidsceneAgent:
         @tool
         async def midscene_tool_wrapper(**kwargs):
             """Midscene 工具包装器"""
-            try:
-                # 直接使用 Midscene 官方 API 名称
-                # 移除映射，使用工具名直接作为 API 调用名
-                midscene_api_name = tool_name.replace("midscene_", "")
+            started = time.perf_counter()
+            server_ms: Optional[float] = None
+            success = False
+            result: Any = None
+            error_message: Optional[str] = None
+
+            # 直接使用 Midscene 官方 API 名称
+            # 移除映射，使用工具名直接作为 API 调用名
+            midscene_api_name = tool_name.replace("midscene_", "")
 
+            try:
                 logger.info(f"🔧 执行工具: {tool_name}, 参数: {kwargs}")
 
-                # 动作类 API - 通过 executeAction 调用
-                action_apis = {
-                    "navigate",
-                    "aiAction",
-                    "aiTap",
-                    "aiDoubleClick",
-                    "aiRightClick",
-                    "aiInput",
-                    "aiScroll",
-                    "aiKeyboardPress",
-                    "aiHover",
-                    "aiWaitFor",
-                    "setActiveTab",
-                    "evaluateJavaScript",
-                    "logScreenshot",
-                    "freezePageContext",
-                    "unfreezePageContext",
-                    "runYaml",
-                    "setAIActionContext",
-                }
-
-                # 查询类 API - 通过 executeQuery 调用
-                query_apis = {
-                    "aiAssert",
-                    "aiAsk",
-                    "aiQuery",
-                    "aiBoolean",
-                    "aiNumber",
-                    "aiString",
-                    "aiLocate",
-                    "getTabs",
-                    "getConsoleLogs",
-                    "playwrightExample",
-                }
-
-                if midscene_api_name in action_apis:
+                if midscene_api_name in ACTION_APIS:
                     # 动作操作
                     async for event in self.http_client.execute_action(
                         midscene_api_name, kwargs, stream=self.enable_websocket
                     ):
                         if "error" in event:
-                            logger.error(f"工具执行错误: {event['error']}")
-                            return f"执行失败: {event['error']}"
+                            error_message = str(event["error"])
+                            logger.error(f"工具执行错误: {error_message}")
+                            return f"执行失败: {error_message}"
                         elif "result" in event:
-                            result = event["result"]
+                            result = strip_volatile_fields(event["result"])
+                            server_ms = event.get("duration")
                             break
                     else:
                         result = "执行完成"
-                elif midscene_api_name in query_apis:
+                    success = True
+                elif midscene_api_name in QUERY_APIS:
                     # 查询操作
                     result = await self.http_client.execute_query(
                         midscene_api_name, kwargs
                     )
+                    if isinstance(result, dict):
+                        server_ms = result.get("duration")
+                        success = result.get("success") is not False
+                        if not success:
+                            error_message = str(result.get("error"))
+                        # 时间戳和耗时已记入指标，不进入消息和记忆（保持缓存键稳定）
+                        result = strip_volatile_fields(result)
+                    else:
+                        success = True
                 else:
-                    return f"未知的工具: {tool_name}"
+                    error_message = f"未知的工具: {tool_name}"
+                    return error_message
 
                 logger.info(f"✅ 工具执行成功: {tool_name}")
-                return result
+                # 只有整形后的内容进入 ToolMessage，记忆保留完整结果
+                content = result
+                if self.result_shaper:
+                    content, _ = self.result_shaper.shape(tool_name, result)
+                return content
 
             except Exception as e:
-                error_msg = f"工具 '{tool_name}' 执行错误: {str(e)}"
+                error_message = str(e)
+                error_msg = f"工具 '{tool_name}' 执行错误: {error_message}"
                 logger.error(error_msg)
                 return error_msg
 
+            finally:
+                latency_ms = (time.perf_counter() - started) * 1000
+                self.metrics.record_tool_call(
+                    tool_name,
+                    latency_ms,
+                    server_ms=server_ms,
+                    success=success,
+                    started_at=started,
+                )
+                # 动作可能改变页面（导航、点击链接、提交表单、重定向），以浏览器的实际位置为准
+                if success and midscene_api_name in ACTION_APIS:
+                    await self.refresh_page_context()
+                self._record_tool_call(
+                    midscene_api_name,
+                    kwargs,
+                    result,
+                    success=success,
+                    error_message=error_message,
+                    latency_ms=latency_ms,
+                )
+
         # 设置工具属性
         midscene_tool_wrapper.name = tool_name
         midscene_tool_wrapper.description = full_description
@@ -308,6 +535,42 @@ class MidsceneAgent:
 
         return midscene_tool_wrapper
 
+    async def refresh_page_context(self) -> None:
+        """从浏览器读取当前页面 URL，变化时更新记忆的页面上下文"""
+        try:
+            response = await self.http_client.execute_query("location")
+        except Exception as e:
+            logger.warning(f"获取当前页面 URL 失败: {e}")
+            return
+
+        result = response.get("result") if isinstance(response, dict) else None
+        url = result.get("url") if isinstance(result, dict) else None
+        if url and url != self.memory.page_context.get("url"):
+            self.memory.update_context({"url": url})
+
+    def _record_tool_call(
+        self,
+        api_name: str,
+        params: Dict[str, Any],
+        result: Any,
+        success: bool,
+        error_message: Optional[str],
+        latency_ms: float,
+    ) -> None:
+        """将一次工具调用记录到记忆
+
+        记录未经整形的完整结果：超过单条结果上限（SimpleMemory.max_result_bytes）的结果
+        由记忆压缩为摘要，配置了 memory_spill_dir 时完整结果写入磁盘，可通过 load_full_result 读取。
+        """
+        self.memory.add_record(
+            action=api_name,
+            params=params,
+            result=result,
+            success=success,
+            error_message=error_message,
+            latency_ms=round(latency_ms, 1),
+        )
+
     def _generate_pydantic_model(self, tool_name: str, params: Dict):
         """生成 Pydantic 模型"""
         from typing import Optional
@@ -332,14 +595,90 @@ class MidsceneAgent:
 
         return type(model_name, (BaseModel,), namespace)
 
+    async def _call_llm(self, messages: List[BaseMessage]) -> AIMessage:
+        """压缩消息历史后调用 LLM（优先使用响应缓存）"""
+        if self.llm is None:
+            raise RuntimeError("LLM 未初始化")
+
+        # 在压缩前选择路由，保证轮次和失败判断基于完整的消息历史
+        route = self.model_router.choose(messages) if self.model_router else None
+        llm, model = self.llm, self.deepseek_model
+        if route == ROUTE_FAST:
+            llm, model = self.fast_llm, self.model_router.model_for(ROUTE_FAST)
+
+        if self.message_compactor:
+            messages = self.message_compactor.compact(messages)
+
+        cache_key: Optional[str] = None
+        response = None
+        if self.llm_cache:
+            started = time.perf_counter()
+            cache_key = self.llm_cache.make_key(messages, self.tool_schemas, model)
+            response = self.llm_cache.get(cache_key)
+            if response is not None:
+                self.metrics.record_llm_call(
+                    (time.perf_counter() - started) * 1000, cached=True
+                )
+
+        if response is None:
+            started = time.perf_counter()
+            response, ttft_ms = await self._stream_llm(messages, llm)
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.metrics.record_llm_call(
+                latency_ms, ttft_ms=ttft_ms, usage=response.usage_metadata
+            )
+            if route is not None:
+                self.model_router.record(route, latency_ms, response.usage_metadata)
+            if self.llm_cache and cache_key:
+                self.llm_cache.put(cache_key, model, response)
+
+        return response
+
+    async def _stream_llm(
+        self, messages: List[BaseMessage], llm: Any
+    ) -> Tuple[AIMessage, Optional[float]]:
+        """流式调用 LLM，返回聚合后的响应和首 token 时间（毫秒）"""
+        started = time.perf_counter()
+        ttft_ms: Optional[float] = None
+        aggregated = None
+        async for chunk in llm.astream(messages):
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started) * 1000
+            aggregated = chunk if aggregated is None else aggregated + chunk
+
+        if aggregated is None:
+            raise RuntimeError("LLM 未返回任何内容")
+        return message_chunk_to_message(aggregated), ttft_ms
+
     async def _build_graph(self):
         """构建 LangGraph 执行器"""
 
-        def agent_node(state: MessagesState) -> MessagesState:
-            if self.llm is None:
-                raise RuntimeError("LLM 未初始化")
+        async def agent_node(state: MessagesState) -> MessagesState:
+            messages = state["messages"]
+            verdict = self.loop_detector.check(messages) if self.loop_detector else None
+
+            if verdict is not None and verdict.action == "stop":
+                self.memory.add_record(
+                    action="loop_detected",
+                    params={"kind": verdict.kind, "tool_calls": verdict.tool_calls},
+                    result=None,
+                    success=False,
+                    error_message=f"检测到循环调用 ({verdict.kind})",
+                )
+                response = AIMessage(
+                    content=f"⚠️ 检测到循环调用 ({verdict.kind})，已结束当前步骤以避免重复执行",
+                    response_metadata={LOOP_STOP_KEY: verdict.kind},
+                )
+                return {"messages": messages + [response]}
 
-            response = self.llm.invoke(state["messages"])
+            if verdict is not None:
+                # 纠正提示只发送给本次调用，响应上的标记用于后续检测重新计数
+                response = await self._call_llm(
+                    messages + [HumanMessage(content=verdict.hint)]
+                )
+                response.response_metadata[LOOP_HINT_KEY] = verdict.kind
+            else:
+                response = await self._call_llm(messages)
 
             # 记录工具调用
             if hasattr(response, "tool_calls") and response.tool_calls:
@@ -347,11 +686,24 @@ class MidsceneAgent:
                 for tool_call in response.tool_calls:
                     logger.info(f"  - {tool_call['name']}: {tool_call['args']}")
 
-            return {"messages": state["messages"] + [response]}
+            return {"messages": messages + [response]}
+
+        # 只读查询并发执行，动作串行执行，结果保持调用顺序
+        self.tool_scheduler = ToolCallScheduler(self.tools)
+
+        async def tools_node(state: MessagesState) -> MessagesState:
+            if self.tool_scheduler is None:
+                raise RuntimeError("工具调度器未初始化")
+
+            last_message = state["messages"][-1]
+            tool_calls = (
+                last_message.tool_calls if isinstance(last_message, AIMessage) else []
+            )
+            return {"messages": await self.tool_scheduler.run(tool_calls)}
 
         builder = StateGraph(MessagesState)
         builder.add_node("agent", agent_node)
-        builder.add_node("tools", ToolNode(self.tools))
+        builder.add_node("tools", tools_node)
         builder.add_edge(START, "agent")
         builder.add_conditional_edges(
             "agent", tools_condition, {"tools": "tools", "__end__": END}
@@ -360,7 +712,14 @@ class MidsceneAgent:
 
         # 集成 MemorySaver 以实现跨调用的状态持久化
         if self.enable_memory_saver:
-            self.checkpointer = MemorySaver()
+            if self.checkpoint_path:
+                self.checkpointer = SQLiteCheckpointSaver(self.checkpoint_path)
+            else:
+                self.checkpointer = BoundedMemorySaver(
+                    max_threads=self.checkpoint_max_threads,
+                    idle_ttl=self.checkpoint_idle_ttl,
+                    max_bytes=self.checkpoint_max_bytes,
+                )
             logger.info("✅ MemorySaver 已启用 - 支持跨调用状态持久化")
             return builder.compile(
                 interrupt_before=[], interrupt_after=[], checkpointer=self.checkpointer
@@ -368,8 +727,111 @@ class MidsceneAgent:
         else:
             return builder.compile(interrupt_before=[], interrupt_after=[])
 
+    def _build_input(self, user_input: str) -> str:
+        """构建包含系统提示和记忆上下文的完整输入"""
+        memory_context = self.memory_builder.build_execution_context(
+            current_task=user_input, include_history=True, include_stats=False
+        )
+        return f"{SYSTEM_PROMPT}\n\n{memory_context}\n\n{user_input}"
+
+    def _thread_config(self, thread_id: str) -> Dict[str, Any]:
+        return {
+            "recursion_limit": 100,
+            "configurable": {"thread_id": thread_id},  # 关键：用于状态持久化的线程ID
+        }
+
+    async def plan(
+        self, user_input: str, thread_id: Optional[str] = None
+    ) -> Tuple[HumanMessage, AIMessage]:
+        """只执行任务的第一次 LLM 规划，不调用任何工具
+
+        用于在上一步的浏览器动作执行期间提前规划下一步。
+        返回的 (用户消息, 规划响应) 可以通过 execute(planned=...) 提交到线程。
+
+        Args:
+            user_input: 任务的自然语言指令
+            thread_id: 线程ID（如果不提供则使用会话ID）
+
+        Returns:
+            (用户消息, LLM 规划响应)
+        """
+        if not self.initialized or not self.agent_executor:
+            raise RuntimeError("智能体未初始化。请先调用 initialize()。")
+
+        actual_thread_id = thread_id or self.session_id
+        history: List[BaseMessage] = []
+        if self.checkpointer:
+            snapshot = await self.agent_executor.aget_state(
+                self._thread_config(actual_thread_id)
+            )
+            history = list((snapshot.values or {}).get("messages", []))
+
+        human_message = HumanMessage(content=self._build_input(user_input))
+        logger.info(f"🔮 预先规划任务: {user_input}")
+        # 预先规划与其他步骤的执行重叠，单独统计，不计入正在进行的 execute()
+        with self.metrics.scope(self.metrics.speculation):
+            response = await self._call_llm(history + [human_message])
+        return human_message, response
+
+    async def record_step(
+        self,
+        user_input: str,
+        tool_calls: List[Dict[str, Any]],
+        results: List[Any],
+        thread_id: Optional[str] = None,
+    ) -> None:
+        """将未经 LLM 执行的步骤（计划回放、快速通道）写入线程
+
+        写入的消息与智能体自己执行该步骤时的形式一致：用户消息、工具调用、
+        工具结果和一条结束响应，后续步骤的 LLM 调用可以看到这些步骤做过什么。
+
+        Args:
+            user_input: 步骤的自然语言指令
+            tool_calls: 执行过的工具调用（包含 name 和 args）
+            results: 与 tool_calls 一一对应的工具结果
+            thread_id: 线程ID（如果不提供则使用会话ID）
+        """
+        if not self.checkpointer or not self.agent_executor:
+            return
+
+        self._recorded_steps += 1
+        calls = [
+            {
+                "name": call["name"],
+                "args": call.get("args", {}),
+                "id": f"call_step{self._recorded_steps}_{i}",
+                "type": "tool_call",
+            }
+            for i, call in enumerate(tool_calls)
+        ]
+        messages: List[BaseMessage] = [
+            HumanMessage(content=self._build_input(user_input)),
+            AIMessage(content="", tool_calls=calls),
+        ]
+        for call, result in zip(calls, results):
+            content = strip_volatile_fields(result)
+            if self.result_shaper:
+                content, _ = self.result_shaper.shape(call["name"], content)
+            if not isinstance(content, str):
+                content = json.dumps(content, ensure_ascii=False, default=str)
+            messages.append(
+                ToolMessage(content=content, name=call["name"], tool_call_id=call["id"])
+            )
+        messages.append(AIMessage(content="步骤已完成"))
+
+        # 作为 agent 节点的输出写入：最后一条响应没有工具调用，线程停在结束状态
+        await self.agent_executor.aupdate_state(
+            self._thread_config(thread_id or self.session_id),
+            {"messages": messages},
+            as_node="agent",
+        )
+
     async def execute(
-        self, user_input: str, stream: bool = True, thread_id: Optional[str] = None
+        self,
+        user_input: str,
+        stream: bool = True,
+        thread_id: Optional[str] = None,
+        planned: Optional[Tuple[HumanMessage, AIMessage]] = None,
     ) -> AsyncGenerator:
         """
         执行任务
@@ -378,9 +840,10 @@ class MidsceneAgent:
             user_input: 任务的自然语言指令
             stream: 是否流式传输响应
             thread_id: 线程ID，用于跨调用的状态管理（如果不提供则使用会话ID）
+            planned: plan() 返回的预先规划结果，提供时跳过第一次 LLM 调用（需要启用 checkpointer）
 
         Yields:
-            智能体执行的事件
+            智能体执行的事件，最后一个事件为 {"execution_summary": 耗时与 token 摘要}
 
         Raises:
             RuntimeError: 如果智能体未初始化
@@ -398,56 +861,75 @@ class MidsceneAgent:
             f"💾 状态持久化: {'✅ 启用' if self.enable_memory_saver else '❌ 禁用'}\n"
         )
 
-        try:
-            # 1. 构建记忆上下文
-            memory_context = self.memory_builder.build_execution_context(
-                current_task=user_input, include_history=True, include_stats=False
-            )
+        self.metrics.start_run()
 
-            # 2. 构建完整的消息，包含系统提示和记忆上下文
-            full_input = f"{SYSTEM_PROMPT}\n\n{memory_context}\n\n{user_input}"
-            logger.info(f"📋 完整输入:\n{full_input}\n")
-
-            input_messages = {"messages": [HumanMessage(content=full_input)]}
-
-            # 3. 配置执行参数
-            config = {
-                "recursion_limit": 100,
-                "configurable": {
-                    "thread_id": actual_thread_id  # 关键：用于状态持久化的线程ID
-                },
-            }
+        try:
+            # 1. 构建包含系统提示和记忆上下文的完整输入
+            if planned is not None and self.checkpointer:
+                human_message, planned_response = planned
+            else:
+                planned_response = None
+                human_message = HumanMessage(content=self._build_input(user_input))
+            logger.info(f"📋 完整输入:\n{human_message.content}\n")
+
+            # 2. 配置执行参数
+            config = self._thread_config(actual_thread_id)
+
+            # 3. 提交预先规划的结果：作为 agent 节点的输出写入线程，从工具节点继续执行
+            if planned_response is not None:
+                logger.info("⚡ 使用预先规划的结果，跳过首次 LLM 调用")
+                await self.agent_executor.aupdate_state(
+                    config,
+                    {"messages": [human_message, planned_response]},
+                    as_node="agent",
+                )
+                graph_input = None
+            else:
+                graph_input = {"messages": [human_message]}
 
             # 4. 执行任务
+            loop_stop: Optional[str] = None
             if stream:
+                if planned_response is not None:
+                    yield {"agent": {"messages": [planned_response]}}
+                # 工具调用由工具包装器逐个记录到记忆
                 async for chunk in self.agent_executor.astream(
-                    input_messages, config=config
+                    graph_input, config=config
                 ):
-                    # 5. 处理结果并更新记忆（如果需要）
-                    if "messages" in chunk:
-                        # 解析AI响应中的工具调用
-                        messages = chunk["messages"]
-                        if messages:
-                            last_message = messages[-1]
-                            # TODO: 在这里解析工具调用并更新记忆
-                            # 这需要更复杂的解析逻辑来提取工具调用信息
-
+                    loop_stop = loop_stop or loop_stop_kind(chunk.get("agent"))
                     yield chunk
             else:
-                result = await self.agent_executor.ainvoke(
-                    input_messages, config=config
-                )
-                # TODO: 更新记忆记录
+                result = await self.agent_executor.ainvoke(graph_input, config=config)
+                loop_stop = loop_stop_kind(result)
                 yield result
 
-            # 6. 记录成功执行到记忆
-            self.memory.add_record(
-                action="execute",
-                params={"user_input": user_input, "thread_id": actual_thread_id},
-                result="执行成功",
-                success=True,
-                context={"session_id": self.session_id, "thread_id": actual_thread_id},
-            )
+            # 5. 记录执行结果到记忆（因循环被结束的步骤没有完成，视为失败）
+            if loop_stop is not None:
+                error_msg = f"检测到循环调用 ({loop_stop})，步骤未完成"
+                logger.error(error_msg)
+                self.memory.add_record(
+                    action="execute",
+                    params={"user_input": user_input},
+                    result=None,
+                    success=False,
+                    error_message=error_msg,
+                    context={
+                        "session_id": self.session_id,
+                        "thread_id": actual_thread_id,
+                    },
+                )
+                yield {"error": error_msg}
+            else:
+                self.memory.add_record(
+                    action="execute",
+                    params={"user_input": user_input},
+                    result="执行成功",
+                    success=True,
+                    context={
+                        "session_id": self.session_id,
+                        "thread_id": actual_thread_id,
+                    },
+                )
 
         except Exception as e:
             import traceback
@@ -459,7 +941,7 @@ class MidsceneAgent:
             # 记录失败到记忆
             self.memory.add_record(
                 action="execute",
-                params={"user_input": user_input, "thread_id": actual_thread_id},
+                params={"user_input": user_input},
                 result=str(e),
                 success=False,
                 error_message=str(e),
@@ -468,6 +950,18 @@ class MidsceneAgent:
 
             yield {"error": error_msg, "traceback": traceback.format_exc()}
 
+        finally:
+            # 调用方提前结束迭代（break、aclose）时也要结束本次统计
+            summary = self.metrics.end_run()
+
+        # 7. 输出本次执行的耗时与 token 摘要
+        logger.info(
+            f"⏱️ 执行耗时 {summary['wall_ms']:.0f}ms "
+            f"(LLM {summary['llm']['latency']['total_ms']:.0f}ms, "
+            f"工具 {summary['tools']['latency']['total_ms']:.0f}ms)"
+        )
+        yield {"execution_summary": summary}
+
     # ==================== 状态持久化管理方法 ====================
 
     async def get_thread_state(
@@ -487,12 +981,22 @@ class MidsceneAgent:
         actual_thread_id = thread_id or self.session_id
 
         try:
-            # 从checkpointer获取状态
             config = {"configurable": {"thread_id": actual_thread_id}}
-            # LangGraph MemorySaver 的具体API可能需要根据版本调整
-            # 这里是一个概念性的实现
-            logger.debug(f"获取线程状态: {actual_thread_id}")
-            return {"thread_id": actual_thread_id, "session_id": self.session_id}
+            snapshot = await self.agent_executor.aget_state(config)
+            messages = snapshot.values.get("messages", []) if snapshot.values else []
+            return {
+                "thread_id": actual_thread_id,
+                "session_id": self.session_id,
+                "checkpoint_id": (
+                    snapshot.config.get("configurable", {}).get("checkpoint_id")
+                    if snapshot.config
+                    else None
+                ),
+                "created_at": snapshot.created_at,
+                "next": list(snapshot.next),
+                "message_count": len(messages),
+                "messages": messages,
+            }
         except Exception as e:
             logger.warning(f"获取线程状态失败: {e}")
             return None
@@ -513,8 +1017,7 @@ class MidsceneAgent:
 
         try:
             logger.info(f"清空线程状态: {actual_thread_id}")
-            # MemorySaver 清空状态的具体实现
-            # 这可能需要根据实际的MemorySaver API调整
+            await self.checkpointer.adelete_thread(actual_thread_id)
             return True
         except Exception as e:
             logger.error(f"清空线程状态失败: {e}")
@@ -527,7 +1030,30 @@ class MidsceneAgent:
             "initialized": self.initialized,
             "enable_memory_saver": self.enable_memory_saver,
             "checkpointer_enabled": self.checkpointer is not None,
+            "checkpointer_stats": (
+                self.checkpointer.get_stats()
+                if hasattr(self.checkpointer, "get_stats")
+                else None
+            ),
             "memory_stats": self.memory.get_stats(),
+            "tool_scheduler_stats": (
+                self.tool_scheduler.get_stats() if self.tool_scheduler else None
+            ),
+            "llm_cache_stats": self.llm_cache.get_stats() if self.llm_cache else None,
+            "init_timings": dict(self.init_timings),
+            "metrics": self.metrics.get_stats(),
+            "model_router_stats": (
+                self.model_router.get_stats() if self.model_router else None
+            ),
+            "loop_detector_stats": (
+                self.loop_detector.get_stats() if self.loop_detector else None
+            ),
+            "result_shaper_stats": (
+                self.result_shaper.get_stats() if self.result_shaper else None
+            ),
+            "compaction_stats": (
+                self.message_compactor.get_stats() if self.message_compactor else None
+            ),
             "deduplication_enabled": True,  # 阶段1已实现
         }
 
@@ -572,7 +1098,23 @@ class MidsceneAgent:
             操作历史记录列表
         """
         records = self.memory.get_action_history(action_type)
-        return [record.__dict__ for record in records]
+        return [asdict(record) for record in records]
+
+    def get_page_history(
+        self, url: str, limit: int = 20, successful_only: bool = True
+    ) -> List[Dict[str, Any]]:
+        """获取某个页面上的历史操作（配置了持久化存储时包含之前运行的记录）
+
+        Args:
+            url: 页面 URL
+            limit: 返回记录的最大数量
+            successful_only: 只返回成功的操作
+
+        Returns:
+            按时间从旧到新排序的操作记录列表
+        """
+        records = self.memory.get_page_history(url, limit, successful_only)
+        return [asdict(record) for record in records]
 
     def find_similar_action(
         self, action: str, params: Dict[str, Any], time_window: float = 300
@@ -588,7 +1130,7 @@ class MidsceneAgent:
             找到的相似记录，如果没有则返回None
         """
         record = self.memory.find_similar_action(action, params, time_window)
-        return record.__dict__ if record else None
+        return asdict(record) if record else None
 
     def get_recent_context(self, limit: int = 5) -> str:
         """获取最近操作的上下文描述
@@ -635,9 +1177,24 @@ class MidsceneAgent:
     async def cleanup(self) -> None:
         """清理资源"""
         try:
+            if self._websocket_task and not self._websocket_task.done():
+                self._websocket_task.cancel()
+                await asyncio.gather(self._websocket_task, return_exceptions=True)
+            self._websocket_task = None
+            self.memory.stop_expiry()
+
             if self.http_client:
                 await self.http_client.cleanup()
                 logger.info("🔌 HTTP 客户端已清理")
+            if isinstance(self.checkpointer, SQLiteCheckpointSaver):
+                self.checkpointer.close()
+                self.checkpointer = None
+            if self.memory.store is not None:
+                self.memory.store.close()
+                self.memory.store = None
+            if self.llm_cache is not None:
+                self.llm_cache.close()
+                self.llm_cache = None
         except Exception as e:
             logger.error(f"清理资源时出错: {e}")
 
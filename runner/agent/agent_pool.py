@@ -0,0 +1,236 @@
+"""
+智能体池
+
+创建并初始化 MidsceneAgent 需要启动浏览器会话、构建 LLM 客户端和执行图，
+按请求或按文件创建再销毁的代价很高。AgentPool 维护最多 N 个已初始化的智能体：
+
+1. 按需创建，第一个智能体的 LLM 客户端和工具 schema 由后续智能体复用
+2. 所有智能体共享同一个 HTTP 连接池（由智能体池负责关闭）
+3. lease() 租用空闲智能体，没有空闲且已达上限时有界等待
+4. release() 归还后在后台任务中清空本次租用的记忆和默认线程状态，并重建浏览器会话，
+   下一个租用者不会看到上一个租用者的 Cookie、登录状态和页面；
+   重置完成前该智能体的名额不释放，调用方不需要等待浏览器会话重建
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+import aiohttp
+
+from .agent import MidsceneAgent
+from .http_client import create_connector
+from .metrics import TimingStats
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 智能体工厂：接收共享的 HTTP 连接池，返回未初始化的智能体
+AgentFactory = Callable[[aiohttp.TCPConnector], MidsceneAgent]
+
+
+class AgentPoolTimeout(Exception):
+    """等待空闲智能体超时"""
+
+    pass
+
+
+class AgentPool:
+    """智能体池
+
+    租用期间智能体只属于一个调用方；调用方应使用默认线程（agent.session_id），
+    自定义的 thread_id 需要调用方自行清理。
+    """
+
+    def __init__(
+        self,
+        agent_factory: AgentFactory,
+        size: int = 4,
+        lease_timeout: Optional[float] = 60.0,
+    ):
+        """初始化智能体池
+
+        Args:
+            agent_factory: 智能体工厂
+            size: 最多同时存在的智能体数量
+            lease_timeout: 租用时的默认最长等待时间（秒，None 表示一直等待）
+        """
+        self.agent_factory = agent_factory
+        self.size = max(1, size)
+        self.lease_timeout = lease_timeout
+
+        self._slots = asyncio.Semaphore(self.size)
+        self._idle: List[MidsceneAgent] = []
+        self._leased: Set[MidsceneAgent] = set()
+        self._recycling: Set["asyncio.Task[None]"] = set()
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._llm_source: Optional[MidsceneAgent] = None
+        self._create_lock = asyncio.Lock()
+        self._closed = False
+
+        # 统计信息
+        self.created = 0
+        self.discarded = 0
+        self.leases = 0
+        self.timeouts = 0
+        self.max_in_use = 0
+        self.wait = TimingStats()
+
+    async def lease(self, timeout: Optional[float] = None) -> MidsceneAgent:
+        """租用一个已初始化的智能体
+
+        Args:
+            timeout: 最长等待时间（秒），None 时使用 lease_timeout
+
+        Returns:
+            已初始化的智能体
+
+        Raises:
+            AgentPoolTimeout: 等待超时
+        """
+        if self._closed:
+            raise RuntimeError("智能体池已关闭")
+
+        started = time.perf_counter()
+        wait_timeout = timeout if timeout is not None else self.lease_timeout
+        try:
+            await asyncio.wait_for(self._slots.acquire(), wait_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise AgentPoolTimeout(
+                f"等待空闲智能体超时 ({wait_timeout}s, 池大小 {self.size})"
+            ) from None
+        self.wait.add((time.perf_counter() - started) * 1000)
+
+        try:
+            agent = self._idle.pop() if self._idle else await self._create_agent()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        self._leased.add(agent)
+        self.leases += 1
+        self.max_in_use = max(self.max_in_use, len(self._leased))
+        return agent
+
+    async def release(self, agent: MidsceneAgent, discard: bool = False) -> None:
+        """归还智能体
+
+        重置在后台任务中进行，本方法立即返回；重置完成前 lease() 不会拿到该智能体。
+
+        Args:
+            agent: lease() 返回的智能体
+            discard: 是否丢弃该智能体（例如浏览器会话已损坏），之后按需重新创建
+        """
+        if agent not in self._leased:
+            raise ValueError("归还的智能体不属于本池或已归还")
+        self._leased.discard(agent)
+
+        task = asyncio.create_task(self._recycle(agent, discard))
+        self._recycling.add(task)
+        task.add_done_callback(self._recycling.discard)
+
+    @asynccontextmanager
+    async def agent(
+        self, timeout: Optional[float] = None
+    ) -> AsyncIterator[MidsceneAgent]:
+        """租用智能体的上下文管理器，退出时自动归还（已失效的智能体会被丢弃）"""
+        agent = await self.lease(timeout)
+        try:
+            yield agent
+        finally:
+            await self.release(agent, discard=not agent.initialized)
+
+    async def close(self) -> None:
+        """清理所有空闲智能体并关闭共享连接池（租用中的智能体在归还时清理）"""
+        self._closed = True
+        await self._wait_recycling()
+        idle, self._idle = self._idle, []
+        await asyncio.gather(
+            *(agent.cleanup() for agent in idle), return_exceptions=True
+        )
+
+        if not self._leased:
+            await self._close_connector()
+        logger.info(f"🧹 智能体池已关闭，清理了 {len(idle)} 个智能体")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取智能体池统计信息"""
+        return {
+            "size": self.size,
+            "created": self.created,
+            "discarded": self.discarded,
+            "idle": len(self._idle),
+            "in_use": len(self._leased),
+            "max_in_use": self.max_in_use,
+            "leases": self.leases,
+            "timeouts": self.timeouts,
+            "wait": self.wait.to_dict(),
+        }
+
+    async def _create_agent(self) -> MidsceneAgent:
+        """创建并初始化新智能体（第一个智能体提供共享的 LLM 客户端）"""
+        async with self._create_lock:
+            if self._connector is None:
+                self._connector = create_connector()
+            llm_source = self._llm_source
+            if llm_source is None:
+                agent = self._new_agent()
+                await agent.initialize()
+                self._llm_source = agent
+
+        if llm_source is not None:
+            agent = self._new_agent()
+            await agent.initialize(llm_source=llm_source)
+
+        logger.info(f"🏊 智能体池创建智能体 ({self.created}/{self.size})")
+        return agent
+
+    def _new_agent(self) -> MidsceneAgent:
+        agent = self.agent_factory(self._connector)
+        self.created += 1
+        # 同一秒内创建的智能体会话ID相同，加上序号避免共享检查点时线程冲突
+        agent.session_id = f"{agent.session_id}_pool{self.created}"
+        return agent
+
+    async def _close_connector(self) -> None:
+        if self._connector is not None:
+            await self._connector.close()
+            self._connector = None
+
+    async def _recycle(self, agent: MidsceneAgent, discard: bool) -> None:
+        """重置归还的智能体并放回空闲列表，失败或池已关闭时清理（完成后释放名额）"""
+        try:
+            if not discard and not self._closed:
+                try:
+                    await self._reset(agent)
+                    self._idle.append(agent)
+                    return
+                except Exception as e:
+                    logger.warning(f"⚠️ 重置智能体失败，丢弃: {e}")
+
+            self.discarded += 1
+            await agent.cleanup()
+        finally:
+            self._slots.release()
+            # 池关闭后最后一个归还的智能体负责关闭连接池（空闲智能体由 close() 清理）
+            if (
+                self._closed
+                and not self._leased
+                and not self._idle
+                and len(self._recycling) <= 1
+            ):
+                await self._close_connector()
+
+    async def _wait_recycling(self) -> None:
+        """等待所有正在进行的重置完成"""
+        while self._recycling:
+            await asyncio.gather(*self._recycling, return_exceptions=True)
+
+    async def _reset(self, agent: MidsceneAgent) -> None:
+        """清空本次租用的记忆、默认线程状态和浏览器会话"""
+        agent.memory.clear()
+        await agent.clear_thread_state(agent.session_id)
+        await agent.reset_browser_session()
@@ -0,0 +1,597 @@
+"""
+检查点存储
+
+MemorySaver 会把每个线程的全部检查点常驻在内存中，进程重启后线程状态也随之丢失。
+本模块提供两种 LangGraph 检查点存储：
+1. SQLiteCheckpointSaver：检查点写入磁盘，每个线程只保留最近若干个检查点，
+   重启后可以通过相同的 thread_id 恢复线程
+2. BoundedMemorySaver：内存存储，按 LRU、空闲时间和内存上限淘汰整个线程
+"""
+
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """基于 SQLite 的压缩检查点存储
+
+    功能：
+    1. 检查点和待写入数据持久化到 SQLite（WAL 模式）
+    2. 每次写入检查点后压缩线程历史，只保留最近 keep_last 个检查点
+    3. 支持按线程删除全部状态
+    4. 统计写入次数和压缩掉的检查点数量
+    """
+
+    def __init__(self, db_path: str, keep_last: int = 20):
+        """初始化检查点存储
+
+        Args:
+            db_path: SQLite 数据库文件路径
+            keep_last: 每个线程（命名空间）保留的最近检查点数量
+        """
+        super().__init__()
+        self.db_path = db_path
+        self.keep_last = max(1, keep_last)
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        # 同步节点和异步接口会在不同线程访问连接
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT,
+                checkpoint BLOB,
+                metadata_type TEXT,
+                metadata BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            )
+            """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            )
+            """)
+        self._conn.commit()
+
+        # 统计信息
+        self.puts = 0
+        self.compacted_checkpoints = 0
+        self.deleted_threads = 0
+
+        logger.info(f"💾 持久化检查点已启用: {db_path}")
+
+    # ==================== 同步接口 ====================
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """获取检查点
+
+        config 中包含 checkpoint_id 时返回对应检查点，否则返回线程的最新检查点。
+        """
+        thread_id: str = config["configurable"]["thread_id"]
+        checkpoint_ns: str = config["configurable"].get("checkpoint_ns", "")
+
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                    "metadata_type, metadata FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                    "metadata_type, metadata FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            writes = self._load_writes(thread_id, checkpoint_ns, row[0])
+
+        return self._make_tuple(thread_id, checkpoint_ns, row, writes)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """按检查点 ID 倒序列出检查点"""
+        where: List[str] = []
+        params: List[Any] = []
+        if config:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            params.append(before_checkpoint_id)
+
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        for row in rows:
+            thread_id, checkpoint_ns = row[0], row[1]
+            metadata = self.serde.loads_typed((row[6], row[7]))
+            # 按元数据过滤
+            if filter and not all(
+                query_value == metadata.get(query_key)
+                for query_key, query_value in filter.items()
+            ):
+                continue
+            # 限制返回数量
+            if limit is not None and limit <= 0:
+                break
+            elif limit is not None:
+                limit -= 1
+
+            with self._lock:
+                writes = self._load_writes(thread_id, checkpoint_ns, row[2])
+            yield self._make_tuple(thread_id, checkpoint_ns, row[2:], writes)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """保存检查点并压缩线程历史
+
+        检查点中包含完整的通道值，因此删除旧检查点不会影响新检查点的读取。
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                "type, checkpoint, metadata_type, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    serialized_checkpoint,
+                    metadata_type,
+                    serialized_metadata,
+                ),
+            )
+            self._compact(thread_id, checkpoint_ns)
+            self._conn.commit()
+            self.puts += 1
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """保存检查点关联的待写入数据"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            type_, serialized_value = self.serde.dumps_typed(value)
+            rows.append(
+                (
+                    # 普通写入已存在时保留原值，特殊通道（错误、中断等）覆盖
+                    "INSERT OR IGNORE" if write_idx >= 0 else "INSERT OR REPLACE",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint_id,
+                        task_id,
+                        write_idx,
+                        channel,
+                        type_,
+                        serialized_value,
+                        task_path,
+                    ),
+                )
+            )
+
+        with self._lock:
+            for verb, params in rows:
+                self._conn.execute(
+                    f"{verb} INTO writes "
+                    "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, "
+                    "channel, type, value, task_path) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    params,
+                )
+            self._conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """删除线程的全部检查点和待写入数据"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,)
+            )
+            self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+            self.deleted_threads += 1
+        logger.info(f"🗑️ 删除线程检查点: {thread_id}")
+
+    # ==================== 异步接口 ====================
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        """生成通道的下一个版本号（与 MemorySaver 格式一致）"""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        next_v = current_v + 1
+        next_h = random.random()
+        return f"{next_v:032}.{next_h:016}"
+
+    # ==================== 维护与统计 ====================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取检查点存储统计信息"""
+        with self._lock:
+            threads, checkpoints = self._conn.execute(
+                "SELECT COUNT(DISTINCT thread_id), COUNT(*) FROM checkpoints"
+            ).fetchone()
+            writes = self._conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
+
+        return {
+            "backend": "sqlite",
+            "db_path": self.db_path,
+            "keep_last": self.keep_last,
+            "threads": threads,
+            "checkpoints": checkpoints,
+            "pending_writes": writes,
+            "puts": self.puts,
+            "compacted_checkpoints": self.compacted_checkpoints,
+            "deleted_threads": self.deleted_threads,
+        }
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def _compact(self, thread_id: str, checkpoint_ns: str) -> None:
+        """只保留线程最近的 keep_last 个检查点（调用方持有锁）"""
+        removed = self._conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND checkpoint_id NOT IN ("
+            "SELECT checkpoint_id FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT ?)",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_last),
+        ).rowcount
+        if removed > 0:
+            self._conn.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND checkpoint_id NOT IN ("
+                "SELECT checkpoint_id FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ?)",
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+            )
+            self.compacted_checkpoints += removed
+
+    def _load_writes(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> List[Tuple[str, str, Any]]:
+        """读取检查点的待写入数据（调用方持有锁）"""
+        rows = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return [
+            (task_id, channel, self.serde.loads_typed((type_, value)))
+            for task_id, channel, type_, value in rows
+        ]
+
+    def _make_tuple(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        row: Sequence[Any],
+        writes: List[Tuple[str, str, Any]],
+    ) -> CheckpointTuple:
+        """由数据库行构造检查点元组"""
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint, meta_type, meta = row
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((meta_type, meta)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=writes,
+        )
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """带淘汰策略的内存检查点存储
+
+    长时间运行的适配器进程中，MemorySaver 会无限保留每个线程的检查点。
+    本类在写入检查点时按以下策略淘汰整个线程：
+    1. 空闲时间超过 idle_ttl 的线程
+    2. 线程数超过 max_threads 时淘汰最久未访问的线程
+    3. 估算占用超过 max_bytes 时继续淘汰最久未访问的线程
+
+    正在写入的线程不会被淘汰；内存占用按序列化后的字节数估算。
+    """
+
+    def __init__(
+        self,
+        max_threads: Optional[int] = 200,
+        idle_ttl: Optional[float] = 3600,
+        max_bytes: Optional[int] = 256 * 1024 * 1024,
+    ):
+        """初始化内存检查点存储
+
+        Args:
+            max_threads: 最多保留的线程数（None 表示不限制）
+            idle_ttl: 线程最大空闲时间（秒，None 表示不限制）
+            max_bytes: 检查点估算占用上限（字节，None 表示不限制）
+        """
+        super().__init__()
+        self.max_threads = max_threads
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+
+        # 线程ID -> 最后访问时间（按访问顺序排列，最久未访问的在前）
+        self._last_access: "OrderedDict[str, float]" = OrderedDict()
+        # 线程ID -> 估算字节数
+        self._thread_bytes: Dict[str, int] = {}
+        self.total_bytes = 0
+
+        # 统计信息
+        self.evicted_threads = 0
+        self.evictions_by_reason: Dict[str, int] = {"ttl": 0, "count": 0, "memory": 0}
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        result = super().get_tuple(config)
+        if thread_id in self._last_access:
+            self._touch(thread_id)
+        elif not any(self.storage.get(thread_id, {}).values()):
+            # defaultdict 读取不存在的线程会留下空条目
+            self.storage.pop(thread_id, None)
+        return result
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+
+        saved_checkpoint, saved_metadata, _ = self.storage[thread_id][checkpoint_ns][
+            checkpoint["id"]
+        ]
+        size = len(saved_checkpoint[1]) + len(saved_metadata[1])
+        for channel, version in new_versions.items():
+            blob = self.blobs.get((thread_id, checkpoint_ns, channel, version))
+            if blob is not None:
+                size += len(blob[1])
+
+        self._account(thread_id, size)
+        self._touch(thread_id)
+        self._evict(exclude=thread_id)
+        return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        outer_key = (
+            thread_id,
+            config["configurable"].get("checkpoint_ns", ""),
+            config["configurable"]["checkpoint_id"],
+        )
+        before = self._writes_bytes(outer_key)
+        super().put_writes(config, writes, task_id, task_path)
+        self._account(thread_id, self._writes_bytes(outer_key) - before)
+        self._touch(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        self._last_access.pop(thread_id, None)
+        self.total_bytes -= self._thread_bytes.pop(thread_id, 0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取检查点存储统计信息"""
+        return {
+            "backend": "memory",
+            "live_threads": len(self._last_access),
+            "evicted_threads": self.evicted_threads,
+            "evictions_by_reason": dict(self.evictions_by_reason),
+            "approx_bytes": self.total_bytes,
+            "max_threads": self.max_threads,
+            "idle_ttl": self.idle_ttl,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _touch(self, thread_id: str) -> None:
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _account(self, thread_id: str, size: int) -> None:
+        self._thread_bytes[thread_id] = self._thread_bytes.get(thread_id, 0) + size
+        self.total_bytes += size
+
+    def _writes_bytes(self, outer_key: Tuple[str, str, str]) -> int:
+        entries = self.writes.get(outer_key) or {}
+        return sum(len(value[1]) for _, _, value, _ in entries.values())
+
+    def _evict(self, exclude: str) -> None:
+        """按空闲时间、线程数和内存上限淘汰线程"""
+        if self.idle_ttl is not None:
+            cutoff = time.monotonic() - self.idle_ttl
+            for thread_id, last_access in list(self._last_access.items()):
+                if last_access >= cutoff:
+                    break
+                if thread_id != exclude:
+                    self._evict_thread(thread_id, "ttl")
+
+        while self.max_threads is not None and len(self._last_access) > max(
+            1, self.max_threads
+        ):
+            if not self._evict_oldest(exclude, "count"):
+                break
+
+        while self.max_bytes is not None and self.total_bytes > self.max_bytes:
+            if not self._evict_oldest(exclude, "memory"):
+                break
+
+    def _evict_oldest(self, exclude: str, reason: str) -> bool:
+        for thread_id in self._last_access:
+            if thread_id != exclude:
+                self._evict_thread(thread_id, reason)
+                return True
+        return False
+
+    def _evict_thread(self, thread_id: str, reason: str) -> None:
+        self.delete_thread(thread_id)
+        self.evicted_threads += 1
+        self.evictions_by_reason[reason] += 1
+        logger.info(f"🧹 淘汰线程检查点 ({reason}): {thread_id}")
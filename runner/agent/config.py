@@ -27,6 +27,43 @@ class Config:
     DEEPSEEK_MODEL: str = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
     DEEPSEEK_TEMPERATURE: float = float(os.getenv("DEEPSEEK_TEMPERATURE", "0"))
 
+    # 简单步骤使用的快速模型（为空表示所有调用都使用 DEEPSEEK_MODEL）
+    DEEPSEEK_FAST_MODEL: str = os.getenv("DEEPSEEK_FAST_MODEL", "")
+
+    # LLM 响应缓存（SQLite 文件路径，为空表示不启用）
+    LLM_CACHE_PATH: str = os.getenv("MIDSCENE_LLM_CACHE_PATH", "")
+
+    # 线程检查点持久化（SQLite 文件路径，为空表示使用内存存储）
+    CHECKPOINT_PATH: str = os.getenv("MIDSCENE_CHECKPOINT_PATH", "")
+
+    # 内存检查点淘汰策略（线程数上限、空闲时间秒数、内存上限 MB）
+    CHECKPOINT_MAX_THREADS: int = int(
+        os.getenv("MIDSCENE_CHECKPOINT_MAX_THREADS", "200")
+    )
+    CHECKPOINT_IDLE_TTL: float = float(
+        os.getenv("MIDSCENE_CHECKPOINT_IDLE_TTL", "3600")
+    )
+    CHECKPOINT_MAX_MB: int = int(os.getenv("MIDSCENE_CHECKPOINT_MAX_MB", "256"))
+
+    # 持久化记忆（SQLite 文件路径，可由多个进程共享，为空表示不启用）
+    MEMORY_STORE_PATH: str = os.getenv("MIDSCENE_MEMORY_STORE_PATH", "")
+
+    # 记忆记录的最大年龄（秒，0 表示不清理），长期存活的智能体在后台清理过期记录
+    MEMORY_MAX_AGE: float = float(os.getenv("MIDSCENE_MEMORY_MAX_AGE", "3600"))
+
+    # 每个智能体记忆占用的上限（KB），以及被压缩的大结果的落盘目录（为空表示丢弃）
+    MEMORY_MAX_KB: int = int(os.getenv("MIDSCENE_MEMORY_MAX_KB", "1024"))
+    MEMORY_SPILL_DIR: str = os.getenv("MIDSCENE_MEMORY_SPILL_DIR", "")
+
+    # 近似重复操作的 Jaccard 相似度阈值（0 表示只识别参数完全相同的操作）
+    SIMILARITY_THRESHOLD: float = float(os.getenv("MIDSCENE_SIMILARITY_THRESHOLD", "0"))
+
+    # 智能体池（最多同时存在的智能体数、租用时的最长等待秒数）
+    AGENT_POOL_SIZE: int = int(os.getenv("MIDSCENE_AGENT_POOL_SIZE", "4"))
+    AGENT_POOL_LEASE_TIMEOUT: float = float(
+        os.getenv("MIDSCENE_AGENT_POOL_LEASE_TIMEOUT", "60")
+    )
+
     # Midscene 配置
     MIDSCENE_MODEL_NAME: str = os.getenv(
         "MIDSCENE_MODEL_NAME", "doubao-seed-1.6-vision"
@@ -71,7 +108,18 @@ class Config:
                 ),
                 "base_url": cls.DEEPSEEK_BASE_URL,
                 "model": cls.DEEPSEEK_MODEL,
+                "fast_model": cls.DEEPSEEK_FAST_MODEL,
                 "temperature": cls.DEEPSEEK_TEMPERATURE,
+                "llm_cache_path": cls.LLM_CACHE_PATH,
+                "checkpoint_path": cls.CHECKPOINT_PATH,
+                "checkpoint_max_threads": cls.CHECKPOINT_MAX_THREADS,
+                "checkpoint_idle_ttl": cls.CHECKPOINT_IDLE_TTL,
+                "checkpoint_max_mb": cls.CHECKPOINT_MAX_MB,
+                "memory_store_path": cls.MEMORY_STORE_PATH,
+                "memory_max_age": cls.MEMORY_MAX_AGE,
+                "memory_max_kb": cls.MEMORY_MAX_KB,
+                "memory_spill_dir": cls.MEMORY_SPILL_DIR,
+                "similarity_threshold": cls.SIMILARITY_THRESHOLD,
             },
             "midscene": {
                 "model": cls.MIDSCENE_MODEL_NAME,
@@ -81,6 +129,8 @@ class Config:
                     cls.OPENAI_API_KEY[:10] + "..." if cls.OPENAI_API_KEY else ""
                 ),
                 "base_url": cls.OPENAI_BASE_URL,
+                "agent_pool_size": cls.AGENT_POOL_SIZE,
+                "agent_pool_lease_timeout": cls.AGENT_POOL_LEASE_TIMEOUT,
             },
             "browser": {
                 "headless": cls.HEADLESS,
@@ -45,6 +45,16 @@ class ActionResult:
     timestamp: Optional[int] = None
 
 
+def create_connector() -> aiohttp.TCPConnector:
+    """创建 HTTP 连接池"""
+    return aiohttp.TCPConnector(
+        limit=100,  # 连接池大小
+        limit_per_host=30,  # 每个主机连接数
+        ttl_dns_cache=300,  # DNS 缓存时间
+        use_dns_cache=True,
+    )
+
+
 class MidsceneHTTPClient:
     """
     HTTP 客户端包装器
@@ -52,18 +62,24 @@ class MidsceneHTTPClient:
     提供与 Node.js Midscene 服务的异步通信接口
     """
 
-    def __init__(self, base_url: str = "http://localhost:3000"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:3000",
+        connector: Optional[aiohttp.TCPConnector] = None,
+    ):
         """
         初始化 HTTP 客户端
 
         Args:
             base_url: Node.js 服务器地址
+            connector: 共享的连接池（由调用方负责关闭；None 表示自行创建）
         """
         self.base_url = base_url.rstrip("/")
         self.session: Optional[aiohttp.ClientSession] = None
         self.session_id: Optional[str] = None
         self.websocket: Optional[aiohttp.ClientWebSocketResponse] = None
         self.connector: Optional[aiohttp.TCPConnector] = None
+        self.shared_connector = connector
 
     @asynccontextmanager
     async def connection(self):
@@ -79,17 +95,18 @@ class MidsceneHTTPClient:
         if self.session:
             return
 
-        # 配置连接池
-        self.connector = aiohttp.TCPConnector(
-            limit=100,  # 连接池大小
-            limit_per_host=30,  # 每个主机连接数
-            ttl_dns_cache=300,  # DNS 缓存时间
-            use_dns_cache=True,
-        )
-
-        self.session = aiohttp.ClientSession(
-            connector=self.connector, timeout=aiohttp.ClientTimeout(total=300)
-        )
+        # 使用共享连接池时不负责关闭它
+        if self.shared_connector is not None:
+            self.session = aiohttp.ClientSession(
+                connector=self.shared_connector,
+                connector_owner=False,
+                timeout=aiohttp.ClientTimeout(total=300),
+            )
+        else:
+            self.connector = create_connector()
+            self.session = aiohttp.ClientSession(
+                connector=self.connector, timeout=aiohttp.ClientTimeout(total=300)
+            )
 
         logger.info(f"HTTP 客户端已连接到 {self.base_url}")
 
@@ -334,15 +351,16 @@ class MidsceneHTTPClient:
 
         try:
             ws_url = self.base_url.replace("http", "ws") + "/ws"
-            self.websocket = await self.session.ws_connect(ws_url)
+            websocket = await self.session.ws_connect(ws_url)
 
-            # 类型断言：告诉 Pylance 这里 websocket 不是 None
-            assert self.websocket is not None
             # 订阅会话
-            await self.websocket.send_json(
+            await websocket.send_json(
                 {"type": "subscribe", "sessionId": self.session_id}
             )
 
+            # 订阅完成后再启用，避免后台连接期间的动作使用未订阅的连接
+            self.websocket = websocket
+
             logger.info("✅ WebSocket 连接成功")
             return True
 
@@ -397,22 +415,26 @@ class MidsceneHTTPClient:
                 "timestamp": int(asyncio.get_event_loop().time() * 1000),
             }
 
+    async def close_session(self) -> None:
+        """断开 WebSocket 并销毁当前 Midscene 会话（关闭浏览器），保留 HTTP 连接"""
+        if self.websocket:
+            await self.disconnect_websocket()
+
+        if self.session_id and self.session:
+            try:
+                await self.session.delete(
+                    f"{self.base_url}/api/sessions/{self.session_id}"
+                )
+                logger.info(f"🗑️ 会话 {self.session_id} 已销毁")
+            except Exception as e:
+                logger.warning(f"销毁会话时出错: {e}")
+        self.session_id = None
+
     async def cleanup(self) -> None:
         """清理资源"""
         try:
-            # 断开 WebSocket 连接
-            if self.websocket:
-                await self.disconnect_websocket()
-
-            # 销毁会话
-            if self.session_id and self.session:
-                try:
-                    await self.session.delete(
-                        f"{self.base_url}/api/sessions/{self.session_id}"
-                    )
-                    logger.info(f"🗑️ 会话 {self.session_id} 已销毁")
-                except Exception as e:
-                    logger.warning(f"销毁会话时出错: {e}")
+            # 断开 WebSocket 连接并销毁会话
+            await self.close_session()
 
             # 关闭 HTTP 会话
             if self.session:
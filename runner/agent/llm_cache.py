@@ -0,0 +1,267 @@
+"""
+LLM 响应缓存
+
+在 temperature=0 时，相同的消息、工具定义和模型会得到相同的规划结果。
+本模块以这三者的规范化哈希为键，将 LLM 响应持久化到 SQLite，
+重复运行未变化的测试套件时可以跳过大部分 LLM 规划延迟。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+# 服务端结果中每次调用都会变化的字段（时间戳、耗时），
+# 进入消息内容会使相同的运行永远得不到相同的缓存键
+VOLATILE_RESULT_FIELDS = frozenset({"timestamp", "duration"})
+
+
+def strip_volatile_fields(result: Any) -> Any:
+    """去掉工具结果顶层的时间戳、耗时等每次调用都不同的字段"""
+    if isinstance(result, dict) and not VOLATILE_RESULT_FIELDS.isdisjoint(result):
+        return {k: v for k, v in result.items() if k not in VOLATILE_RESULT_FIELDS}
+    return result
+
+
+def _canonical_message(message: BaseMessage) -> Dict[str, Any]:
+    """将消息转换为与运行无关的规范形式
+
+    消息 ID 和工具调用 ID 每次运行都不同，不参与缓存键计算。
+    """
+    canonical: Dict[str, Any] = {"type": message.type, "content": message.content}
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        canonical["tool_calls"] = [
+            {"name": tc["name"], "args": tc.get("args", {})} for tc in tool_calls
+        ]
+    return canonical
+
+
+class LLMResponseCache:
+    """基于 SQLite 的 LLM 响应精确匹配缓存
+
+    功能：
+    1. 以消息、工具 schema 和模型名称的规范化哈希作为缓存键
+    2. 按条目数量和存活时间淘汰旧条目
+    3. 统计命中、未命中、写入和淘汰次数
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_entries: int = 5000,
+        max_age: float = 7 * 24 * 3600,
+        evict_interval: int = 50,
+    ):
+        """初始化响应缓存
+
+        Args:
+            db_path: SQLite 数据库文件路径
+            max_entries: 最大缓存条目数，超过时淘汰最久未命中的条目
+            max_age: 条目最大存活时间（秒），默认 7 天
+            evict_interval: 每写入多少条执行一次淘汰检查
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.evict_interval = max(1, evict_interval)
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        # LangGraph 会在线程池中执行同步节点，连接需要跨线程共享
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_hit_at REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_hit ON llm_cache(last_hit_at)"
+        )
+        self._conn.commit()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._puts_since_evict = 0
+
+        self.evict()
+        logger.info(f"🗄️ LLM 响应缓存已启用: {db_path}")
+
+    @staticmethod
+    def make_key(
+        messages: Sequence[BaseMessage],
+        tool_schemas: List[Dict[str, Any]],
+        model_name: str,
+    ) -> str:
+        """计算缓存键
+
+        Args:
+            messages: 发送给 LLM 的消息列表
+            tool_schemas: 绑定到 LLM 的工具 schema 列表
+            model_name: 模型名称
+
+        Returns:
+            SHA-256 十六进制摘要
+        """
+        payload = {
+            "model": model_name,
+            "tools": tool_schemas,
+            "messages": [_canonical_message(m) for m in messages],
+        }
+        encoded = json.dumps(
+            payload,
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[AIMessage]:
+        """查找缓存的响应
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的 AI 消息（工具调用 ID 已重新生成），未命中或已过期时返回 None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET last_hit_at = ?, hit_count = hit_count + 1 "
+                "WHERE key = ?",
+                (now, key),
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        data = json.loads(row[0])
+        tool_calls = [
+            {
+                "name": tc["name"],
+                "args": tc["args"],
+                "id": f"call_cached_{uuid.uuid4().hex[:24]}",
+                "type": "tool_call",
+            }
+            for tc in data.get("tool_calls", [])
+        ]
+        logger.info(f"⚡ LLM 缓存命中: {key[:12]}")
+        return AIMessage(content=data.get("content", ""), tool_calls=tool_calls)
+
+    def put(self, key: str, model_name: str, message: BaseMessage) -> None:
+        """写入 LLM 响应
+
+        Args:
+            key: 缓存键
+            model_name: 模型名称
+            message: LLM 返回的消息
+        """
+        data = {
+            "content": message.content,
+            "tool_calls": [
+                {"name": tc["name"], "args": tc.get("args", {})}
+                for tc in getattr(message, "tool_calls", None) or []
+            ],
+        }
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache "
+                "(key, model, response, created_at, last_hit_at, hit_count) "
+                "VALUES (?, ?, ?, ?, ?, 0)",
+                (key, model_name, json.dumps(data, ensure_ascii=False), now, now),
+            )
+            self._conn.commit()
+            self.stores += 1
+            self._puts_since_evict += 1
+            should_evict = self._puts_since_evict >= self.evict_interval
+
+        if should_evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """淘汰过期条目和超出容量的条目
+
+        Returns:
+            淘汰的条目数量
+        """
+        with self._lock:
+            cutoff = time.time() - self.max_age
+            expired = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (cutoff,)
+            ).rowcount
+
+            overflow = self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY last_hit_at DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._conn.commit()
+            self._puts_since_evict = 0
+
+        removed = max(0, expired) + max(0, overflow)
+        if removed:
+            self.evictions += removed
+            logger.info(f"🧹 LLM 缓存淘汰: {removed} 条")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+        lookups = self.hits + self.misses
+        return {
+            "db_path": self.db_path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+        logger.info("清空 LLM 响应缓存")
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
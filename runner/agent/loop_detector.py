@@ -0,0 +1,237 @@
+"""
+重复调用与循环检测
+
+智能体有时会反复以相同参数调用同一个工具，或在两个动作之间来回切换（A-B-A-B），
+直到耗尽 recursion_limit。本模块根据当前步骤内每批工具调用的指纹
+（工具名 + 规范化参数）检测这两种循环：
+
+1. 第一次检测到循环时，向 LLM 注入纠正提示（提示只出现在本次调用中，不写入线程）
+2. 提示次数用完后仍然循环，则直接结束当前步骤，该步骤视为失败
+
+连续滚动本身就是在取得进展（加载更多内容），不按重复调用处理。
+可选的文本参数相似度比较（similarity_threshold）把措辞略有不同的调用
+（如 "登录按钮" 与 "点击登录按钮"）也视为相同；导航和滚动始终只比较精确参数，
+因为 page/1 与 page/2 这样相似度很高的参数恰恰是不同的操作。
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from .memory.similarity import jaccard, params_text, shingles
+from .memory.simple_memory import SimpleMemory, param_fingerprint
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 注入过纠正提示的 LLM 响应在 response_metadata 中的标记
+LOOP_HINT_KEY = "loop_hint"
+
+# 因循环而结束步骤时，结束消息在 response_metadata 中的标记
+LOOP_STOP_KEY = "loop_stop"
+
+LOOP_REPEAT = "repeat"
+LOOP_OSCILLATION = "oscillation"
+
+# 重复执行即是进展的工具（连续滚动加载更多内容），只由这些工具组成的批次不按重复调用处理
+PROGRESS_TOOLS = frozenset({"midscene_aiScroll"})
+
+# 参数相似但代表不同操作的工具（page/1 与 page/2），即使开启相似度比较也只比较精确指纹
+EXACT_MATCH_TOOLS = frozenset({"midscene_navigate", "midscene_aiScroll"})
+
+
+def tool_call_fingerprint(tool_call: Dict[str, Any]) -> str:
+    """计算工具调用指纹（工具名 + 参数指纹）"""
+    return f"{tool_call.get('name', '')}:{param_fingerprint(tool_call.get('args', {}))}"
+
+
+def loop_stop_kind(update: Optional[Dict[str, Any]]) -> Optional[str]:
+    """从 agent 节点的输出中取出循环结束标记
+
+    Args:
+        update: agent 节点的状态更新（或图的最终状态）
+
+    Returns:
+        步骤因循环被结束时返回循环类型，否则返回 None
+    """
+    messages = (update or {}).get("messages") or []
+    if messages and isinstance(messages[-1], AIMessage):
+        return messages[-1].response_metadata.get(LOOP_STOP_KEY)
+    return None
+
+
+# 一批工具调用的比较键：[(工具调用指纹, 工具名, 文本参数 n-gram)]
+_BatchKey = List[Tuple[str, str, FrozenSet[str]]]
+
+
+@dataclass
+class LoopVerdict:
+    """循环检测结果"""
+
+    kind: str  # LOOP_REPEAT 或 LOOP_OSCILLATION
+    tool_calls: List[Dict[str, Any]]  # 循环中最近一批工具调用
+    action: str  # "hint" 或 "stop"
+    hint: str
+
+
+class LoopDetector:
+    """循环检测器
+
+    只检查当前步骤（最后一条用户消息之后）的工具调用；
+    注入提示后重新计数，给 LLM 一次纠正的机会。
+    """
+
+    def __init__(
+        self,
+        memory: SimpleMemory,
+        max_repeats: int = 3,
+        max_oscillations: int = 2,
+        max_hints: int = 1,
+        similarity_threshold: Optional[float] = None,
+    ):
+        """初始化循环检测器
+
+        Args:
+            memory: 智能体的操作记忆（用于在提示中说明上次的执行结果）
+            max_repeats: 同一批工具调用连续出现多少次视为循环
+            max_oscillations: A-B 交替出现多少轮视为循环
+            max_hints: 每个步骤最多注入的纠正提示次数，用完后直接结束步骤
+            similarity_threshold: 文本参数的 Jaccard 相似度达到该值时视为相同调用（默认 None，只比较精确指纹）
+        """
+        self.memory = memory
+        self.max_repeats = max(2, max_repeats)
+        self.max_oscillations = max(2, max_oscillations)
+        self.max_hints = max_hints
+        self.similarity_threshold = similarity_threshold
+
+        # 统计信息
+        self.checks = 0
+        self.hints = 0
+        self.stops = 0
+        self.by_kind: Dict[str, int] = {}
+
+    def check(self, messages: List[BaseMessage]) -> Optional[LoopVerdict]:
+        """检查当前步骤是否陷入循环
+
+        Args:
+            messages: 将要发送给 LLM 的完整消息历史
+
+        Returns:
+            检测到循环时返回处理方式，否则返回 None
+        """
+        self.checks += 1
+        batches: List[AIMessage] = []
+        hints_given = 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if not isinstance(message, AIMessage):
+                continue
+            # 只统计最近一次提示之后（含提示后的响应本身）的工具调用
+            if message.tool_calls and hints_given == 0:
+                batches.append(message)
+            if message.response_metadata.get(LOOP_HINT_KEY):
+                hints_given += 1
+        batches.reverse()
+
+        kind = self._detect([self._batch_key(message) for message in batches])
+        if kind is None:
+            return None
+
+        tool_calls = batches[-1].tool_calls
+        action = "stop" if hints_given >= self.max_hints else "hint"
+        self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+        if action == "stop":
+            self.stops += 1
+            logger.warning(f"🔁 检测到循环 ({kind})，结束当前步骤")
+        else:
+            self.hints += 1
+            logger.warning(f"🔁 检测到循环 ({kind})，注入纠正提示")
+        return LoopVerdict(kind, tool_calls, action, self._describe(kind, tool_calls))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取检测统计信息"""
+        return {
+            "max_repeats": self.max_repeats,
+            "max_oscillations": self.max_oscillations,
+            "similarity_threshold": self.similarity_threshold,
+            "checks": self.checks,
+            "hints": self.hints,
+            "stops": self.stops,
+            "by_kind": dict(self.by_kind),
+        }
+
+    def _batch_key(self, message: AIMessage) -> _BatchKey:
+        return [
+            (
+                tool_call_fingerprint(tc),
+                tc.get("name", ""),
+                (
+                    shingles(params_text(tc.get("args", {})))
+                    if self.similarity_threshold
+                    and tc.get("name", "") not in EXACT_MATCH_TOOLS
+                    else frozenset()
+                ),
+            )
+            for tc in message.tool_calls
+        ]
+
+    def _same(self, a: _BatchKey, b: _BatchKey) -> bool:
+        """两批工具调用是否相同（逐个比较指纹，指纹不同且开启了相似度比较时比较文本参数）"""
+        if len(a) != len(b):
+            return False
+        for (fp_a, name_a, grams_a), (fp_b, name_b, grams_b) in zip(a, b):
+            if fp_a == fp_b:
+                continue
+            if (
+                name_a != name_b
+                or not self.similarity_threshold
+                or jaccard(grams_a, grams_b) < self.similarity_threshold
+            ):
+                return False
+        return True
+
+    def _detect(self, batches: List[_BatchKey]) -> Optional[str]:
+        n = self.max_repeats
+        if (
+            len(batches) >= n
+            and not all(name in PROGRESS_TOOLS for _, name, _ in batches[-1])
+            and all(self._same(batches[-1], batch) for batch in batches[-n:-1])
+        ):
+            return LOOP_REPEAT
+
+        window = 2 * self.max_oscillations
+        if len(batches) >= window:
+            recent = batches[-window:]
+            if not self._same(recent[-1], recent[-2]) and all(
+                self._same(recent[i], recent[i % 2]) for i in range(2, window)
+            ):
+                return LOOP_OSCILLATION
+
+        return None
+
+    def _describe(self, kind: str, tool_calls: List[Dict[str, Any]]) -> str:
+        """生成纠正提示，附带记忆中相同操作的上次结果
+
+        提示中不包含相对时间等随时间变化的内容，相同的循环得到相同的提示。
+        """
+        if kind == LOOP_REPEAT:
+            text = f"你已经连续 {self.max_repeats} 次以相同或几乎相同的参数执行了相同的工具调用。"
+        else:
+            text = "你在两组工具调用之间来回切换，没有取得进展。"
+
+        for tool_call in tool_calls:
+            api_name = tool_call["name"].replace("midscene_", "")
+            match = self.memory.find_near_duplicate_action(api_name, tool_call["args"])
+            if match is None:
+                continue
+            record = match[0]
+            status = "成功" if record.success else f"失败: {record.error_message}"
+            text += f"\n- {api_name} 已执行过，结果{status}"
+
+        return (
+            text + "\n请不要再重复相同的操作。如果任务已经完成，直接总结结果；"
+            "否则换一种方式（例如调整定位描述、先查询页面状态）继续。"
+        )
@@ -0,0 +1,165 @@
+"""
+记忆组件微基准测试
+
+用法:
+    python -m runner.agent.memory.benchmark
+    python -m runner.agent.memory.benchmark --sizes 10000 50000 100000
+    python -m runner.agent.memory.benchmark --similarity 0.6
+
+每个规模下创建 max_size 等于该规模的 SimpleMemory，先写满再继续写入同样数量的记录
+（触发淘汰），然后测量常用查询（包括近似重复查找）的耗时和每条记录的内存占用。
+--similarity 开启近似相似度索引，用于比较维护索引的写入成本。
+作为对照，同时测量按旧实现（列表 + pop(0) + 全量扫描统计）的写入和统计耗时。
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from .simple_memory import MemoryRecord, SimpleMemory
+
+ACTIONS = ["aiTap", "aiInput", "navigate", "aiQuery", "aiAssert", "aiScroll"]
+
+
+def _make_params(i: int) -> Dict[str, Any]:
+    return {"locate": f"按钮{i % 500}", "index": i % 7}
+
+
+def _timed(func: Callable[[], Any], repeat: int = 1) -> float:
+    """返回平均耗时（微秒）"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) * 1e6 / repeat
+
+
+def _fill(memory: SimpleMemory, count: int) -> None:
+    for i in range(count):
+        memory.add_record(
+            action=ACTIONS[i % len(ACTIONS)],
+            params=_make_params(i),
+            result="ok",
+            success=i % 10 != 0,
+            latency_ms=12.5,
+        )
+
+
+class _ListMemory:
+    """旧实现的对照：列表存储、pop(0) 淘汰、统计时全量扫描"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.records: List[MemoryRecord] = []
+
+    def add_record(self, action: str, params: Dict[str, Any], success: bool) -> None:
+        self.records.append(
+            MemoryRecord(time.time(), action, params, "ok", {}, success, None, 12.5)
+        )
+        if len(self.records) > self.max_size:
+            self.records.pop(0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        successful = sum(1 for r in self.records if r.success)
+        counts: Dict[str, int] = {}
+        for record in self.records:
+            counts[record.action] = counts.get(record.action, 0) + 1
+        return {"successful": successful, "action_counts": counts}
+
+
+def run_benchmark(
+    size: int, similarity_threshold: Optional[float] = None
+) -> Dict[str, float]:
+    """运行单个规模的基准测试"""
+    results: Dict[str, float] = {}
+
+    tracemalloc.start()
+    memory = SimpleMemory(max_size=size, similarity_threshold=similarity_threshold)
+    started = time.perf_counter()
+    _fill(memory, size)
+    results["fill_us_per_record"] = (time.perf_counter() - started) * 1e6 / size
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results["bytes_per_record"] = current / size
+
+    # 写满后继续写入，每次写入都会淘汰最旧的记录
+    started = time.perf_counter()
+    _fill(memory, size)
+    results["evict_us_per_record"] = (time.perf_counter() - started) * 1e6 / size
+
+    results["get_stats_us"] = _timed(memory.get_stats, repeat=100)
+    results["success_rate_us"] = _timed(
+        lambda: memory.get_success_rate("aiTap"), repeat=100
+    )
+    results["recent_10_us"] = _timed(lambda: memory.get_recent_actions(10), 1000)
+    results["recent_context_5_us"] = _timed(
+        lambda: memory.get_recent_context(5), repeat=1000
+    )
+    results["action_history_us"] = _timed(
+        lambda: memory.get_action_history("aiTap"), repeat=100
+    )
+    results["recent_failures_us"] = _timed(
+        lambda: memory.query_records(success=False, since=time.time() - 300, limit=5),
+        repeat=1000,
+    )
+    results["find_similar_miss_us"] = _timed(
+        lambda: memory.find_similar_action("aiTap", {"locate": "不存在", "index": 0}),
+        repeat=1000,
+    )
+    results["find_similar_hit_us"] = _timed(
+        lambda: memory.find_similar_action("aiTap", _make_params(size - 6)),
+        repeat=1000,
+    )
+    # 措辞不同的重复操作（"点击按钮N" 规范化后与 "按钮N" 相同）
+    results["near_dup_hit_us"] = _timed(
+        lambda: memory.find_near_duplicate_action(
+            "aiTap", {"locate": f"点击按钮{(size - 6) % 500}", "index": 1}
+        ),
+        repeat=1000,
+    )
+    results["near_dup_miss_us"] = _timed(
+        lambda: memory.find_near_duplicate_action(
+            "aiTap", {"locate": "页面底部的版权声明", "index": 0}
+        ),
+        repeat=1000,
+    )
+
+    legacy = _ListMemory(max_size=size)
+    for i in range(size):
+        legacy.add_record(ACTIONS[i % len(ACTIONS)], _make_params(i), i % 10 != 0)
+    started = time.perf_counter()
+    for i in range(min(size, 10000)):
+        legacy.add_record(ACTIONS[i % len(ACTIONS)], _make_params(i), i % 10 != 0)
+    results["legacy_evict_us_per_record"] = (
+        (time.perf_counter() - started) * 1e6 / min(size, 10000)
+    )
+    results["legacy_get_stats_us"] = _timed(legacy.get_stats, repeat=10)
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SimpleMemory 微基准测试")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10000, 100000],
+        help="记忆容量（默认: 10000 100000）",
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        default=None,
+        help="近似相似度索引的阈值（默认不建立索引）",
+    )
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(f"\n📊 max_size = {size}, similarity_threshold = {args.similarity}")
+        for name, value in run_benchmark(size, args.similarity).items():
+            print(f"  {name:<28} {value:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+对话消息压缩组件
+用于在长线程中按 token 预算压缩发送给 LLM 的消息历史
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的 token 数量
+
+    中日韩字符按每字 1 个 token 计算，其余字符按每 4 个字符 1 个 token 计算。
+
+    Args:
+        text: 要估算的文本
+
+    Returns:
+        估算的 token 数量
+    """
+    if not text:
+        return 0
+    cjk_count = sum(1 for ch in text if "⺀" <= ch <= "鿿")
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+
+def _content_text(message: BaseMessage) -> str:
+    """提取消息的文本内容"""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, ensure_ascii=False, default=str)
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """估算单条消息的 token 数量（包含工具调用参数）"""
+    tokens = estimate_tokens(_content_text(message)) + 4
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += estimate_tokens(tool_call.get("name", ""))
+        tokens += estimate_tokens(
+            json.dumps(tool_call.get("args", {}), ensure_ascii=False, default=str)
+        )
+    return tokens
+
+
+class MessageCompactor:
+    """对话消息压缩器
+
+    在每次 LLM 调用前检查消息总量，超出 token 预算时：
+    1. 保留稳定前缀（线程的第一条用户消息，包含系统提示）
+    2. 去掉后续用户消息中重复的系统提示
+    3. 将较早的轮次压缩为工具调用及其结果的简短记录
+    4. 仍然超出预算时，减少保留的轮次并截断旧的工具结果
+
+    压缩只作用于发送给 LLM 的消息视图，不修改线程中持久化的状态。
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 32000,
+        keep_recent_turns: int = 2,
+        stable_prefix: Optional[str] = None,
+        max_tool_result_chars: int = 500,
+    ):
+        """初始化消息压缩器
+
+        Args:
+            token_budget: 发送给 LLM 的消息 token 预算
+            keep_recent_turns: 原样保留的最近轮次数量（至少保留当前轮次）
+            stable_prefix: 每条用户消息共享的稳定前缀（通常是系统提示）
+            max_tool_result_chars: 截断旧工具结果时保留的最大字符数
+        """
+        self.token_budget = token_budget
+        self.keep_recent_turns = max(1, keep_recent_turns)
+        self.stable_prefix = stable_prefix
+        self.max_tool_result_chars = max_tool_result_chars
+
+        # 统计信息
+        self.compaction_count = 0
+        self.tokens_saved = 0
+
+    def compact(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """按 token 预算压缩消息列表
+
+        Args:
+            messages: 线程中的完整消息列表
+
+        Returns:
+            压缩后的消息列表；未超出预算时原样返回
+        """
+        original_tokens = sum(message_tokens(m) for m in messages)
+        if original_tokens <= self.token_budget:
+            return messages
+
+        prefix, turns = self._split_turns(messages)
+        turns = [self._strip_stable_prefix(turn) for turn in turns]
+
+        keep = min(self.keep_recent_turns, len(turns))
+        compacted = self._assemble(prefix, turns, keep)
+
+        # 仍然超出预算：逐步减少原样保留的轮次
+        while keep > 1 and self._total_tokens(compacted) > self.token_budget:
+            keep -= 1
+            compacted = self._assemble(prefix, turns, keep)
+
+        # 仍然超出预算：截断保留轮次中的工具结果
+        if self._total_tokens(compacted) > self.token_budget:
+            compacted = [
+                self._truncate_tool_message(m) if isinstance(m, ToolMessage) else m
+                for m in compacted
+            ]
+
+        compacted_tokens = self._total_tokens(compacted)
+        self.compaction_count += 1
+        self.tokens_saved += max(0, original_tokens - compacted_tokens)
+        logger.info(
+            f"🗜️ 压缩对话历史: {len(messages)} → {len(compacted)} 条消息, "
+            f"约 {original_tokens} → {compacted_tokens} tokens"
+        )
+        return compacted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取压缩统计信息"""
+        return {
+            "token_budget": self.token_budget,
+            "keep_recent_turns": self.keep_recent_turns,
+            "compaction_count": self.compaction_count,
+            "tokens_saved": self.tokens_saved,
+        }
+
+    def _total_tokens(self, messages: List[BaseMessage]) -> int:
+        return sum(message_tokens(m) for m in messages)
+
+    def _split_turns(
+        self, messages: List[BaseMessage]
+    ) -> Tuple[List[BaseMessage], List[List[BaseMessage]]]:
+        """将消息拆分为稳定前缀和按用户消息划分的轮次
+
+        第一轮的用户消息作为稳定前缀单独保留，其后续消息仍属于第一轮。
+        """
+        prefix: List[BaseMessage] = []
+        turns: List[List[BaseMessage]] = []
+
+        for index, message in enumerate(messages):
+            if index == 0 and isinstance(message, HumanMessage):
+                prefix.append(message)
+                turns.append([])
+            elif isinstance(message, HumanMessage) or not turns:
+                turns.append([message])
+            else:
+                turns[-1].append(message)
+
+        return prefix, turns
+
+    def _assemble(
+        self,
+        prefix: List[BaseMessage],
+        turns: List[List[BaseMessage]],
+        keep: int,
+    ) -> List[BaseMessage]:
+        """组装前缀、旧轮次摘要和最近轮次"""
+        old_turns, recent_turns = turns[:-keep], turns[-keep:]
+        result = list(prefix)
+        if old_turns:
+            result.append(self._summarize_turns(old_turns, prefix))
+        for turn in recent_turns:
+            result.extend(turn)
+        return result
+
+    def _strip_stable_prefix(self, turn: List[BaseMessage]) -> List[BaseMessage]:
+        """去掉非首条用户消息中重复的稳定前缀"""
+        if not self.stable_prefix or not turn or not isinstance(turn[0], HumanMessage):
+            return turn
+
+        content = turn[0].content
+        if isinstance(content, str) and content.startswith(self.stable_prefix):
+            stripped = content[len(self.stable_prefix) :].lstrip()
+            return [HumanMessage(content=stripped, id=turn[0].id)] + turn[1:]
+        return turn
+
+    def _summarize_turns(
+        self, turns: List[List[BaseMessage]], prefix: List[BaseMessage]
+    ) -> AIMessage:
+        """将多个旧轮次压缩为一条摘要消息"""
+        lines = [f"=== 早期对话摘要（已压缩 {len(turns)} 轮）==="]
+
+        for index, turn in enumerate(turns, 1):
+            tool_outcomes: Dict[str, ToolMessage] = {
+                m.tool_call_id: m for m in turn if isinstance(m, ToolMessage)
+            }
+            # 第一轮的用户消息保留在稳定前缀中
+            task = self._extract_task(turn if index > 1 or not prefix else prefix)
+            lines.append(f"[{index}] 任务: {task}" if task else f"[{index}] 继续执行")
+
+            final_answer = ""
+            for message in turn:
+                if not isinstance(message, AIMessage):
+                    continue
+                for tool_call in message.tool_calls:
+                    outcome = tool_outcomes.get(tool_call.get("id") or "")
+                    lines.append(
+                        f"  - {tool_call['name']}"
+                        f"({self._format_args(tool_call.get('args', {}))}) "
+                        f"{self._format_outcome(outcome)}"
+                    )
+                if not message.tool_calls and _content_text(message).strip():
+                    final_answer = _content_text(message).strip()
+
+            if final_answer:
+                lines.append(f"  - 结论: {self._shorten(final_answer, 120)}")
+
+        return AIMessage(content="\n".join(lines))
+
+    def _extract_task(self, turn: List[BaseMessage]) -> str:
+        """提取轮次中用户消息的任务描述（去掉系统提示和记忆上下文）"""
+        if not turn or not isinstance(turn[0], HumanMessage):
+            return ""
+        task = _content_text(turn[0]).rsplit("\n\n", 1)[-1].strip()
+        return self._shorten(task, 120)
+
+    def _format_args(self, args: Dict[str, Any]) -> str:
+        parts = [f"{k}={self._shorten(str(v), 40)}" for k, v in args.items()]
+        return ", ".join(parts)
+
+    def _format_outcome(self, outcome: Optional[ToolMessage]) -> str:
+        if outcome is None:
+            return "⏳ 无结果"
+        text = _content_text(outcome)
+        failed = outcome.status == "error" or "执行失败" in text or "执行错误" in text
+        return f"{'❌' if failed else '✅'} {self._shorten(text, 60)}"
+
+    def _truncate_tool_message(self, message: ToolMessage) -> ToolMessage:
+        text = _content_text(message)
+        if len(text) <= self.max_tool_result_chars:
+            return message
+        return message.model_copy(
+            update={
+                "content": text[: self.max_tool_result_chars]
+                + f"...(已截断，原长度 {len(text)} 字符)"
+            }
+        )
+
+    @staticmethod
+    def _shorten(text: str, limit: int) -> str:
+        text = " ".join(text.split())
+        return text if len(text) <= limit else text[:limit] + "..."
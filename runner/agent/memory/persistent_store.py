@@ -0,0 +1,311 @@
+"""
+持久化记忆存储
+
+SimpleMemory 只存在于进程内，运行结束后"哪个页面上哪些操作成功过"就丢失了。
+本模块将记忆记录追加写入 SQLite（WAL 模式）：
+
+1. 只追加不修改，多个执行器进程可以同时写入同一个文件（写入冲突时等待 busy_timeout）
+2. 按 URL、操作类型和参数指纹建立索引，加载最近记录或某个页面的历史只读取索引命中的行
+3. 启用 mmap 读取，按记录年龄和总条数淘汰旧记录
+4. 记录引用的落盘文件（SimpleMemory 的 spill_path）由存储管理：
+   其他进程和后续运行可能加载这些记录，文件只在记录被淘汰或清空存储时删除
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+from .simple_memory import MemoryRecord
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 读取时映射到内存的最大字节数
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+class PersistentMemoryStore:
+    """基于 SQLite 的追加写入记忆存储
+
+    每个进程（或每个智能体）持有自己的连接；同一进程内的多个线程共享连接时由锁保护。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_age: Optional[float] = 30 * 24 * 3600,
+        max_records: Optional[int] = 100000,
+        evict_interval: int = 500,
+        busy_timeout: float = 5.0,
+    ):
+        """初始化持久化记忆存储
+
+        Args:
+            db_path: SQLite 数据库文件路径
+            max_age: 记录最大存活时间（秒，None 表示不限制），默认 30 天
+            max_records: 最多保留的记录数（None 表示不限制），超过时淘汰最旧的记录
+            evict_interval: 每追加多少条执行一次淘汰检查
+            busy_timeout: 其他进程正在写入时的最长等待时间（秒）
+        """
+        self.db_path = db_path
+        self.max_age = max_age
+        self.max_records = max_records
+        self.evict_interval = max(1, evict_interval)
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        # LangGraph 会在线程池中执行同步节点，连接需要跨线程共享
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            db_path, timeout=busy_timeout, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 模式下 NORMAL 只在检查点时同步，追加写入不需要每次 fsync
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS memory_records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL NOT NULL,
+                pid INTEGER NOT NULL,
+                action TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                url TEXT NOT NULL,
+                success INTEGER NOT NULL,
+                record TEXT NOT NULL,
+                spill_path TEXT
+            )
+            """)
+        self._ensure_spill_column()
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_memory_records_timestamp "
+            "ON memory_records(timestamp)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_memory_records_url "
+            "ON memory_records(url, id)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_memory_records_action "
+            "ON memory_records(action, fingerprint, id)"
+        )
+        self._conn.commit()
+
+        # 统计信息
+        self.appended = 0
+        self.loaded = 0
+        self.evictions = 0
+        self.write_errors = 0
+        self._appends_since_evict = 0
+
+        self.evict()
+        logger.info(f"🗄️ 持久化记忆已启用: {db_path}")
+
+    def append(self, record: MemoryRecord) -> None:
+        """追加一条记录（写入失败只记录警告，不影响调用方）"""
+        self.append_many([record])
+
+    def append_many(self, records: List[MemoryRecord]) -> None:
+        """在一个事务中追加多条记录"""
+        if not records:
+            return
+
+        pid = os.getpid()
+        rows = [
+            (
+                r.timestamp,
+                pid,
+                r.action,
+                r.fingerprint,
+                r.context.get("url", ""),
+                int(r.success),
+                json.dumps(asdict(r), ensure_ascii=False, default=str),
+                r.spill_path,
+            )
+            for r in records
+        ]
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT INTO memory_records "
+                    "(timestamp, pid, action, fingerprint, url, success, record, "
+                    "spill_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.commit()
+                self.appended += len(rows)
+                self._appends_since_evict += len(rows)
+                should_evict = self._appends_since_evict >= self.evict_interval
+        except sqlite3.Error as e:
+            self.write_errors += 1
+            logger.warning(f"⚠️ 写入持久化记忆失败: {e}")
+            return
+
+        if should_evict:
+            self.evict()
+
+    def load(
+        self,
+        limit: int = 100,
+        url: Optional[str] = None,
+        action: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+        successful_only: bool = False,
+        max_age: Optional[float] = None,
+    ) -> List[MemoryRecord]:
+        """加载最近的记录
+
+        Args:
+            limit: 最多返回的记录数
+            url: 只返回该页面上的记录
+            action: 只返回该类型的操作
+            fingerprint: 只返回该参数指纹的操作（需要同时指定 action）
+            successful_only: 只返回成功的操作
+            max_age: 只返回该时间（秒）以内的记录
+
+        Returns:
+            按时间从旧到新排序的记录列表
+        """
+        conditions = []
+        params: List[Any] = []
+        if url is not None:
+            conditions.append("url = ?")
+            params.append(url)
+        if action is not None:
+            conditions.append("action = ?")
+            params.append(action)
+            if fingerprint is not None:
+                conditions.append("fingerprint = ?")
+                params.append(fingerprint)
+        if successful_only:
+            conditions.append("success = 1")
+        if max_age is not None:
+            conditions.append("timestamp >= ?")
+            params.append(time.time() - max_age)
+
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT record FROM memory_records {where}ORDER BY id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+
+        records = []
+        for (data,) in reversed(rows):
+            try:
+                records.append(MemoryRecord(**json.loads(data)))
+            except (TypeError, ValueError) as e:
+                logger.debug(f"跳过无法解析的记忆记录: {e}")
+        self.loaded += len(records)
+        return records
+
+    def evict(self) -> int:
+        """淘汰过期记录和超出条数上限的记录（同时删除它们的落盘文件）
+
+        Returns:
+            淘汰的记录数量
+        """
+        removed = 0
+        spill_paths: List[str] = []
+        try:
+            with self._lock:
+                if self.max_age is not None:
+                    removed += self._delete(
+                        "timestamp < ?", (time.time() - self.max_age,), spill_paths
+                    )
+                if self.max_records is not None:
+                    # 按自增 ID 删除，比按时间排序更快且与写入顺序一致
+                    row = self._conn.execute(
+                        "SELECT id FROM memory_records ORDER BY id DESC "
+                        "LIMIT 1 OFFSET ?",
+                        (self.max_records,),
+                    ).fetchone()
+                    if row is not None:
+                        removed += self._delete("id <= ?", (row[0],), spill_paths)
+                self._conn.commit()
+                self._appends_since_evict = 0
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 淘汰持久化记忆失败: {e}")
+            return 0
+
+        # 删除的行已经提交，其他进程不会再加载到这些路径
+        _remove_files(spill_paths)
+        removed = max(0, removed)
+        if removed:
+            self.evictions += removed
+            logger.info(f"🧹 持久化记忆淘汰: {removed} 条")
+        return removed
+
+    def _delete(self, where: str, params: tuple, spill_paths: List[str]) -> int:
+        """删除满足条件的记录，并收集它们的落盘文件路径（调用方持有锁）"""
+        spill_paths.extend(
+            path
+            for (path,) in self._conn.execute(
+                f"SELECT spill_path FROM memory_records "
+                f"WHERE {where} AND spill_path IS NOT NULL",
+                params,
+            )
+        )
+        return self._conn.execute(
+            f"DELETE FROM memory_records WHERE {where}", params
+        ).rowcount
+
+    def _ensure_spill_column(self) -> None:
+        """为旧版本创建的数据库添加 spill_path 列"""
+        columns = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(memory_records)")
+        }
+        if "spill_path" in columns:
+            return
+        try:
+            self._conn.execute("ALTER TABLE memory_records ADD COLUMN spill_path TEXT")
+        except sqlite3.OperationalError:
+            # 其他进程已经添加了该列
+            pass
+
+    def count(self) -> int:
+        """返回存储中的记录数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM memory_records").fetchone()[
+                0
+            ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计信息（不查询数据库）"""
+        return {
+            "db_path": self.db_path,
+            "max_age": self.max_age,
+            "max_records": self.max_records,
+            "appended": self.appended,
+            "loaded": self.loaded,
+            "evictions": self.evictions,
+            "write_errors": self.write_errors,
+        }
+
+    def clear(self) -> None:
+        """清空存储和所有落盘文件（影响所有共享该文件的进程）"""
+        spill_paths: List[str] = []
+        with self._lock:
+            self._delete("1", (), spill_paths)
+            self._conn.commit()
+        _remove_files(spill_paths)
+        logger.info("清空持久化记忆")
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+def _remove_files(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,259 @@
+"""
+近似重复操作检测
+
+LLM 经常以略有不同的措辞重复同一个操作（"登录按钮" 与 "点击登录按钮"），
+精确的参数指纹无法识别。本模块对文本参数做规范化后切分为字符 n-gram，
+用 MinHash 签名估计 Jaccard 相似度，并通过 LSH 分桶把查询限制在少量候选上，
+最后对候选计算精确的 Jaccard 相似度。
+"""
+
+import random
+import re
+import zlib
+from collections import deque
+from typing import Any, Deque, Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
+
+# 定位描述中常见的动作前缀，规范化时去掉
+ACTION_PREFIXES = re.compile(
+    r"^(?:请|再|重新)?(?:点击|单击|双击|右键点击|点按|点一下|选择|选中|打开|进入|"
+    r"click(?: on)?|tap(?: on)?|press)\s*",
+    re.IGNORECASE,
+)
+
+# 规范化时去掉的字符：空白和常见中英文标点
+_STRIP_CHARS = re.compile(r"[\s\"'“”‘’`.,，。:：;；!！?？()（）\[\]【】<>《》]+")
+
+# 2^61 - 1（梅森素数），用于 MinHash 的哈希族
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_text(text: str) -> str:
+    """规范化文本：小写、去掉动作前缀、空白和标点"""
+    text = ACTION_PREFIXES.sub("", text.strip().lower())
+    return _STRIP_CHARS.sub("", text)
+
+
+def params_text(params: Dict[str, Any]) -> str:
+    """将参数中的文本值按键排序拼接为一段规范化文本"""
+    parts = []
+    for key in sorted(params):
+        value = params[key]
+        if isinstance(value, str):
+            parts.append(normalize_text(value))
+        elif isinstance(value, (int, float, bool)):
+            parts.append(str(value))
+    return "|".join(p for p in parts if p)
+
+
+def shingles(text: str, n: int = 2) -> FrozenSet[str]:
+    """将文本切分为字符 n-gram 集合（短于 n 的文本整体作为一个元素）"""
+    if len(text) <= n:
+        return frozenset((text,)) if text else frozenset()
+    return frozenset(text[i : i + n] for i in range(len(text) - n + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """计算两个集合的 Jaccard 相似度"""
+    if not a or not b:
+        return 0.0
+    intersection = len(a & b)
+    return intersection / (len(a) + len(b) - intersection)
+
+
+class MinHashLSH:
+    """MinHash + LSH 近似相似度索引
+
+    签名长度 num_perm 被分为 bands 段，任意一段完全相同的两个文本互为候选；
+    候选再用精确 Jaccard 相似度过滤，因此 LSH 只影响召回率和候选数量，不会产生误报。
+    bands 越多召回越高、候选越多。
+
+    相同的文本只建立一次索引，关联值按添加顺序保存在该文本的队列中；
+    n-gram 的取值范围有限（界面文本的字符组合），每个 n-gram 的哈希向量计算一次后缓存。
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        num_perm: int = 64,
+        bands: int = 16,
+        ngram: int = 2,
+        seed: int = 1,
+        max_cached_grams: int = 65536,
+    ):
+        """初始化索引
+
+        Args:
+            threshold: 判定为近似重复的最低 Jaccard 相似度
+            num_perm: MinHash 签名长度（必须能被 bands 整除）
+            bands: LSH 分段数量
+            ngram: 字符 n-gram 长度
+            seed: 哈希族的随机种子
+            max_cached_grams: 最多缓存的 n-gram 哈希向量数量（超过时清空重建）
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.max_cached_grams = max_cached_grams
+
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MAX_HASH), rng.randrange(0, _MAX_HASH))
+            for _ in range(num_perm)
+        ]
+        # n-gram -> 各哈希函数下的取值
+        self._gram_hashes: Dict[str, Tuple[int, ...]] = {}
+
+        # (命名空间, 分段序号, 分段签名) -> 文本集合
+        self._buckets: Dict[Tuple[Hashable, int, Tuple[int, ...]], Set[str]] = {}
+        # (命名空间, 文本) -> (分段签名列表, n-gram 集合, 关联值队列)
+        self._entries: Dict[
+            Tuple[Hashable, str], Tuple[List[Tuple[int, ...]], FrozenSet[str], Deque]
+        ] = {}
+
+        # 统计信息
+        self.queries = 0
+        self.candidates = 0
+        self.matches = 0
+
+    def signature(self, grams: FrozenSet[str]) -> List[int]:
+        """计算 n-gram 集合的 MinHash 签名"""
+        cache = self._gram_hashes
+        vectors = []
+        for gram in grams:
+            vector = cache.get(gram)
+            if vector is None:
+                if len(cache) >= self.max_cached_grams:
+                    cache.clear()
+                # 使用 CRC32 而不是 hash()，签名在进程之间保持一致
+                h = zlib.crc32(gram.encode("utf-8"))
+                vector = cache[gram] = tuple(
+                    (a * h + b) % _MERSENNE_PRIME for a, b in self._perms
+                )
+            vectors.append(vector)
+        return list(map(min, *vectors)) if len(vectors) > 1 else list(vectors[0])
+
+    def add(self, text: str, value: Any, namespace: Hashable = "") -> bool:
+        """添加条目
+
+        Args:
+            text: 已规范化的文本
+            value: 查询命中时返回的关联值
+            namespace: 命名空间（只在同一命名空间内查找相似条目）
+
+        Returns:
+            文本为空时不添加，返回 False
+        """
+        key = (namespace, text)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[2].append(value)
+            return True
+
+        grams = shingles(text, self.ngram)
+        if not grams:
+            return False
+
+        bands = self._bands(self.signature(grams))
+        for i, band in enumerate(bands):
+            self._buckets.setdefault((namespace, i, band), set()).add(text)
+        self._entries[key] = (bands, grams, deque((value,)))
+        return True
+
+    def remove(self, text: str, value: Any, namespace: Hashable = "") -> None:
+        """移除条目（不存在时忽略）"""
+        key = (namespace, text)
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+
+        values = entry[2]
+        # 通常按添加顺序移除，值就在队列开头
+        if values[0] is value:
+            values.popleft()
+        elif value in values:
+            values.remove(value)
+        if values:
+            return
+
+        del self._entries[key]
+        for i, band in enumerate(entry[0]):
+            bucket_key = (namespace, i, band)
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(text)
+                if not bucket:
+                    del self._buckets[bucket_key]
+
+    def query(
+        self, text: str, namespace: Hashable = "", threshold: Optional[float] = None
+    ) -> List[Tuple[Any, float]]:
+        """查找近似重复的条目
+
+        Args:
+            text: 已规范化的文本
+            namespace: 命名空间
+            threshold: 最低相似度（None 时使用初始化时的阈值）
+
+        Returns:
+            [(关联值, 相似度)]，每个匹配的文本返回最近添加的关联值，按相似度从高到低排序
+        """
+        self.queries += 1
+        grams = shingles(text, self.ngram)
+        if not grams:
+            return []
+
+        candidates: Set[str] = set()
+        for i, band in enumerate(self._bands(self.signature(grams))):
+            bucket = self._buckets.get((namespace, i, band))
+            if bucket:
+                candidates.update(bucket)
+        self.candidates += len(candidates)
+
+        minimum = self.threshold if threshold is None else threshold
+        # Jaccard 相似度不可能超过 min(|A|, |B|) / max(|A|, |B|)，先按集合大小过滤
+        size = len(grams)
+        min_size, max_size = size * minimum, size / minimum if minimum else float("inf")
+        matches = []
+        for candidate in candidates:
+            _, entry_grams, values = self._entries[(namespace, candidate)]
+            if not min_size <= len(entry_grams) <= max_size:
+                continue
+            similarity = jaccard(grams, entry_grams)
+            if similarity >= minimum:
+                matches.append((values[-1], similarity))
+        self.matches += len(matches)
+
+        matches.sort(key=lambda m: m[1], reverse=True)
+        return matches
+
+    def clear(self) -> None:
+        """清空索引（保留 n-gram 哈希缓存）"""
+        self._buckets.clear()
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取索引统计信息"""
+        return {
+            "threshold": self.threshold,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "texts": len(self._entries),
+            "buckets": len(self._buckets),
+            "cached_grams": len(self._gram_hashes),
+            "queries": self.queries,
+            "avg_candidates": self.candidates / self.queries if self.queries else 0.0,
+            "matches": self.matches,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _bands(self, signature: List[int]) -> List[Tuple[int, ...]]:
+        rows = self.rows
+        return [tuple(signature[i * rows : (i + 1) * rows]) for i in range(self.bands)]
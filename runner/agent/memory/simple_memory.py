@@ -3,19 +3,114 @@
 用于存储和管理AI执行过程中的操作历史和上下文信息
 """
 
+from collections import deque
 from dataclasses import dataclass, asdict
-from typing import Any, Dict, List, Optional
+from heapq import merge
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Tuple
+import asyncio
 import json
+import os
 import time
 import logging
+import uuid
+
+from .similarity import MinHashLSH, params_text
+
+if TYPE_CHECKING:
+    from .persistent_store import PersistentMemoryStore
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+# 每条记录除参数和结果之外的固定开销估计（对象、槽位、时间戳和索引项）
+RECORD_OVERHEAD_BYTES = 200
+
+# 结果压缩时保留的关键字段（与上下文渲染显示的字段一致）
+RESULT_KEY_FIELDS = ("success", "message", "title", "url")
+
+
+def approx_size(value: Any, limit: Optional[int] = None) -> int:
+    """估算值序列化后的字节数
+
+    遍历嵌套的字典和列表累加各元素的大小，不实际序列化；
+    指定 limit 时超过上限即停止遍历，返回值只保证大于 limit。
+    """
+    total = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            total += len(item.encode("utf-8")) + 2
+        elif item is None or isinstance(item, (bool, int, float)):
+            total += 8
+        elif isinstance(item, dict):
+            total += 2 + 2 * len(item)
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set)):
+            total += 2 + len(item)
+            stack.extend(item)
+        else:
+            total += len(str(item).encode("utf-8"))
+        if limit is not None and total > limit:
+            break
+    return total
+
+
+def compact_result(result: Any, max_bytes: int) -> Any:
+    """将操作结果压缩为有界摘要
+
+    Args:
+        result: 操作结果
+        max_bytes: 摘要的字节上限
+
+    Returns:
+        未超过上限时原样返回；字典保留关键字段并附加摘要说明，其他类型截断为字符串
+    """
+    if approx_size(result, max_bytes) <= max_bytes:
+        return result
+
+    note = f"已压缩，原大小超过 {max_bytes} 字节"
+    if isinstance(result, dict):
+        summary = {
+            key: result[key]
+            for key in RESULT_KEY_FIELDS
+            if key in result
+            and approx_size(result[key], max_bytes // 4) <= max_bytes // 4
+        }
+        summary["_summary"] = f"{note}，共 {len(result)} 个字段"
+        return summary
+
+    text = result if isinstance(result, str) else str(result)
+    head = text.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore")
+    return f"{head}...({note})"
+
+
+def param_fingerprint(params: Dict[str, Any]) -> str:
+    """计算参数的规范化指纹（键排序后的 JSON）
+
+    Args:
+        params: 操作参数
+
+    Returns:
+        参数相同则指纹相同的字符串
+    """
+    try:
+        return json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        # 键类型无法排序等情况，退化为 repr
+        return repr(params)
+
+
+@dataclass(slots=True)
 class MemoryRecord:
-    """记忆记录"""
+    """记忆记录
+
+    每个工具调用都会产生一条记录，使用 __slots__ 减少内存占用；
+    context 与记忆的页面上下文共享同一个字典，页面变化时才会创建新字典。
+    """
 
     timestamp: float
     action: str
@@ -24,6 +119,36 @@ class MemoryRecord:
     context: Dict[str, Any]  # 页面上下文
     success: bool = True  # 操作是否成功
     error_message: Optional[str] = None  # 错误信息（如果有）
+    latency_ms: Optional[float] = None  # 操作耗时（毫秒）
+    fingerprint: str = ""  # 参数指纹（添加记录时计算一次）
+    size_bytes: int = 0  # 记录的估算字节数（添加记录时计算一次）
+    spill_path: Optional[str] = None  # 压缩前完整结果的落盘文件（如果有）
+
+
+def _bucket_add(
+    index: Dict[Any, Deque[MemoryRecord]], key: Any, record: MemoryRecord
+) -> None:
+    bucket = index.get(key)
+    if bucket is None:
+        bucket = index[key] = deque()
+    bucket.append(record)
+
+
+def _bucket_remove(
+    index: Dict[Any, Deque[MemoryRecord]], key: Any, record: MemoryRecord
+) -> None:
+    bucket = index[key]
+    _popleft_record(bucket, record)
+    if not bucket:
+        del index[key]
+
+
+def _popleft_record(bucket: Deque[MemoryRecord], record: MemoryRecord) -> None:
+    # 淘汰总是从最旧的记录开始，通常就在桶的开头
+    if bucket[0] is record:
+        bucket.popleft()
+    else:
+        bucket.remove(record)
 
 
 class SimpleMemory:
@@ -31,18 +156,84 @@ class SimpleMemory:
 
     用于在AI执行过程中存储和检索操作历史，
     帮助AI记住之前执行过的操作和结果，避免重复执行。
+
+    记录保存在固定容量的环形缓冲区中并按时间排序，写满后覆盖最旧的记录（O(1)），
+    过期清理只需从最旧的一端弹出过期记录；
+    按操作类型、页面 URL 和失败记录建立的二级索引在添加和淘汰记录时增量维护，
+    统计查询和 query_records 的时间/URL 范围查询只扫描命中的索引，不再扫描全部记录；
+    (操作类型, 参数指纹) 索引让 find_similar_action 为 O(1)；
+    可选的文本参数 MinHash/LSH 索引让 find_near_duplicate_action 能识别措辞略有不同的重复操作
+    （维护索引使每条记录的写入成本增加一个数量级，默认关闭）。
+    配置持久化存储后，新记录同时追加到存储中，供后续运行和其他进程加载。
+
+    超过 max_result_bytes 的结果在加入时压缩为摘要（可选将完整结果写入 spill_dir），
+    每条记录的估算字节数计入总量，超过 max_bytes 时从最旧的记录开始淘汰；
+    落盘文件随记录一起删除，配置了持久化存储时由存储在淘汰记录时删除。
+
+    每条记录在加入时渲染一次上下文行，get_recent_context 只拼接缓存的行；
+    记录不变时返回与上次完全相同的字符串，便于 LLM 服务端的前缀缓存命中。
     """
 
-    def __init__(self, max_size: int = 100):
+    def __init__(
+        self,
+        max_size: int = 100,
+        similarity_threshold: Optional[float] = None,
+        store: Optional["PersistentMemoryStore"] = None,
+        max_bytes: Optional[int] = None,
+        max_result_bytes: int = 2048,
+        spill_dir: Optional[str] = None,
+    ):
         """初始化记忆组件
 
         Args:
             max_size: 最大记忆记录数量，超过时会删除最旧的记录
+            similarity_threshold: 近似重复的最低 Jaccard 相似度（默认 None，不建立相似度索引，
+                find_near_duplicate_action 只查找参数完全相同的操作）
+            store: 持久化记忆存储（None 表示只保存在进程内）
+            max_bytes: 所有记录的估算字节数上限（None 表示只按条数限制）
+            max_result_bytes: 单条记录结果的字节上限，超过时压缩为摘要
+            spill_dir: 压缩前的完整结果写入的目录（None 表示丢弃完整结果）
         """
         self.max_size = max_size
-        self.records: List[MemoryRecord] = []
+        self.store = store
+        self.max_bytes = max_bytes
+        self.max_result_bytes = max_result_bytes
+        # 规范化为绝对路径（去掉末尾的分隔符），落盘路径写入持久化存储后在其他工作目录下仍然有效
+        self.spill_dir = os.path.abspath(spill_dir) if spill_dir else None
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+        self.records: Deque[MemoryRecord] = deque(maxlen=max_size)
         self.page_context: Dict[str, Any] = {}
 
+        # 增量统计
+        self._total_bytes = 0
+        self._compacted = 0
+        self._action_failures: Dict[str, int] = {}
+
+        # 二级索引，每个桶内的记录都按时间排序
+        # (操作类型, 参数指纹) -> 记录
+        self._index: Dict[Tuple[str, str], Deque[MemoryRecord]] = {}
+        # 操作类型 -> 记录
+        self._by_action: Dict[str, Deque[MemoryRecord]] = {}
+        # 页面 URL -> 记录
+        self._by_url: Dict[str, Deque[MemoryRecord]] = {}
+        # 失败的记录
+        self._failures: Deque[MemoryRecord] = deque()
+
+        # 记录 id -> 渲染好的上下文行；记录集合每次变化时递增版本号
+        self._lines: Dict[int, str] = {}
+        self._version = 0
+        # 最近一次 get_recent_context 的结果：(limit, 版本号, 文本)
+        self._context_cache: Optional[Tuple[int, int, str]] = None
+
+        # 后台过期清理任务（start_expiry 启动）
+        self._expiry_task: Optional[asyncio.Task] = None
+
+        # 文本参数的近似相似度索引（按操作类型划分命名空间）
+        self._similarity: Optional[MinHashLSH] = (
+            MinHashLSH(threshold=similarity_threshold) if similarity_threshold else None
+        )
+
     def add_record(
         self,
         action: str,
@@ -51,6 +242,7 @@ class SimpleMemory:
         context: Optional[Dict[str, Any]] = None,
         success: bool = True,
         error_message: Optional[str] = None,
+        latency_ms: Optional[float] = None,
     ) -> None:
         """添加记忆记录
 
@@ -61,7 +253,15 @@ class SimpleMemory:
             context: 页面上下文（如 URL、标题等）
             success: 操作是否成功
             error_message: 错误信息（如果操作失败）
+            latency_ms: 操作耗时（毫秒）
         """
+        spill_path = None
+        if approx_size(result, self.max_result_bytes) > self.max_result_bytes:
+            if self.spill_dir:
+                spill_path = self._spill(result)
+            result = compact_result(result, self.max_result_bytes)
+            self._compacted += 1
+
         record = MemoryRecord(
             timestamp=time.time(),
             action=action,
@@ -70,14 +270,119 @@ class SimpleMemory:
             context=context or self.page_context,
             success=success,
             error_message=error_message,
+            latency_ms=latency_ms,
+            fingerprint=param_fingerprint(params),
+            spill_path=spill_path,
         )
 
-        self.records.append(record)
+        # 缓冲区已满时 append 会覆盖最旧的记录，先更新它的统计
+        if len(self.records) == self.max_size:
+            self._uncount(self.records[0])
+            self._remove_spill(self.records[0])
+            logger.debug(f"移除最旧的记忆记录: {self.records[0].action}")
 
-        # 保持最大大小限制
-        if len(self.records) > self.max_size:
-            removed_record = self.records.pop(0)
-            logger.debug(f"移除最旧的记忆记录: {removed_record.action}")
+        self.records.append(record)
+        self._count(record)
+        self._enforce_byte_budget()
+
+        if self.store is not None:
+            self.store.append(record)
+
+    def _enforce_byte_budget(self) -> None:
+        """超过字节上限时从最旧的记录开始淘汰（至少保留最新的一条）"""
+        if self.max_bytes is None:
+            return
+        records = self.records
+        while self._total_bytes > self.max_bytes and len(records) > 1:
+            record = records.popleft()
+            self._uncount(record)
+            self._remove_spill(record)
+            logger.debug(f"超过记忆字节上限，移除记录: {record.action}")
+
+    def _spill(self, result: Any) -> Optional[str]:
+        """将完整结果写入 spill_dir，返回文件路径（失败时返回 None）"""
+        path = os.path.join(self.spill_dir, f"{uuid.uuid4().hex}.json")
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, default=str)
+        except OSError as e:
+            logger.warning(f"⚠️ 完整结果落盘失败: {e}")
+            return None
+        return path
+
+    def _remove_spill(self, record: MemoryRecord) -> None:
+        """删除记录的落盘文件（只删除本记忆 spill_dir 中的文件）
+
+        配置了持久化存储时记录（连同落盘路径）可能被其他进程或后续运行加载，
+        文件由存储在淘汰记录时删除，这里不做处理。
+        """
+        path = record.spill_path
+        if (
+            self.store is None
+            and path
+            and self.spill_dir
+            and os.path.dirname(os.path.abspath(path)) == self.spill_dir
+        ):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def load_full_result(self, record: MemoryRecord) -> Any:
+        """读取记录压缩前的完整结果（没有落盘或文件已删除时返回压缩后的结果）"""
+        if record.spill_path:
+            try:
+                with open(record.spill_path, encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                logger.debug(f"无法读取落盘结果: {record.spill_path}")
+        return record.result
+
+    def _count(self, record: MemoryRecord) -> None:
+        """将记录计入统计"""
+        line = self._lines[id(record)] = self._render(record)
+        self._version += 1
+        if not record.size_bytes:
+            record.size_bytes = (
+                RECORD_OVERHEAD_BYTES
+                # 参数字典和参数指纹各占一份
+                + 2 * len(record.fingerprint.encode("utf-8"))
+                + approx_size(record.result)
+                + len((record.error_message or "").encode("utf-8"))
+                + len(line.encode("utf-8"))
+            )
+        self._total_bytes += record.size_bytes
+        action = record.action
+        if not record.fingerprint:
+            record.fingerprint = param_fingerprint(record.params)
+        _bucket_add(self._index, (action, record.fingerprint), record)
+        _bucket_add(self._by_action, action, record)
+        _bucket_add(self._by_url, record.context.get("url", ""), record)
+        if self._similarity is not None:
+            self._similarity.add(params_text(record.params), record, action)
+        if not record.success:
+            self._failures.append(record)
+            self._action_failures[action] = self._action_failures.get(action, 0) + 1
+
+    def _uncount(self, record: MemoryRecord) -> None:
+        """从统计中移除记录"""
+        del self._lines[id(record)]
+        self._version += 1
+        self._total_bytes -= record.size_bytes
+        action = record.action
+        _bucket_remove(self._index, (action, record.fingerprint), record)
+        _bucket_remove(self._by_action, action, record)
+        _bucket_remove(self._by_url, record.context.get("url", ""), record)
+        if self._similarity is not None:
+            self._similarity.remove(params_text(record.params), record, action)
+
+        if not record.success:
+            _popleft_record(self._failures, record)
+            failures = self._action_failures[action] - 1
+            if failures:
+                self._action_failures[action] = failures
+            else:
+                del self._action_failures[action]
 
     def update_context(self, context: Dict[str, Any]) -> None:
         """更新页面上下文
@@ -85,7 +390,8 @@ class SimpleMemory:
         Args:
             context: 新的页面上下文信息
         """
-        self.page_context.update(context)
+        # 替换而不是原地修改，已有记录引用的旧上下文保持不变
+        self.page_context = {**self.page_context, **context}
         logger.debug(f"更新页面上下文: {context}")
 
     def get_recent_actions(self, limit: int = 10) -> List[MemoryRecord]:
@@ -97,7 +403,11 @@ class SimpleMemory:
         Returns:
             最近的记忆记录列表
         """
-        return self.records[-limit:] if self.records else []
+        if limit <= 0:
+            return []
+        recent = list(islice(reversed(self.records), limit))
+        recent.reverse()
+        return recent
 
     def get_successful_actions(self, limit: int = 10) -> List[MemoryRecord]:
         """获取最近成功的操作记录
@@ -108,8 +418,11 @@ class SimpleMemory:
         Returns:
             最近成功的记忆记录列表
         """
-        successful_records = [r for r in self.records if r.success]
-        return successful_records[-limit:] if successful_records else []
+        successful_records = list(
+            islice((r for r in reversed(self.records) if r.success), limit)
+        )
+        successful_records.reverse()
+        return successful_records
 
     def find_similar_action(
         self, action: str, params: Dict[str, Any], time_window: float = 300  # 5分钟
@@ -124,39 +437,127 @@ class SimpleMemory:
         Returns:
             找到的相似记录，如果没有则返回None
         """
-        current_time = time.time()
+        bucket = self._index.get((action, param_fingerprint(params)))
+        if not bucket:
+            return None
 
-        # 从最新的记录开始查找
-        for record in reversed(self.records):
-            # 检查时间窗口
-            if current_time - record.timestamp > time_window:
-                break
+        # 桶中最新的记录不在时间窗口内时，更早的记录也不在
+        record = bucket[-1]
+        if time.time() - record.timestamp > time_window:
+            return None
+
+        logger.debug(f"找到相似操作: {action}, 参数: {params}")
+        return record
+
+    def find_near_duplicate_action(
+        self,
+        action: str,
+        params: Dict[str, Any],
+        time_window: float = 300,
+        threshold: Optional[float] = None,
+    ) -> Optional[Tuple[MemoryRecord, float]]:
+        """查找近似重复的历史操作（如 "登录按钮" 与 "点击登录按钮"）
+
+        Args:
+            action: 操作类型
+            params: 操作参数
+            time_window: 时间窗口（秒）
+            threshold: 最低相似度（None 时使用初始化时的阈值）
 
-            # 检查操作类型和参数
-            if record.action == action and self._params_similar(record.params, params):
-                logger.debug(f"找到相似操作: {action}, 参数: {params}")
-                return record
+        Returns:
+            (记录, 相似度)，参数完全相同时相似度为 1.0；没有则返回None
+        """
+        record = self.find_similar_action(action, params, time_window)
+        if record is not None:
+            return record, 1.0
+        if self._similarity is None:
+            return None
+
+        now = time.time()
+        best: Optional[Tuple[MemoryRecord, float]] = None
+        for candidate, similarity in self._similarity.query(
+            params_text(params), action, threshold
+        ):
+            if now - candidate.timestamp > time_window:
+                continue
+            # 相似度相同时取最新的记录
+            if (
+                best is None
+                or similarity > best[1]
+                or (similarity == best[1] and candidate.timestamp > best[0].timestamp)
+            ):
+                best = (candidate, similarity)
+
+        if best is not None:
+            logger.debug(f"找到近似操作: {action}, 相似度: {best[1]:.2f}")
+        return best
+
+    def load_from_store(
+        self,
+        limit: Optional[int] = None,
+        url: Optional[str] = None,
+        max_age: Optional[float] = None,
+    ) -> int:
+        """从持久化存储加载最近的记录（加载的记录不会再次写入存储）
 
-        return None
+        Args:
+            limit: 最多加载的记录数（None 表示 max_size）
+            url: 只加载该页面上的记录
+            max_age: 只加载该时间（秒）以内的记录
 
-    def _params_similar(self, params1: Dict[str, Any], params2: Dict[str, Any]) -> bool:
-        """检查两个参数字典是否相似
+        Returns:
+            加载的记录数量
+        """
+        if self.store is None:
+            return 0
+
+        limit = self.max_size if limit is None else min(limit, self.max_size)
+        records = self.store.load(limit=limit, url=url, max_age=max_age)
+        # 本进程写入的记录已经在缓冲区中，不重复加载
+        existing = {(r.timestamp, r.action, r.fingerprint) for r in self.records}
+        records = [
+            r for r in records if (r.timestamp, r.action, r.fingerprint) not in existing
+        ]
+        if not records:
+            return 0
+
+        # 与已有记录按时间合并，保持缓冲区有序（过期清理依赖这一点）
+        merged = list(merge(self.records, records, key=lambda r: r.timestamp))
+        for record in self.records:
+            self._uncount(record)
+        self.records.clear()
+        overflow = max(0, len(merged) - self.max_size)
+        for record in merged[:overflow]:
+            self._remove_spill(record)
+        for record in merged[overflow:]:
+            self.records.append(record)
+            self._count(record)
+        self._enforce_byte_budget()
+
+        logger.info(f"从持久化存储加载记忆: {len(records)} 条记录")
+        return len(records)
+
+    def get_page_history(
+        self, url: str, limit: int = 20, successful_only: bool = True
+    ) -> List[MemoryRecord]:
+        """获取某个页面上的历史操作（配置了持久化存储时包含之前运行的记录）
 
         Args:
-            params1: 参数字典1
-            params2: 参数字典2
+            url: 页面 URL
+            limit: 返回记录的最大数量
+            successful_only: 只返回成功的操作
 
         Returns:
-            如果参数相似返回True，否则返回False
+            按时间从旧到新排序的记录列表
         """
-        # 简单实现：检查JSON序列化后是否相等
-        # 未来可以扩展为更智能的相似度匹配
-        try:
-            return json.dumps(params1, sort_keys=True) == json.dumps(
-                params2, sort_keys=True
+        if self.store is not None:
+            return self.store.load(
+                limit=limit, url=url, successful_only=successful_only
             )
-        except (TypeError, ValueError):
-            return False
+
+        return self.query_records(
+            url=url, success=True if successful_only else None, limit=limit
+        )
 
     def get_action_history(
         self, action_type: Optional[str] = None
@@ -170,8 +571,64 @@ class SimpleMemory:
             操作历史记录列表
         """
         if action_type:
-            return [r for r in self.records if r.action == action_type]
-        return self.records.copy()
+            return list(self._by_action.get(action_type, ()))
+        return list(self.records)
+
+    def query_records(
+        self,
+        action: Optional[str] = None,
+        url: Optional[str] = None,
+        success: Optional[bool] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[MemoryRecord]:
+        """按操作类型、页面、结果和时间范围查询记录
+
+        例如"当前页面最近 5 分钟内的失败操作"：
+        query_records(url=url, success=False, since=time.time() - 300)
+
+        从命中记录最少的索引中由新到旧扫描，早于 since 的记录出现时即停止。
+
+        Args:
+            action: 操作类型
+            url: 页面 URL
+            success: 只返回成功（True）或失败（False）的记录
+            since: 时间下限（时间戳，含）
+            until: 时间上限（时间戳，含）
+            limit: 返回最近的多少条记录（None 表示不限制）
+
+        Returns:
+            按时间从旧到新排序的记录列表
+        """
+        buckets: List[Deque[MemoryRecord]] = [self.records]
+        if action is not None:
+            buckets.append(self._by_action.get(action, deque()))
+        if url is not None:
+            buckets.append(self._by_url.get(url, deque()))
+        if success is False:
+            buckets.append(self._failures)
+        bucket = min(buckets, key=len)
+
+        matches: List[MemoryRecord] = []
+        if limit is not None and limit <= 0:
+            return matches
+        for record in reversed(bucket):
+            if since is not None and record.timestamp < since:
+                break
+            if (
+                (until is not None and record.timestamp > until)
+                or (action is not None and record.action != action)
+                or (url is not None and record.context.get("url", "") != url)
+                or (success is not None and record.success != success)
+            ):
+                continue
+            matches.append(record)
+            if limit is not None and len(matches) >= limit:
+                break
+
+        matches.reverse()
+        return matches
 
     def get_last_action(self) -> Optional[MemoryRecord]:
         """获取最后一个操作记录
@@ -191,15 +648,16 @@ class SimpleMemory:
             成功率（0.0 到 1.0）
         """
         if action_type:
-            records = [r for r in self.records if r.action == action_type]
+            total = len(self._by_action.get(action_type, ()))
+            failures = self._action_failures.get(action_type, 0)
         else:
-            records = self.records
+            total = len(self.records)
+            failures = len(self._failures)
 
-        if not records:
+        if not total:
             return 1.0  # 没有记录时返回100%成功率
 
-        successful_count = sum(1 for r in records if r.success)
-        return successful_count / len(records)
+        return (total - failures) / total
 
     def get_recent_context(self, limit: int = 5) -> str:
         """构建最近操作的上下文描述
@@ -210,22 +668,31 @@ class SimpleMemory:
         Returns:
             格式化的上下文描述字符串
         """
-        recent_actions = self.get_recent_actions(limit)
+        cached = self._context_cache
+        if cached is not None and cached[0] == limit and cached[1] == self._version:
+            return cached[2]
 
-        if not recent_actions:
-            return "无历史操作记录"
-
-        lines = ["=== 最近操作历史 ==="]
-        for record in recent_actions:
-            status = "✅" if record.success else "❌"
-            lines.append(
-                f"{status} [{record.action}] "
-                f"参数: {record.params}, "
-                f"结果: {self._format_result(record.result)}, "
-                f"页面: {record.context.get('url', 'unknown')}"
+        recent_actions = self.get_recent_actions(limit)
+        if recent_actions:
+            lines = self._lines
+            context = "\n".join(
+                ["=== 最近操作历史 ==="] + [lines[id(r)] for r in recent_actions]
             )
-
-        return "\n".join(lines)
+        else:
+            context = "无历史操作记录"
+
+        self._context_cache = (limit, self._version, context)
+        return context
+
+    def _render(self, record: MemoryRecord) -> str:
+        """渲染单条记录的上下文行（在记录加入时调用一次）"""
+        status = "✅" if record.success else "❌"
+        return (
+            f"{status} [{record.action}] "
+            f"参数: {record.params}, "
+            f"结果: {self._format_result(record.result)}, "
+            f"页面: {record.context.get('url', 'unknown')}"
+        )
 
     def _format_result(self, result: Any) -> str:
         """格式化操作结果
@@ -238,8 +705,7 @@ class SimpleMemory:
         """
         if isinstance(result, dict):
             # 如果是字典，只显示关键字段
-            key_fields = ["success", "message", "title", "url"]
-            formatted = {k: v for k, v in result.items() if k in key_fields}
+            formatted = {k: v for k, v in result.items() if k in RESULT_KEY_FIELDS}
             return str(formatted) if formatted else str(result)[:100]
         elif isinstance(result, str) and len(result) > 100:
             return result[:100] + "..."
@@ -265,19 +731,41 @@ class SimpleMemory:
             data: 包含记忆数据的字典
         """
         try:
-            self.records = [MemoryRecord(**r) for r in data.get("records", [])]
+            records = [MemoryRecord(**r) for r in data.get("records", [])]
+            # 恢复的记录可能引用已有的落盘文件，只重置状态不删除文件
+            self._reset()
+            for record in records[-self.max_size :]:
+                self.records.append(record)
+                self._count(record)
+            self._enforce_byte_budget()
             self.page_context = data.get("page_context", {})
             logger.info(f"从字典恢复记忆: {len(self.records)} 条记录")
         except Exception as e:
             logger.error(f"从字典恢复记忆失败: {e}")
 
     def clear(self) -> None:
-        """清空所有记忆记录"""
+        """清空所有记忆记录（没有持久化存储时同时删除落盘的完整结果）"""
         record_count = len(self.records)
-        self.records.clear()
-        self.page_context.clear()
+        for record in self.records:
+            self._remove_spill(record)
+        self._reset()
         logger.info(f"清空记忆记录: {record_count} 条")
 
+    def _reset(self) -> None:
+        self.records.clear()
+        self.page_context = {}
+        self._total_bytes = 0
+        self._action_failures = {}
+        self._index = {}
+        self._by_action = {}
+        self._by_url = {}
+        self._failures = deque()
+        self._lines = {}
+        self._version += 1
+        self._context_cache = None
+        if self._similarity is not None:
+            self._similarity.clear()
+
     def get_stats(self) -> Dict[str, Any]:
         """获取记忆统计信息
 
@@ -285,13 +773,9 @@ class SimpleMemory:
             包含统计信息的字典
         """
         total_count = len(self.records)
-        successful_count = sum(1 for r in self.records if r.success)
-        failed_count = total_count - successful_count
-
-        # 统计各操作类型的数量
-        action_counts: Dict[str, int] = {}
-        for record in self.records:
-            action_counts[record.action] = action_counts.get(record.action, 0) + 1
+        failed_count = len(self._failures)
+        successful_count = total_count - failed_count
+        action_counts = {action: len(b) for action, b in self._by_action.items()}
 
         return {
             "total_records": total_count,
@@ -300,8 +784,15 @@ class SimpleMemory:
             "success_rate": self.get_success_rate(),
             "max_size": self.max_size,
             "current_size": total_count,
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "compacted_results": self._compacted,
             "action_counts": action_counts,
             "page_context": self.page_context.copy(),
+            "store": self.store.get_stats() if self.store is not None else None,
+            "similarity_index": (
+                self._similarity.get_stats() if self._similarity is not None else None
+            ),
         }
 
     def cleanup_old_records(self, max_age: float = 3600) -> int:
@@ -313,16 +804,52 @@ class SimpleMemory:
         Returns:
             清理的记录数量
         """
-        current_time = time.time()
-        old_records = [r for r in self.records if current_time - r.timestamp > max_age]
-
-        for record in old_records:
-            self.records.remove(record)
+        cutoff = time.time() - max_age
+        records = self.records
+        removed = 0
+        # 记录按时间顺序加入，过期记录都在最旧的一端，只需处理过期的 k 条
+        while records and records[0].timestamp < cutoff:
+            record = records.popleft()
+            self._uncount(record)
+            self._remove_spill(record)
+            removed += 1
+
+        if removed:
+            logger.info(f"清理过旧记录: {removed} 条")
+
+        return removed
+
+    def start_expiry(
+        self, max_age: float, interval: Optional[float] = None
+    ) -> asyncio.Task:
+        """启动后台过期清理任务（需要在事件循环中调用，重复调用会替换已有任务）
 
-        if old_records:
-            logger.info(f"清理过旧记录: {len(old_records)} 条")
+        Args:
+            max_age: 记录最大年龄（秒）
+            interval: 清理间隔（秒），默认为 max_age 和 60 秒中较小的一个
 
-        return len(old_records)
+        Returns:
+            后台任务
+        """
+        self.stop_expiry()
+        interval = interval if interval is not None else min(max_age, 60.0)
+        self._expiry_task = asyncio.create_task(self._expiry_loop(max_age, interval))
+        logger.debug(f"启动记忆过期清理: max_age={max_age}s, interval={interval}s")
+        return self._expiry_task
+
+    def stop_expiry(self) -> None:
+        """停止后台过期清理任务"""
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            self._expiry_task = None
+
+    async def _expiry_loop(self, max_age: float, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.cleanup_old_records(max_age)
+            except Exception as e:
+                logger.warning(f"⚠️ 记忆过期清理失败: {e}")
 
 
 class MemoryContextBuilder:
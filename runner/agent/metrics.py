@@ -0,0 +1,238 @@
+"""
+执行耗时与 token 统计
+
+记录图中每个步骤的耗时：LLM 调用延迟、首 token 时间、提示与生成 token 数，
+以及每个工具调用的总耗时（拆分为服务端处理时间和网络及客户端开销）。
+统计同时按会话累计和按单次 execute() 汇总，用于判断慢的测试套件
+是受 LLM、浏览器还是自身代码的限制。
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class TimingStats:
+    """耗时统计（毫秒）"""
+
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+class PhaseMetrics:
+    """一组 LLM 和工具调用的统计"""
+
+    def __init__(self, track_wall: bool = True):
+        """初始化统计
+
+        Args:
+            track_wall: 是否记录工具调用的时间区间，用于计算墙钟时间中的自身开销
+        """
+        self.started_at = time.perf_counter()
+        self.track_wall = track_wall
+
+        # LLM 统计
+        self.llm_latency = TimingStats()
+        self.llm_ttft = TimingStats()
+        self.llm_cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+        # 工具统计
+        self.tool_latency = TimingStats()
+        self.tool_server = TimingStats()
+        self.tool_network = TimingStats()
+        self.tool_failures = 0
+        self.by_tool: Dict[str, TimingStats] = {}
+        # 工具调用的 (开始, 结束) 时间；只读查询会并发执行，区间可能重叠
+        self._tool_intervals: List[Tuple[float, float]] = []
+
+    def add_tool_interval(self, started_at: float, ended_at: float) -> None:
+        """记录一次工具调用的时间区间"""
+        if self.track_wall:
+            self._tool_intervals.append((started_at, ended_at))
+
+    def tool_wall_ms(self) -> float:
+        """工具调用占用的墙钟时间（重叠的区间只计算一次）"""
+        total = 0.0
+        current_start: Optional[float] = None
+        current_end = 0.0
+        for start, end in sorted(self._tool_intervals):
+            if current_start is None or start > current_end:
+                if current_start is not None:
+                    total += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        if current_start is not None:
+            total += current_end - current_start
+        return total * 1000
+
+    def to_dict(self, include_wall: bool = True) -> Dict[str, Any]:
+        """转换为字典
+
+        Args:
+            include_wall: 是否包含墙钟时间和自身开销（会话统计中包含空闲时间，不适用）
+        """
+        data: Dict[str, Any] = {
+            "llm": {
+                "calls": self.llm_latency.count,
+                "cache_hits": self.llm_cache_hits,
+                "latency": self.llm_latency.to_dict(),
+                "ttft": self.llm_ttft.to_dict(),
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            },
+            "tools": {
+                "calls": self.tool_latency.count,
+                "failures": self.tool_failures,
+                "latency": self.tool_latency.to_dict(),
+                "server": self.tool_server.to_dict(),
+                "network": self.tool_network.to_dict(),
+                "by_tool": {
+                    name: stats.to_dict() for name, stats in self.by_tool.items()
+                },
+            },
+        }
+        if include_wall:
+            wall_ms = (time.perf_counter() - self.started_at) * 1000
+            tool_wall_ms = self.tool_wall_ms()
+            data["wall_ms"] = round(wall_ms, 1)
+            data["tools"]["wall_ms"] = round(tool_wall_ms, 1)
+            # 墙钟时间中既不属于 LLM 也不属于工具的部分（图调度、记忆、检查点等）；
+            # 并发的工具调用按区间并集计算，不重复扣除
+            data["overhead_ms"] = round(
+                max(0.0, wall_ms - self.llm_latency.total_ms - tool_wall_ms), 1
+            )
+        return data
+
+
+class AgentMetrics:
+    """智能体执行统计
+
+    会话统计从智能体创建开始累计；单次统计在每次 execute() 开始时重置，
+    结束时作为执行摘要返回。
+
+    当前统计范围保存在 ContextVar 中：在 execute() 期间创建的任务计入该次执行，
+    在其他任务中进行的预先规划（见 scope()）不会计入正在进行的执行。
+    """
+
+    def __init__(self):
+        self.session = PhaseMetrics(track_wall=False)
+        # 预先规划的 LLM 调用（与其他步骤重叠执行，不计入任何一次 execute()）
+        self.speculation = PhaseMetrics(track_wall=False)
+        self._current: ContextVar[Optional[PhaseMetrics]] = ContextVar(
+            f"agent_metrics_{id(self)}", default=None
+        )
+        self.runs = 0
+
+    @property
+    def current_run(self) -> Optional[PhaseMetrics]:
+        """当前上下文中的统计范围"""
+        return self._current.get()
+
+    def start_run(self) -> None:
+        """开始一次 execute() 的统计"""
+        self._current.set(PhaseMetrics())
+        self.runs += 1
+
+    def end_run(self) -> Dict[str, Any]:
+        """结束当前 execute() 的统计并返回摘要"""
+        current_run = self._current.get()
+        summary = current_run.to_dict() if current_run else {}
+        self._current.set(None)
+        return summary
+
+    @contextmanager
+    def scope(self, phase: PhaseMetrics) -> Iterator[PhaseMetrics]:
+        """在当前上下文中把调用计入指定的统计范围（代替正在进行的执行）"""
+        token = self._current.set(phase)
+        try:
+            yield phase
+        finally:
+            self._current.reset(token)
+
+    def record_llm_call(
+        self,
+        latency_ms: float,
+        ttft_ms: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        cached: bool = False,
+    ) -> None:
+        """记录一次 LLM 调用
+
+        Args:
+            latency_ms: 调用总耗时
+            ttft_ms: 首 token 时间（缓存命中或非流式调用时为 None）
+            usage: 消息的 usage_metadata
+            cached: 是否命中响应缓存
+        """
+        for phase in self._phases():
+            phase.llm_latency.add(latency_ms)
+            if ttft_ms is not None:
+                phase.llm_ttft.add(ttft_ms)
+            if cached:
+                phase.llm_cache_hits += 1
+            if usage:
+                phase.prompt_tokens += usage.get("input_tokens", 0) or 0
+                phase.completion_tokens += usage.get("output_tokens", 0) or 0
+
+    def record_tool_call(
+        self,
+        tool_name: str,
+        latency_ms: float,
+        server_ms: Optional[float] = None,
+        success: bool = True,
+        started_at: Optional[float] = None,
+    ) -> None:
+        """记录一次工具调用
+
+        Args:
+            tool_name: 工具名称
+            latency_ms: 客户端观察到的总耗时
+            server_ms: 服务端返回的处理耗时（未返回时为 None）
+            success: 是否执行成功
+            started_at: 调用开始时的 time.perf_counter()（None 表示调用刚刚结束）
+        """
+        if started_at is None:
+            started_at = time.perf_counter() - latency_ms / 1000
+        for phase in self._phases():
+            phase.tool_latency.add(latency_ms)
+            phase.add_tool_interval(started_at, started_at + latency_ms / 1000)
+            if server_ms is not None:
+                phase.tool_server.add(server_ms)
+                phase.tool_network.add(max(0.0, latency_ms - server_ms))
+            if not success:
+                phase.tool_failures += 1
+            phase.by_tool.setdefault(tool_name, TimingStats()).add(latency_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取会话累计统计（包含预先规划的 LLM 调用）"""
+        return {
+            "runs": self.runs,
+            **self.session.to_dict(include_wall=False),
+            "speculation": self.speculation.to_dict(include_wall=False)["llm"],
+        }
+
+    def _phases(self):
+        current_run = self._current.get()
+        if current_run is not None:
+            return (self.session, current_run)
+        return (self.session,)
@@ -0,0 +1,172 @@
+"""
+按步骤复杂度路由 LLM 模型
+
+"点击 X"、"在 X 输入 Y" 这类单动作步骤不需要最强的模型。
+本模块根据当前步骤的文本、本步骤已进行的轮次、上一个工具调用是否失败，
+以及 SimpleMemory 中最近的失败记录，为每次 LLM 调用选择快速模型或强模型：
+
+- 快速模型：简单的单动作步骤，且最近没有失败
+- 强模型：多动作或需要推理的步骤、多轮调用、失败后的恢复轮次
+"""
+
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from .memory.simple_memory import SimpleMemory
+from .metrics import TimingStats
+from .step_patterns import COMPOUND_MARKERS, TRAILING_PUNCTUATION
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+ROUTE_FAST = "fast"
+ROUTE_STRONG = "strong"
+
+# 需要理解页面内容或进行判断的步骤
+_REASONING_PATTERN = re.compile(
+    r"验证|检查|确认|提取|统计|比较|判断|分析|查找|找到|总结|是否|JSON", re.IGNORECASE
+)
+
+# 工具包装器返回的失败内容前缀
+_FAILURE_PREFIXES = ("执行失败", "未知的工具", "工具 '")
+
+
+def _current_step(messages: List[BaseMessage]) -> Tuple[str, int]:
+    """返回当前步骤的指令和该步骤已完成的 LLM 轮次数"""
+    turns = 0
+    for message in reversed(messages):
+        if isinstance(message, AIMessage):
+            turns += 1
+        elif isinstance(message, HumanMessage):
+            # 用户消息由系统提示、记忆上下文和指令以空行拼接而成，指令在最后
+            content = message.content if isinstance(message.content, str) else ""
+            step = content.rsplit("\n\n", 1)[-1].strip()
+            return step.rstrip(TRAILING_PUNCTUATION).strip(), turns
+    return "", turns
+
+
+def _last_tool_failed(messages: List[BaseMessage]) -> bool:
+    """上一批工具调用中是否有失败"""
+    for message in reversed(messages):
+        if not isinstance(message, ToolMessage):
+            break
+        content = message.content if isinstance(message.content, str) else ""
+        if message.status == "error" or content.startswith(_FAILURE_PREFIXES):
+            return True
+    return False
+
+
+class ModelRouter:
+    """LLM 模型路由器
+
+    功能：
+    1. 根据启发式规则和失败历史为每次 LLM 调用选择路由
+    2. 按路由统计调用次数、延迟和 token 数
+    3. 按原因统计路由决策，便于调整阈值
+    """
+
+    def __init__(
+        self,
+        memory: SimpleMemory,
+        fast_model: str,
+        strong_model: str,
+        max_simple_chars: int = 40,
+        max_fast_turns: int = 2,
+        failure_window: float = 120,
+    ):
+        """初始化模型路由器
+
+        Args:
+            memory: 智能体的操作记忆（用于查询最近的失败）
+            fast_model: 快速模型名称
+            strong_model: 强模型名称
+            max_simple_chars: 简单步骤的最大字符数
+            max_fast_turns: 同一步骤内使用快速模型的最大轮次数
+            failure_window: 最近失败记录的时间窗口（秒），窗口内有失败时使用强模型
+        """
+        self.memory = memory
+        self.models = {ROUTE_FAST: fast_model, ROUTE_STRONG: strong_model}
+        self.max_simple_chars = max_simple_chars
+        self.max_fast_turns = max_fast_turns
+        self.failure_window = failure_window
+
+        # 按路由统计
+        self.latency: Dict[str, TimingStats] = {
+            ROUTE_FAST: TimingStats(),
+            ROUTE_STRONG: TimingStats(),
+        }
+        self.tokens: Dict[str, Dict[str, int]] = {
+            ROUTE_FAST: {"prompt": 0, "completion": 0},
+            ROUTE_STRONG: {"prompt": 0, "completion": 0},
+        }
+        self.reasons: Dict[str, int] = {}
+
+    def choose(self, messages: List[BaseMessage]) -> str:
+        """为本次 LLM 调用选择路由
+
+        Args:
+            messages: 将要发送给 LLM 的消息
+
+        Returns:
+            ROUTE_FAST 或 ROUTE_STRONG
+        """
+        route, reason = self._decide(messages)
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        logger.debug(f"模型路由: {route} ({reason})")
+        return route
+
+    def model_for(self, route: str) -> str:
+        """获取路由对应的模型名称"""
+        return self.models[route]
+
+    def record(
+        self,
+        route: str,
+        latency_ms: float,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """记录一次路由后的 LLM 调用"""
+        self.latency[route].add(latency_ms)
+        if usage:
+            self.tokens[route]["prompt"] += usage.get("input_tokens", 0) or 0
+            self.tokens[route]["completion"] += usage.get("output_tokens", 0) or 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取路由统计信息"""
+        return {
+            "routes": {
+                route: {
+                    "model": self.models[route],
+                    "latency": self.latency[route].to_dict(),
+                    "prompt_tokens": self.tokens[route]["prompt"],
+                    "completion_tokens": self.tokens[route]["completion"],
+                }
+                for route in (ROUTE_FAST, ROUTE_STRONG)
+            },
+            "reasons": dict(self.reasons),
+        }
+
+    def _decide(self, messages: List[BaseMessage]) -> Tuple[str, str]:
+        step, turns = _current_step(messages)
+
+        if _last_tool_failed(messages):
+            return ROUTE_STRONG, "recovery"
+        if turns >= self.max_fast_turns:
+            return ROUTE_STRONG, "multi_turn"
+        if self._recent_failures():
+            return ROUTE_STRONG, "recent_failures"
+        if not step or len(step) > self.max_simple_chars:
+            return ROUTE_STRONG, "long_step"
+        if COMPOUND_MARKERS.search(step):
+            return ROUTE_STRONG, "compound_step"
+        if _REASONING_PATTERN.search(step):
+            return ROUTE_STRONG, "reasoning_step"
+        return ROUTE_FAST, "simple_step"
+
+    def _recent_failures(self) -> bool:
+        cutoff = time.time() - self.failure_window
+        return bool(self.memory.query_records(success=False, since=cutoff, limit=1))
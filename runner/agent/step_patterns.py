@@ -0,0 +1,14 @@
+"""
+测试步骤文本规则
+
+快速通道（runner.executor.fast_path）和模型路由（model_router）共用的步骤判断规则，
+两者对"复合步骤"的定义必须一致。
+"""
+
+import re
+
+# 包含这些词的步骤通常是多个动作或带条件的动作
+COMPOUND_MARKERS = re.compile(r"并且|然后|之后|接着|或者|如果|直到|[并再或，,；;。]")
+
+# 步骤末尾可以忽略的标点（判断复合步骤前先去掉，避免末尾句号被当作分隔）
+TRAILING_PUNCTUATION = "。.!！"
@@ -13,6 +13,59 @@ TOOL_CATEGORY_INTERACTION = "interaction"
 TOOL_CATEGORY_QUERY = "query"
 TOOL_CATEGORY_TEST = "test"
 
+# 动作类 API - 通过 executeAction 调用
+ACTION_APIS = frozenset(
+    {
+        "navigate",
+        "aiAction",
+        "aiTap",
+        "aiDoubleClick",
+        "aiRightClick",
+        "aiInput",
+        "aiScroll",
+        "aiKeyboardPress",
+        "aiHover",
+        "aiWaitFor",
+        "setActiveTab",
+        "evaluateJavaScript",
+        "logScreenshot",
+        "freezePageContext",
+        "unfreezePageContext",
+        "runYaml",
+        "setAIActionContext",
+    }
+)
+
+# 查询类 API - 通过 executeQuery 调用
+QUERY_APIS = frozenset(
+    {
+        "aiAssert",
+        "aiAsk",
+        "aiQuery",
+        "aiBoolean",
+        "aiNumber",
+        "aiString",
+        "aiLocate",
+        "getTabs",
+        "getConsoleLogs",
+        "playwrightExample",
+    }
+)
+
+# 只读查询 API - 不改变页面状态，同一轮中的多个调用可以并发执行
+READ_ONLY_APIS = frozenset(
+    {
+        "aiAsk",
+        "aiQuery",
+        "aiBoolean",
+        "aiNumber",
+        "aiString",
+        "aiLocate",
+        "getTabs",
+        "getConsoleLogs",
+    }
+)
+
 # 完整的工具定义
 TOOL_DEFINITIONS = {
     # ========== 导航工具 ==========
@@ -0,0 +1,162 @@
+"""
+工具结果整形
+
+工具返回的原始结果（大型 aiQuery 数据、控制台日志、截图元数据等）
+直接进入消息历史会拖慢甚至打断 LLM 轮次。
+本模块在结果进入消息历史前按工具的字节预算整形：
+保留所有键和嵌套结构，将过长的数组截断并注明总数，过长的字符串截断并注明长度。
+完整结果不随消息保存（否则会常驻在检查点中），记忆中的大结果由 SimpleMemory 压缩或落盘。
+"""
+
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 默认字节预算（UTF-8 编码后的 JSON 长度）
+DEFAULT_RESULT_BUDGET = 4000
+
+# 按工具设置的字节预算（工具名不含 midscene_ 前缀）
+TOOL_RESULT_BUDGETS: Dict[str, int] = {
+    "aiQuery": 6000,
+    "aiAsk": 3000,
+    "aiString": 2000,
+    "aiLocate": 1500,
+    "getTabs": 2000,
+    "getConsoleLogs": 3000,
+    "evaluateJavaScript": 3000,
+    "logScreenshot": 800,
+    "runYaml": 3000,
+}
+
+# 逐步收紧的整形参数：(数组最多保留项数, 字符串最多保留字符数)
+_SHAPING_LEVELS = [(20, 1000), (10, 400), (5, 160), (3, 80), (1, 40)]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _byte_size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def shape_value(value: Any, max_items: int, max_chars: int) -> Any:
+    """按限制递归整形结果
+
+    Args:
+        value: 原始结果
+        max_items: 数组最多保留的项数
+        max_chars: 字符串最多保留的字符数
+
+    Returns:
+        整形后的结果（字典的键全部保留）
+    """
+    if isinstance(value, dict):
+        return {k: shape_value(v, max_items, max_chars) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        shaped = [shape_value(v, max_items, max_chars) for v in value[:max_items]]
+        if len(value) > max_items:
+            shaped.append(
+                f"...(共 {len(value)} 项，已省略 {len(value) - max_items} 项)"
+            )
+        return shaped
+
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + f"...(已截断，原长度 {len(value)} 字符)"
+
+    return value
+
+
+class ToolResultShaper:
+    """工具结果整形器
+
+    功能：
+    1. 结果在预算内时原样序列化
+    2. 超出预算时逐级收紧数组和字符串限制，直到满足预算
+    3. 仍然超出预算时（例如键过多）截断序列化文本
+    4. 统计整形次数和节省的字节数
+    """
+
+    def __init__(
+        self,
+        default_budget: int = DEFAULT_RESULT_BUDGET,
+        budgets: Optional[Dict[str, int]] = None,
+    ):
+        """初始化结果整形器
+
+        Args:
+            default_budget: 未单独配置的工具使用的字节预算
+            budgets: 按工具覆盖的字节预算（工具名不含 midscene_ 前缀）
+        """
+        self.default_budget = default_budget
+        self.budgets = {**TOOL_RESULT_BUDGETS, **(budgets or {})}
+
+        # 统计信息
+        self.results_seen = 0
+        self.results_shaped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def get_budget(self, tool_name: str) -> int:
+        """获取工具的字节预算"""
+        api_name = tool_name.replace("midscene_", "")
+        return self.budgets.get(api_name, self.default_budget)
+
+    def shape(self, tool_name: str, result: Any) -> Tuple[str, bool]:
+        """将工具结果整形为发送给 LLM 的文本
+
+        Args:
+            tool_name: 工具名称
+            result: 工具原始结果
+
+        Returns:
+            (整形后的文本, 是否发生了整形)
+        """
+        text = result if isinstance(result, str) else _dumps(result)
+        size = _byte_size(text)
+        budget = self.get_budget(tool_name)
+
+        self.results_seen += 1
+        self.bytes_in += size
+        if size <= budget:
+            self.bytes_out += size
+            return text, False
+
+        shaped_text = text
+        if not isinstance(result, str):
+            for max_items, max_chars in _SHAPING_LEVELS:
+                shaped_text = _dumps(shape_value(result, max_items, max_chars))
+                if _byte_size(shaped_text) <= budget:
+                    break
+
+        if _byte_size(shaped_text) > budget:
+            shaped_text = self._truncate_text(shaped_text, budget, size)
+
+        shaped_size = _byte_size(shaped_text)
+        self.results_shaped += 1
+        self.bytes_out += shaped_size
+        logger.info(f"✂️ 整形工具结果: {tool_name}, {size} → {shaped_size} 字节")
+        return shaped_text, True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取整形统计信息"""
+        return {
+            "default_budget": self.default_budget,
+            "results_seen": self.results_seen,
+            "results_shaped": self.results_shaped,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+        }
+
+    @staticmethod
+    def _truncate_text(text: str, budget: int, original_size: int) -> str:
+        """按字节预算截断文本（不拆分多字节字符）"""
+        suffix = f"...(已截断，原大小 {original_size} 字节)"
+        limit = max(0, budget - _byte_size(suffix))
+        head = text.encode("utf-8")[:limit].decode("utf-8", errors="ignore")
+        return head + suffix
@@ -0,0 +1,149 @@
+"""
+工具调用调度器
+
+当 LLM 在同一轮中返回多个工具调用时，按工具类型安排执行方式：
+只读查询类工具并发执行，动作类工具在同一会话内严格串行执行，
+返回结果的顺序与工具调用的顺序保持一致。
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import ToolCall, ToolMessage
+from langchain_core.tools import BaseTool
+
+from .definitions import READ_ONLY_APIS
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class ToolCallScheduler:
+    """工具调用调度器
+
+    每个调度器对应一个 Midscene 会话：
+    - 连续的只读查询调用组成一批，并发执行
+    - 动作调用单独执行，执行前等待之前的批次完成
+    - 会话锁保证同一会话上的动作不会与其他调用重叠
+    """
+
+    def __init__(self, tools: List[BaseTool], max_concurrency: int = 4):
+        """初始化调度器
+
+        Args:
+            tools: 可调用的工具列表
+            max_concurrency: 单批只读查询的最大并发数
+        """
+        self.tools_by_name: Dict[str, BaseTool] = {t.name: t for t in tools}
+        self.max_concurrency = max(1, max_concurrency)
+        self._session_lock = asyncio.Lock()
+
+        # 统计信息
+        self.concurrent_batches = 0
+        self.concurrent_calls = 0
+        self.serial_calls = 0
+
+    @staticmethod
+    def is_read_only(tool_name: str) -> bool:
+        """判断工具是否为可并发执行的只读查询"""
+        return tool_name.replace("midscene_", "") in READ_ONLY_APIS
+
+    async def run(self, tool_calls: List[ToolCall]) -> List[ToolMessage]:
+        """执行一轮中的所有工具调用
+
+        Args:
+            tool_calls: LLM 返回的工具调用列表
+
+        Returns:
+            与工具调用顺序一致的工具消息列表
+        """
+        results: List[Optional[ToolMessage]] = [None] * len(tool_calls)
+        batch: List[int] = []
+
+        async with self._session_lock:
+            for index, tool_call in enumerate(tool_calls):
+                if self.is_read_only(tool_call["name"]):
+                    batch.append(index)
+                    continue
+
+                await self._run_batch(tool_calls, batch, results)
+                batch = []
+
+                results[index] = await self._invoke(tool_call)
+                self.serial_calls += 1
+
+            await self._run_batch(tool_calls, batch, results)
+
+        return [message for message in results if message is not None]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取调度统计信息"""
+        return {
+            "concurrent_batches": self.concurrent_batches,
+            "concurrent_calls": self.concurrent_calls,
+            "serial_calls": self.serial_calls,
+        }
+
+    async def _run_batch(
+        self,
+        tool_calls: List[ToolCall],
+        batch: List[int],
+        results: List[Optional[ToolMessage]],
+    ) -> None:
+        """并发执行一批只读查询，并按原始位置写回结果"""
+        if not batch:
+            return
+
+        if len(batch) == 1:
+            results[batch[0]] = await self._invoke(tool_calls[batch[0]])
+            self.serial_calls += 1
+            return
+
+        logger.info(f"⚡ 并发执行 {len(batch)} 个只读查询")
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def invoke_limited(tool_call: ToolCall) -> ToolMessage:
+            async with semaphore:
+                return await self._invoke(tool_call)
+
+        messages = await asyncio.gather(
+            *(invoke_limited(tool_calls[index]) for index in batch)
+        )
+        for index, message in zip(batch, messages):
+            results[index] = message
+
+        self.concurrent_batches += 1
+        self.concurrent_calls += len(batch)
+
+    async def _invoke(self, tool_call: ToolCall) -> ToolMessage:
+        """执行单个工具调用，异常统一转换为错误工具消息"""
+        tool_name = tool_call["name"]
+        tool_call_id = tool_call.get("id") or ""
+
+        selected_tool = self.tools_by_name.get(tool_name)
+        if selected_tool is None:
+            return ToolMessage(
+                content=f"未知的工具: {tool_name}",
+                name=tool_name,
+                tool_call_id=tool_call_id,
+                status="error",
+            )
+
+        try:
+            message = await selected_tool.ainvoke({**tool_call, "type": "tool_call"})
+        except Exception as e:
+            error_msg = f"工具 '{tool_name}' 执行错误: {str(e)}"
+            logger.error(error_msg)
+            return ToolMessage(
+                content=error_msg,
+                name=tool_name,
+                tool_call_id=tool_call_id,
+                status="error",
+            )
+
+        if isinstance(message, ToolMessage):
+            return message
+        return ToolMessage(
+            content=str(message), name=tool_name, tool_call_id=tool_call_id
+        )
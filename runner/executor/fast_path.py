@@ -0,0 +1,226 @@
+"""
+简单步骤快速通道
+
+很多测试步骤本身就是一个确定的动作，例如"导航到 https://…"、"点击登录按钮"、
+"在搜索框输入 X"（输入值可以带引号，也可以不带）。本模块用可配置的正则规则识别这类步骤，
+直接通过 MidsceneHTTPClient.execute_action 执行对应的动作，
+不经过 LLM 规划；没有匹配或执行失败时交回智能体处理。
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from runner.agent.http_client import MidsceneHTTPClient
+from runner.agent.step_patterns import COMPOUND_MARKERS, TRAILING_PUNCTUATION
+from runner.agent.tools.definitions import ACTION_APIS
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 动作动词：引号外出现多个时（例如"点击搜索按钮等待结果出现"）视为多个动作，不走快速通道；
+# 后面紧跟控件名词时（输入框、滚动条、选择按钮）是元素名称而不是动作
+ACTION_VERBS = re.compile(
+    r"(?:点击|单击|双击|输入|填写|滚动|等待|导航|跳转|访问|前往|选择|勾选|悬停|拖动|拖拽"
+    r"|检查|验证|断言|确保)(?![框栏条项器键]|按钮)"
+)
+
+# 引号内的文本是元素名称或输入值，不参与复合步骤判断
+QUOTED_TEXT = re.compile(r"\"[^\"]*\"|“[^”]*”|'[^']*'|‘[^’]*’|「[^」]*」")
+
+# 默认识别规则，params 中的 {name} 由正则命名分组替换，{step} 为整个步骤文本
+DEFAULT_INTENT_PATTERNS: List[Dict[str, Any]] = [
+    {
+        "name": "navigate",
+        "pattern": r"^(?:导航到|打开|访问|前往)\s*(?P<url>(?:https?://)?[\w.-]+\.[a-zA-Z]{2,}(?:[/?#]\S*)?)"
+        r"(?:\s*并?等待页面(?:完全)?加载(?:完成)?)?$",
+        "api": "navigate",
+        "params": {"url": "{url}"},
+        "allow_compound": True,
+    },
+    {
+        "name": "input",
+        # 不带引号的输入值到步骤末尾为止（末尾标点会被去掉），含逗号、动词等时按复合步骤回退
+        "pattern": r"^在\s*(?P<locate>.+?)\s*(?:中|里)?输入\s*[\"“']?(?P<value>.+?)[\"”']?$",
+        "api": "aiInput",
+        "params": {"locate": "{locate}", "value": "{value}"},
+    },
+    {
+        "name": "tap",
+        "pattern": r"^(?:点击|单击)\s*(?P<locate>.+)$",
+        "api": "aiTap",
+        "params": {"locate": "{locate}"},
+    },
+    {
+        "name": "scroll",
+        "pattern": r"^(?:向下|向上)滚动(?:页面)?$",
+        "api": "aiAction",
+        "params": {"prompt": "{step}"},
+    },
+]
+
+
+@dataclass
+class Intent:
+    """识别出的步骤意图"""
+
+    name: str
+    api: str
+    params: Dict[str, Any]
+    result: Any = None  # 执行后的动作结果
+
+
+@dataclass
+class IntentPattern:
+    """一条识别规则"""
+
+    name: str
+    regex: "re.Pattern[str]"
+    api: str
+    params: Dict[str, str] = field(default_factory=dict)
+    allow_compound: bool = False
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IntentPattern":
+        api = data["api"]
+        if api not in ACTION_APIS:
+            raise ValueError(f"快速通道只支持动作类 API: {api}")
+        return cls(
+            name=data.get("name", api),
+            regex=re.compile(data["pattern"]),
+            api=api,
+            params=dict(data.get("params", {})),
+            allow_compound=data.get("allow_compound", False),
+        )
+
+
+class IntentRecognizer:
+    """基于规则的步骤意图识别器
+
+    规则按顺序匹配，第一条匹配的规则生效；自定义规则优先于默认规则。
+    """
+
+    def __init__(self, patterns: Optional[List[Dict[str, Any]]] = None):
+        """初始化识别器
+
+        Args:
+            patterns: 额外的识别规则（优先于默认规则）
+        """
+        self.patterns = [
+            IntentPattern.from_dict(p)
+            for p in (patterns or []) + DEFAULT_INTENT_PATTERNS
+        ]
+
+    @classmethod
+    def from_file(cls, path: str) -> "IntentRecognizer":
+        """从 JSON 文件加载额外的识别规则"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def recognize(self, step: str) -> Optional[Intent]:
+        """识别步骤意图
+
+        Args:
+            step: 步骤文本
+
+        Returns:
+            识别出的意图，无法确定时返回 None
+        """
+        text = step.strip().rstrip(TRAILING_PUNCTUATION).strip()
+        compound = is_compound(text)
+
+        for pattern in self.patterns:
+            if compound and not pattern.allow_compound:
+                continue
+            match = pattern.regex.match(text)
+            if not match:
+                continue
+
+            groups = {k: v.strip() for k, v in match.groupdict().items() if v}
+            groups["step"] = text
+            try:
+                params = {k: v.format(**groups) for k, v in pattern.params.items()}
+            except KeyError:
+                continue
+
+            if pattern.api == "navigate" and not re.match(r"^https?://", params["url"]):
+                params["url"] = f"https://{params['url']}"
+            return Intent(name=pattern.name, api=pattern.api, params=params)
+
+        return None
+
+
+def is_compound(text: str) -> bool:
+    """判断步骤是否包含多个动作或条件（引号内的文本不参与判断）"""
+    unquoted = QUOTED_TEXT.sub("", text)
+    return bool(COMPOUND_MARKERS.search(unquoted)) or (
+        len(ACTION_VERBS.findall(unquoted)) > 1
+    )
+
+
+class FastPathRouter:
+    """快速通道路由器：识别并直接执行简单步骤"""
+
+    def __init__(self, http_client: MidsceneHTTPClient, recognizer: IntentRecognizer):
+        self.http_client = http_client
+        self.recognizer = recognizer
+
+        # 快速通道统计（steps 包含由计划回放完成的步骤）
+        self.steps = 0
+        self.replayed = 0
+        self.hits = 0
+        self.fallbacks = 0
+        self.by_intent: Dict[str, int] = {}
+
+    async def try_execute(self, step: str) -> Optional[Intent]:
+        """尝试通过快速通道执行步骤
+
+        Returns:
+            执行成功时返回识别出的意图；没有匹配或执行失败时返回 None
+        """
+        self.steps += 1
+        intent = self.recognizer.recognize(step)
+        if intent is None:
+            return None
+
+        logger.info(f"快速通道: {intent.api} {intent.params}")
+        if not await self._execute(intent):
+            self.fallbacks += 1
+            return None
+
+        self.hits += 1
+        self.by_intent[intent.name] = self.by_intent.get(intent.name, 0) + 1
+        return intent
+
+    def record_replayed(self) -> None:
+        """记录一个由计划回放完成、没有经过快速通道的步骤"""
+        self.steps += 1
+        self.replayed += 1
+
+    def get_report(self) -> Dict[str, Any]:
+        """获取快速通道报告"""
+        return {
+            "steps": self.steps,
+            "replayed": self.replayed,
+            "fast_path": self.hits,
+            "fallbacks": self.fallbacks,
+            "fast_path_ratio": self.hits / self.steps if self.steps else 0.0,
+            "by_intent": dict(self.by_intent),
+        }
+
+    async def _execute(self, intent: Intent) -> bool:
+        try:
+            async for event in self.http_client.execute_action(
+                intent.api, intent.params, stream=False
+            ):
+                if "error" in event or event.get("success") is False:
+                    logger.info(f"快速通道执行失败: {event.get('error')}")
+                    return False
+                if "result" in event:
+                    intent.result = event["result"]
+            return True
+        except Exception as e:
+            logger.warning(f"快速通道执行出错: {e}")
+            return False
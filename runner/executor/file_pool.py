@@ -0,0 +1,173 @@
+"""
+并发执行多个测试文件
+
+每个文件由独立的 TextTestExecutor 执行（独立的智能体和会话），
+通过有界的 asyncio 工作池同时运行最多 N 个文件。
+
+并发时各文件的 print 输出会交错在一起，因此执行期间用一个按上下文分发的
+stdout 代理替换 sys.stdout：每个工作协程把自己的缓冲区放在 ContextVar 中，
+协程内（以及它创建的子任务中）的输出写入该缓冲区，文件执行结束后整体输出。
+日志处理器直接写 stderr，不经过缓冲区；执行期间给根日志处理器加上 FileTagFilter，
+为每条日志加上所属文件的 [序号/总数] 前缀，交错的日志行仍能区分来源。
+"""
+
+import asyncio
+import io
+import logging
+import sys
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, TextIO
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 当前协程的输出缓冲区（None 表示直接输出）
+_output_buffer: ContextVar[Optional[io.StringIO]] = ContextVar(
+    "output_buffer", default=None
+)
+
+# 当前协程正在执行的文件标签（None 表示不加日志前缀）
+_file_tag: ContextVar[Optional[str]] = ContextVar("file_tag", default=None)
+
+# 执行单个文件的函数：(文件路径, 序号) -> 文件结果（不抛出异常）
+FileRunner = Callable[[str, int], Awaitable[Dict[str, Any]]]
+
+
+class ContextStdout:
+    """按上下文分发的 stdout 代理
+
+    当前上下文设置了缓冲区时写入缓冲区，否则写入原始输出流。
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        buffer = _output_buffer.get()
+        if buffer is not None:
+            return buffer.write(text)
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        if _output_buffer.get() is None:
+            self.stream.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+
+class FileTagFilter(logging.Filter):
+    """为日志加上当前上下文所属文件的前缀"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        tag = _file_tag.get()
+        # 同一条记录会经过多个处理器，只加一次前缀
+        if tag is not None and not hasattr(record, "file_tag"):
+            record.file_tag = tag
+            record.msg = f"[{tag}] {record.msg}"
+        return True
+
+
+async def run_files(
+    files: Sequence[str],
+    run_file: FileRunner,
+    concurrency: int = 1,
+    continue_on_error: bool = False,
+    buffer_output: Optional[bool] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    name: str = "",
+) -> List[Dict[str, Any]]:
+    """用有界工作池执行多个文件
+
+    Args:
+        files: 文件路径列表
+        run_file: 执行单个文件的协程函数，返回包含 success 字段的结果字典
+        concurrency: 同时执行的文件数量
+        continue_on_error: 文件出错（结果带 error：文件不存在、没有任务或执行异常）后
+            是否继续启动其余文件（已开始的文件总会执行完；只是任务失败的文件不会停止执行）
+        buffer_output: 是否按文件缓冲输出（None 表示并发数大于 1 时缓冲）
+        should_stop: 启动下一个文件前调用，返回 True 时不再启动新文件（用于跨进程停止）
+        name: 进度行中的执行者名称（如工作进程编号）
+
+    Returns:
+        按 files 中的顺序排列的结果列表（因失败而未启动的文件不包含在内），
+        每个结果附带执行耗时 duration（秒）
+    """
+    total = len(files)
+    concurrency = max(1, min(concurrency, total))
+    if buffer_output is None:
+        buffer_output = concurrency > 1
+
+    # 所有工作协程共享同一个迭代器，取下一个文件是同步操作，不需要加锁
+    pending = iter(enumerate(files, 1))
+    results: Dict[int, Dict[str, Any]] = {}
+    stopped = False
+
+    async def worker() -> None:
+        nonlocal stopped
+        for index, path in pending:
+            if stopped or (should_stop is not None and should_stop()):
+                return
+            results[index] = await _run_one(
+                path, index, total, run_file, buffer_output, name
+            )
+            if "error" in results[index] and not continue_on_error:
+                stopped = True
+
+    stdout = sys.stdout
+    handlers = list(logging.getLogger().handlers) if buffer_output else []
+    log_filter = FileTagFilter()
+    if buffer_output:
+        sys.stdout = ContextStdout(stdout)
+    for handler in handlers:
+        handler.addFilter(log_filter)
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        sys.stdout = stdout
+        for handler in handlers:
+            handler.removeFilter(log_filter)
+
+    return [results[index] for index in sorted(results)]
+
+
+async def _run_one(
+    path: str,
+    index: int,
+    total: int,
+    run_file: FileRunner,
+    buffer_output: bool,
+    name: str = "",
+) -> Dict[str, Any]:
+    """执行单个文件并记录耗时，按需缓冲其输出并在结束后整体写出"""
+    if not buffer_output:
+        start = time.perf_counter()
+        result = await run_file(path, index)
+        result.setdefault("duration", round(time.perf_counter() - start, 3))
+        return result
+
+    stream = sys.stdout.stream if isinstance(sys.stdout, ContextStdout) else sys.stdout
+    tag = f"{name} {index}/{total}" if name else f"{index}/{total}"
+    stream.write(f"▶️ [{tag}] 开始: {path}\n")
+    stream.flush()
+
+    buffer = io.StringIO()
+    token = _output_buffer.set(buffer)
+    tag_token = _file_tag.set(tag)
+    start = time.perf_counter()
+    try:
+        result = await run_file(path, index)
+    finally:
+        _file_tag.reset(tag_token)
+        _output_buffer.reset(token)
+        elapsed = time.perf_counter() - start
+        # 一次写出，避免与其他文件的输出交错
+        stream.write(buffer.getvalue())
+        stream.flush()
+
+    result.setdefault("duration", round(elapsed, 3))
+    status = "✅" if result.get("success") else "❌"
+    stream.write(f"{status} [{tag}] 结束: {path} ({elapsed:.1f}s)\n")
+    stream.flush()
+    return result
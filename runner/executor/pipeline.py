@@ -0,0 +1,157 @@
+"""
+步骤流水线规划
+
+.txt 测试文件中的所有步骤在执行前就已确定。
+开启流水线后，在第 N 步的浏览器动作执行期间，提前发起第 N+1 步的 LLM 规划，
+让两段最大的延迟互相重叠。
+
+预先规划只在以下条件同时满足时被采用：
+1. 第 N 步执行成功
+2. 第 N+1 步开始时的页面状态（URL 和 DOM 签名，见 PlanReplayer.get_page_state）
+   与第 N 步开始时一致；无法获取页面状态时视为已变化
+3. 第 N+1 步确实交给 LLM 执行（由回放或快速通道完成的步骤不需要规划）
+否则丢弃预先规划的结果，由智能体按正常流程重新规划。
+预先规划的 LLM 调用单独统计（agent.metrics.speculation），不计入第 N 步。
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from runner.agent.agent import MidsceneAgent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Speculation:
+    """一次预先规划"""
+
+    prompt: str
+    base_state: Optional[str]
+    task: "asyncio.Task[Tuple[HumanMessage, AIMessage]]"
+    previous_step_ok: Optional[bool] = None
+
+
+class StepPipeline:
+    """步骤流水线
+
+    同一时间最多只有一个预先规划在进行，对应紧接着的下一步。
+    每个步骤依次调用 start_step()、take()（仅 LLM 执行时）和 finish_step()。
+    """
+
+    def __init__(self, agent: MidsceneAgent):
+        self.agent = agent
+        # current: 为当前步骤准备的预先规划；pending: 正在进行的下一步规划
+        self.current: Optional[Speculation] = None
+        self.pending: Optional[Speculation] = None
+
+        # 流水线统计
+        self.speculated = 0
+        self.committed = 0
+        self.discarded: Dict[str, int] = {}
+
+    def start_step(
+        self,
+        prompt: str,
+        page_state: Optional[str],
+        next_prompt: Optional[str] = None,
+    ) -> None:
+        """开始一个步骤：保留与本步骤匹配的预先规划，并开始规划下一步
+
+        Args:
+            prompt: 当前步骤的指令
+            page_state: 当前步骤开始时的页面状态
+            next_prompt: 下一步的指令，没有下一步时为 None
+        """
+        self._cancel_current("unused")
+        speculation, self.pending = self.pending, None
+        if speculation is not None and speculation.prompt != prompt:
+            speculation = self._discard(speculation, "prompt_mismatch")
+        if speculation is not None and (
+            page_state is None or speculation.base_state != page_state
+        ):
+            speculation = self._discard(speculation, "page_changed")
+        self.current = speculation
+
+        if next_prompt:
+            task = asyncio.create_task(self.agent.plan(next_prompt))
+            self.pending = Speculation(
+                prompt=next_prompt, base_state=page_state, task=task
+            )
+            self.speculated += 1
+
+    def finish_step(self, success: bool) -> None:
+        """记录当前步骤的执行结果
+
+        当前步骤失败时立即丢弃下一步的预先规划；
+        本步骤没有交给 LLM 执行时，为它准备的预先规划也一并丢弃。
+        """
+        self._cancel_current("not_needed")
+        if self.pending is None:
+            return
+        if success:
+            self.pending.previous_step_ok = True
+        else:
+            self._cancel_pending("step_failed")
+
+    async def take(self) -> Optional[Tuple[HumanMessage, AIMessage]]:
+        """取出本步骤的预先规划
+
+        只在步骤交给 LLM 执行时调用，返回值需要提交给 agent.execute(planned=...)，
+        成功取出时计入 committed。
+
+        Returns:
+            预先规划的结果，没有可用的规划时返回 None
+        """
+        speculation, self.current = self.current, None
+        if speculation is None:
+            return None
+        if not speculation.previous_step_ok:
+            return self._discard(speculation, "step_unfinished")
+
+        try:
+            planned = await speculation.task
+        except Exception as e:
+            logger.warning(f"预先规划失败: {e}")
+            self.discarded["plan_error"] = self.discarded.get("plan_error", 0) + 1
+            return None
+
+        self.committed += 1
+        return planned
+
+    async def close(self) -> None:
+        """取消尚未使用的预先规划"""
+        tasks = [s.task for s in (self.current, self.pending) if s is not None]
+        self._cancel_current("unused")
+        self._cancel_pending("unused")
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_report(self) -> Dict[str, Any]:
+        """获取流水线报告"""
+        return {
+            "speculated": self.speculated,
+            "committed": self.committed,
+            "discarded": dict(self.discarded),
+            "hit_rate": self.committed / self.speculated if self.speculated else 0.0,
+        }
+
+    def _discard(self, speculation: Speculation, reason: str) -> None:
+        speculation.task.cancel()
+        self.discarded[reason] = self.discarded.get(reason, 0) + 1
+        logger.info(f"丢弃预先规划 ({reason}): {speculation.prompt}")
+        return None
+
+    def _cancel_current(self, reason: str) -> None:
+        if self.current is not None:
+            self._discard(self.current, reason)
+            self.current = None
+
+    def _cancel_pending(self, reason: str) -> None:
+        if self.pending is not None:
+            self._discard(self.pending, reason)
+            self.pending = None
@@ -0,0 +1,388 @@
+"""
+执行计划录制与回放
+
+为每个测试步骤记录成功执行时的工具调用序列（连同步骤文本和起始 URL），
+后续运行时直接通过 MidsceneHTTPClient 回放该序列，
+只有回放的调用失败或断言不成立时才交给 LLM 重新规划。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from runner.agent.http_client import MidsceneHTTPClient
+from runner.agent.tools.definitions import ACTION_APIS, QUERY_APIS
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，只能保证同一进程内的合并
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 结果为 False 时视为断言失败的查询
+ASSERTION_APIS = {"aiAssert", "aiBoolean"}
+
+# 页面 DOM 签名：标题、元素数量、可见文本长度、表单值和打开的弹窗
+PAGE_STATE_SCRIPT = """(() => {
+  const fields = Array.from(document.querySelectorAll('input, textarea, select'));
+  return [
+    document.title,
+    document.getElementsByTagName('*').length,
+    document.body ? document.body.innerText.length : 0,
+    fields.map((el) => el.type === 'checkbox' || el.type === 'radio' ? el.checked : el.value).join('\\u0001'),
+    document.querySelectorAll('dialog[open], [role="dialog"], [aria-modal="true"]').length,
+  ].join('|');
+})()"""
+
+
+def normalize_url(url: str) -> str:
+    """规范化 URL（去掉片段标识和末尾斜杠）"""
+    if not url:
+        return ""
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme, parts.netloc.lower(), path, parts.query, ""))
+
+
+def is_failed_tool_message(message: ToolMessage) -> bool:
+    """判断工具消息是否表示执行失败"""
+    if message.status == "error":
+        return True
+
+    content = message.content if isinstance(message.content, str) else ""
+    if content.startswith(("执行失败", "未知的工具")) or "执行错误" in content:
+        return True
+
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return False
+    return isinstance(data, dict) and data.get("success") is False
+
+
+@dataclass
+class RecordedPlan:
+    """已录制的执行计划"""
+
+    step: str
+    start_url: str
+    tool_calls: List[Dict[str, Any]]
+    recorded_at: float = field(default_factory=time.time)
+    replay_count: int = 0
+
+
+class PlanRecorder:
+    """从智能体事件流中收集一个步骤的工具调用序列"""
+
+    def __init__(self):
+        self.tool_calls: List[Dict[str, Any]] = []
+        self.failed = False
+
+    def observe(self, event: Dict[str, Any]) -> None:
+        """处理一个 agent.execute() 事件"""
+        if "error" in event:
+            self.failed = True
+            return
+
+        for node_name, update in event.items():
+            if not isinstance(update, dict):
+                continue
+            messages = update.get("messages") or []
+            if node_name == "agent" and messages:
+                last_message = messages[-1]
+                if isinstance(last_message, AIMessage):
+                    self.tool_calls.extend(
+                        {"name": tc["name"], "args": tc.get("args", {})}
+                        for tc in last_message.tool_calls
+                    )
+            elif node_name == "tools":
+                if any(
+                    isinstance(m, ToolMessage) and is_failed_tool_message(m)
+                    for m in messages
+                ):
+                    self.failed = True
+
+    @property
+    def replayable(self) -> bool:
+        """序列是否成功且只包含可回放的工具"""
+        if self.failed or not self.tool_calls:
+            return False
+        return all(
+            _api_name(tc["name"]) in ACTION_APIS | QUERY_APIS for tc in self.tool_calls
+        )
+
+
+class PlanReplayStore:
+    """执行计划存储（JSON 文件）
+
+    以"步骤文本 + 起始 URL"为键保存计划，
+    回放失败或计划过期时自动失效。
+
+    多个执行器（例如 --concurrent 并发执行的文件、--workers 的多个工作进程）
+    可以共享同一个文件：每个实例只记录自己的修改，保存时在文件锁（{path}.lock）内
+    重新读取文件的最新内容并合并这些修改，不会覆盖其他执行器在此期间保存的计划。
+    """
+
+    def __init__(self, path: str, max_age: float = 30 * 24 * 3600):
+        """初始化计划存储
+
+        Args:
+            path: JSON 文件路径
+            max_age: 计划最大存活时间（秒），默认 30 天
+        """
+        self.path = path
+        self.max_age = max_age
+        self.plans: Dict[str, RecordedPlan] = {}
+        self.dirty = False
+
+        # 加载以来本实例的修改（保存时合并到文件的最新内容上）
+        self._recorded: Set[str] = set()
+        self._replayed: Dict[str, int] = {}
+        self._removed: Set[str] = set()
+
+        # 回放统计
+        self.hits = 0
+        self.misses = 0
+        self.replay_failures = 0
+        self.recorded = 0
+        self.invalidated = 0
+
+        self.load()
+
+    @staticmethod
+    def make_key(step: str, start_url: str) -> str:
+        raw = f"{step.strip()}\n{normalize_url(start_url)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def load(self) -> None:
+        """从文件加载计划"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            self.plans = self._read()
+            logger.info(f"加载执行计划: {len(self.plans)} 条")
+        except Exception as e:
+            logger.error(f"加载执行计划失败: {e}")
+
+    def save(self) -> None:
+        """合并本实例的修改并保存到文件（原子替换）"""
+        if not self.dirty:
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        # 读取、合并、替换在文件锁内完成，其他进程保存的计划不会丢失
+        with self._file_lock():
+            try:
+                plans = self._read() if os.path.exists(self.path) else {}
+            except Exception as e:
+                logger.error(f"读取执行计划失败，使用本实例的计划覆盖: {e}")
+                plans = dict(self.plans)
+
+            for key in self._removed:
+                plans.pop(key, None)
+            for key, count in self._replayed.items():
+                if key in plans and key not in self._recorded:
+                    plans[key].replay_count += count
+            for key in self._recorded:
+                if key in self.plans:
+                    plans[key] = self.plans[key]
+
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"plans": {key: asdict(plan) for key, plan in plans.items()}},
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+            os.replace(tmp_path, self.path)
+
+        self.plans = plans
+        self._recorded.clear()
+        self._replayed.clear()
+        self._removed.clear()
+        self.dirty = False
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """跨进程的排他文件锁（没有 fcntl 时不加锁）"""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, RecordedPlan]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {
+            key: RecordedPlan(**plan) for key, plan in data.get("plans", {}).items()
+        }
+
+    def lookup(self, step: str, start_url: str) -> Optional[RecordedPlan]:
+        """查找可回放的计划"""
+        key = self.make_key(step, start_url)
+        plan = self.plans.get(key)
+        if plan and time.time() - plan.recorded_at > self.max_age:
+            self.invalidate(step, start_url)
+            plan = None
+
+        if plan is None:
+            self.misses += 1
+        return plan
+
+    def record(
+        self, step: str, start_url: str, tool_calls: List[Dict[str, Any]]
+    ) -> None:
+        """记录成功的工具调用序列"""
+        key = self.make_key(step, start_url)
+        self.plans[key] = RecordedPlan(
+            step=step, start_url=normalize_url(start_url), tool_calls=tool_calls
+        )
+        self._recorded.add(key)
+        self._replayed.pop(key, None)
+        self._removed.discard(key)
+        self.recorded += 1
+        self.dirty = True
+
+    def mark_replayed(self, plan: RecordedPlan) -> None:
+        """记录一次成功回放"""
+        plan.replay_count += 1
+        key = self.make_key(plan.step, plan.start_url)
+        self._replayed[key] = self._replayed.get(key, 0) + 1
+        self.hits += 1
+        self.dirty = True
+
+    def mark_failed(self, step: str, start_url: str) -> None:
+        """记录一次回放失败并使计划失效"""
+        self.replay_failures += 1
+        self.invalidate(step, start_url)
+
+    def invalidate(self, step: str, start_url: str) -> None:
+        """使计划失效"""
+        key = self.make_key(step, start_url)
+        if self.plans.pop(key, None) is not None:
+            self._removed.add(key)
+            self._recorded.discard(key)
+            self._replayed.pop(key, None)
+            self.invalidated += 1
+            self.dirty = True
+
+    def get_report(self) -> Dict[str, Any]:
+        """获取回放报告"""
+        lookups = self.hits + self.misses + self.replay_failures
+        return {
+            "plans": len(self.plans),
+            "replay_hits": self.hits,
+            "replay_misses": self.misses,
+            "replay_failures": self.replay_failures,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "recorded": self.recorded,
+            "invalidated": self.invalidated,
+        }
+
+
+class PlanReplayer:
+    """通过 MidsceneHTTPClient 直接回放工具调用序列"""
+
+    def __init__(self, http_client: MidsceneHTTPClient):
+        self.http_client = http_client
+
+    async def get_current_url(self) -> str:
+        """查询当前页面 URL"""
+        try:
+            response = await self.http_client.execute_query("location")
+            result = response.get("result") or {}
+            return result.get("url", "") if isinstance(result, dict) else ""
+        except Exception as e:
+            logger.warning(f"获取当前页面 URL 失败: {e}")
+            return ""
+
+    async def get_page_state(self) -> Optional[str]:
+        """获取当前页面状态（规范化 URL 加 DOM 签名），失败时返回 None"""
+        url = await self.get_current_url()
+        if not url:
+            return None
+        try:
+            ok, result = await self._replay_action(
+                "evaluateJavaScript", {"script": PAGE_STATE_SCRIPT}
+            )
+        except Exception as e:
+            logger.warning(f"获取页面状态失败: {e}")
+            return None
+        if not ok:
+            return None
+        signature = result.get("result") if isinstance(result, dict) else result
+        return f"{normalize_url(url)}|{signature}"
+
+    async def replay(
+        self, plan: RecordedPlan, results: Optional[List[Any]] = None
+    ) -> bool:
+        """按顺序回放计划中的工具调用
+
+        Args:
+            plan: 已录制的执行计划
+            results: 提供时按顺序追加每个成功调用的结果
+
+        Returns:
+            全部调用成功且断言成立时返回 True
+        """
+        for tool_call in plan.tool_calls:
+            api_name = _api_name(tool_call["name"])
+            params = tool_call.get("args", {})
+
+            if api_name in ACTION_APIS:
+                ok, result = await self._replay_action(api_name, params)
+            elif api_name in QUERY_APIS:
+                ok, result = await self._replay_query(api_name, params)
+            else:
+                ok, result = False, None
+
+            if not ok:
+                logger.info(f"回放失败: {tool_call['name']} {params}")
+                return False
+            if results is not None:
+                results.append(result)
+
+        return True
+
+    async def _replay_action(
+        self, api_name: str, params: Dict[str, Any]
+    ) -> Tuple[bool, Any]:
+        async for event in self.http_client.execute_action(
+            api_name, params, stream=False
+        ):
+            if "error" in event or event.get("success") is False:
+                return False, None
+            if "result" in event:
+                return True, event["result"]
+        return True, "执行完成"
+
+    async def _replay_query(
+        self, api_name: str, params: Dict[str, Any]
+    ) -> Tuple[bool, Any]:
+        response = await self.http_client.execute_query(api_name, params)
+        if not response or response.get("success") is False:
+            return False, None
+        if api_name in ASSERTION_APIS and response.get("result") is False:
+            return False, None
+        return True, response
+
+
+def _api_name(tool_name: str) -> str:
+    return tool_name.replace("midscene_", "")
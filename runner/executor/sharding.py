@@ -0,0 +1,294 @@
+"""
+多进程分片执行
+
+单个进程内的并发受限于 JSON 处理、日志和 LangChain 的 CPU 开销。
+多进程模式下启动 N 个工作进程，每个进程运行自己的 asyncio 工作池（见 file_pool）：
+
+1. 按历史耗时以最长处理时间优先（LPT）的方式把文件分配到各进程：
+   文件按预计耗时从长到短排序，依次分配给当前预计负载最小的进程
+2. 工作进程每执行完一个文件就通过队列把结果发回父进程，父进程按原始顺序合并
+3. 父进程用实际耗时更新历史记录，供下次分配使用
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from argparse import Namespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 等待工作进程消息的轮询间隔（秒），期间检查进程是否异常退出
+POLL_INTERVAL = 1.0
+
+
+class DurationHistory:
+    """测试文件的历史执行耗时（JSON 文件）
+
+    以文件绝对路径为键，保存耗时的指数移动平均值。
+    """
+
+    def __init__(self, path: Optional[str] = None, alpha: float = 0.5):
+        """初始化耗时历史
+
+        Args:
+            path: JSON 文件路径（None 表示只在内存中记录，不持久化）
+            alpha: 指数移动平均中最新一次耗时的权重
+        """
+        self.path = path
+        self.alpha = alpha
+        self.durations: Dict[str, float] = {}
+        self.dirty = False
+
+        if path:
+            self.load()
+
+    @staticmethod
+    def make_key(file_path: str) -> str:
+        return os.path.abspath(file_path)
+
+    def load(self) -> None:
+        """从文件加载历史耗时"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.durations = {
+                key: float(value) for key, value in data.get("durations", {}).items()
+            }
+            logger.info(f"加载历史耗时: {len(self.durations)} 个文件")
+        except Exception as e:
+            logger.error(f"加载历史耗时失败: {e}")
+
+    def save(self) -> None:
+        """保存历史耗时到文件（原子替换）"""
+        if not self.path or not self.dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"durations": self.durations}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def update(self, file_path: str, duration: float) -> None:
+        """记录一次实际耗时"""
+        key = self.make_key(file_path)
+        previous = self.durations.get(key)
+        self.durations[key] = (
+            duration
+            if previous is None
+            else self.alpha * duration + (1 - self.alpha) * previous
+        )
+        self.dirty = True
+
+    def estimate(self, files: Sequence[str]) -> Dict[str, float]:
+        """估计各文件的耗时
+
+        有历史记录的文件使用历史耗时，没有记录的文件使用已知耗时的平均值；
+        完全没有历史时按文件大小估计（只用于排序，单位无关紧要）。
+        """
+        known = {
+            f: self.durations[self.make_key(f)]
+            for f in files
+            if self.make_key(f) in self.durations
+        }
+        if not known:
+            return {f: float(_file_size(f)) for f in files}
+
+        default = sum(known.values()) / len(known)
+        return {f: known.get(f, default) for f in files}
+
+
+def _file_size(file_path: str) -> int:
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+
+def plan_shards(
+    files: Sequence[str], estimates: Dict[str, float], workers: int
+) -> List[List[str]]:
+    """按最长处理时间优先（LPT）把文件分配到各工作进程
+
+    Returns:
+        每个工作进程的文件列表（各列表内按预计耗时从长到短排列）
+    """
+    workers = max(1, min(workers, len(files)))
+    shards: List[List[str]] = [[] for _ in range(workers)]
+    # (预计负载, 进程编号)，负载相同时分配给编号小的进程
+    loads: List[Tuple[float, int]] = [(0.0, i) for i in range(workers)]
+
+    for path in sorted(files, key=lambda f: estimates.get(f, 0.0), reverse=True):
+        load, worker_id = heapq.heappop(loads)
+        shards[worker_id].append(path)
+        heapq.heappush(loads, (load + estimates.get(path, 0.0), worker_id))
+    return shards
+
+
+async def run_sharded(
+    files: Sequence[str],
+    args: Namespace,
+    workers: int,
+    history: Optional[DurationHistory] = None,
+) -> List[Dict[str, Any]]:
+    """在多个工作进程中执行文件并合并结果
+
+    Args:
+        files: 文件路径列表
+        args: 命令行参数（传给每个工作进程，args.concurrent 为每个进程内的并发数）
+        workers: 工作进程数量
+        history: 历史耗时（用于分配文件，并用实际耗时更新）
+
+    Returns:
+        按 files 中的顺序排列的结果列表
+    """
+    history = history or DurationHistory()
+    shards = plan_shards(files, history.estimate(files), workers)
+    positions = {path: i for i, path in enumerate(files, 1)}
+    total = len(files)
+
+    # 使用 spawn 启动，避免 fork 继承父进程的事件循环和线程状态
+    context = multiprocessing.get_context("spawn")
+    messages = context.Queue()
+    stop_event = context.Event()
+    processes = []
+    for worker_id, shard in enumerate(shards, 1):
+        assigned = [(positions[path], path) for path in shard]
+        process = context.Process(
+            target=_worker_main,
+            args=(worker_id, assigned, total, args, messages, stop_event),
+            name=f"midscene-text-worker-{worker_id}",
+        )
+        process.start()
+        processes.append(process)
+        print(f"🧩 进程 w{worker_id}: {len(shard)} 个文件")
+
+    results: Dict[int, Dict[str, Any]] = {}
+    started: Dict[int, int] = {}
+    running = set(range(1, len(processes) + 1))
+    loop = asyncio.get_running_loop()
+
+    def handle(message: Tuple[str, int, Any]) -> None:
+        kind, worker_id, payload = message
+        if kind == "start":
+            started[payload] = worker_id
+        elif kind == "result":
+            index, result = payload
+            results[index] = result
+            if "results" in result:
+                history.update(result["file"], result["duration"])
+            status = "✅" if result.get("success") else "❌"
+            print(
+                f"📥 [{len(results)}/{total}] {status} {result['file']} "
+                f"(w{worker_id}, {result['duration']:.1f}s)"
+            )
+        elif kind == "done":
+            running.discard(worker_id)
+
+    while running:
+        try:
+            message = await loop.run_in_executor(
+                None, messages.get, True, POLL_INTERVAL
+            )
+        except queue.Empty:
+            for worker_id in list(running):
+                if not processes[worker_id - 1].is_alive():
+                    # 进程退出前已写入队列的消息仍可读取
+                    _drain(messages, handle)
+                    if worker_id in running:
+                        running.discard(worker_id)
+                        logger.error(
+                            f"❌ 工作进程 w{worker_id} 异常退出 "
+                            f"(exit code {processes[worker_id - 1].exitcode})"
+                        )
+            continue
+        handle(message)
+
+    for process in processes:
+        process.join()
+
+    # 异常退出的进程未报告结果的文件记为失败（因其他文件失败而未启动的文件除外）
+    for worker_id, process in enumerate(processes, 1):
+        if process.exitcode == 0:
+            continue
+        for path in shards[worker_id - 1]:
+            index = positions[path]
+            if index in results or (index not in started and stop_event.is_set()):
+                continue
+            results[index] = {
+                "file": path,
+                "success": False,
+                "error": f"工作进程异常退出 (exit code {process.exitcode})",
+            }
+
+    history.save()
+    return [results[index] for index in sorted(results)]
+
+
+def _drain(messages: Any, handle: Any) -> None:
+    while True:
+        try:
+            handle(messages.get_nowait())
+        except queue.Empty:
+            return
+
+
+def _worker_main(
+    worker_id: int,
+    assigned: List[Tuple[int, str]],
+    total: int,
+    args: Namespace,
+    messages: Any,
+    stop_event: Any,
+) -> None:
+    """工作进程入口"""
+    try:
+        asyncio.run(_run_worker(worker_id, assigned, total, args, messages, stop_event))
+    finally:
+        messages.put(("done", worker_id, None))
+
+
+async def _run_worker(
+    worker_id: int,
+    assigned: List[Tuple[int, str]],
+    total: int,
+    args: Namespace,
+    messages: Any,
+    stop_event: Any,
+) -> None:
+    # 延迟导入：text_executor 在主函数中导入本模块
+    from runner.executor.file_pool import run_files
+    from runner.executor.text_executor import execute_text_file
+
+    positions = {path: index for index, path in assigned}
+
+    async def run_file(path: str, _: int) -> Dict[str, Any]:
+        index = positions[path]
+        messages.put(("start", worker_id, index))
+        start = time.perf_counter()
+        result = await execute_text_file(path, args, index, total)
+        result["duration"] = round(time.perf_counter() - start, 3)
+        messages.put(("result", worker_id, (index, result)))
+        if "error" in result and not args.continue_on_error:
+            stop_event.set()
+        return result
+
+    await run_files(
+        [path for _, path in assigned],
+        run_file,
+        concurrency=args.concurrent,
+        continue_on_error=args.continue_on_error,
+        buffer_output=True,
+        should_stop=stop_event.is_set,
+        name=f"w{worker_id}",
+    )
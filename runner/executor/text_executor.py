@@ -14,7 +14,7 @@ import json
 import os
 import re
 import sys
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 # 添加 runner 到 sys.path
 runner_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -23,18 +23,41 @@ if runner_dir not in sys.path:
 
 # 直接导入 agent 模块
 from runner.agent.agent import MidsceneAgent
+from runner.executor.fast_path import FastPathRouter, IntentRecognizer
+from runner.executor.file_pool import run_files
+from runner.executor.pipeline import StepPipeline
+from runner.executor.plan_replay import PlanRecorder, PlanReplayer, PlanReplayStore
+from runner.executor.sharding import DurationHistory, run_sharded
 
 
 class TextTestExecutor:
     """自然语言测试执行器"""
 
     def __init__(
-        self, text_config: Dict[str, Any], args: Optional[argparse.Namespace] = None
+        self,
+        text_config: Dict[str, Any],
+        args: Optional[argparse.Namespace] = None,
+        session_id: Optional[str] = None,
     ):
         self.config = text_config
         self.args = args or argparse.Namespace()
         self.agent: Optional[MidsceneAgent] = None
         self.results = []
+        # 并发执行多个文件时每个文件使用独立的会话
+        self.session_id = session_id
+
+        # 执行计划回放（可选）
+        plan_replay_path = getattr(self.args, "plan_replay", None)
+        self.plan_store: Optional[PlanReplayStore] = (
+            PlanReplayStore(plan_replay_path) if plan_replay_path else None
+        )
+        self.plan_replayer: Optional[PlanReplayer] = None
+
+        # 步骤流水线规划（可选）
+        self.pipeline: Optional[StepPipeline] = None
+
+        # 简单步骤快速通道（可选）
+        self.fast_path: Optional[FastPathRouter] = None
 
     async def initialize_agent(self):
         """初始化 Midscene Agent"""
@@ -65,7 +88,10 @@ class TextTestExecutor:
         elif "viewportHeight" in web_config:
             midscene_config["viewport_height"] = web_config["viewportHeight"]
 
-        if hasattr(self.args, "web_deviceScaleFactor") and self.args.web_deviceScaleFactor:
+        if (
+            hasattr(self.args, "web_deviceScaleFactor")
+            and self.args.web_deviceScaleFactor
+        ):
             midscene_config["device_scale_factor"] = self.args.web_deviceScaleFactor
         elif "deviceScaleFactor" in web_config:
             midscene_config["device_scale_factor"] = web_config["deviceScaleFactor"]
@@ -80,6 +106,20 @@ class TextTestExecutor:
             os.getenv("MIDSCENE_SERVER_URL", "http://localhost:3000")
             or "http://localhost:3000"
         )
+        llm_cache_path = (
+            getattr(self.args, "llm_cache", None)
+            or os.getenv("MIDSCENE_LLM_CACHE_PATH")
+            or None
+        )
+        memory_store_path = (
+            getattr(self.args, "memory_store", None)
+            or os.getenv("MIDSCENE_MEMORY_STORE_PATH")
+            or None
+        )
+
+        similarity_threshold = (
+            float(os.getenv("MIDSCENE_SIMILARITY_THRESHOLD") or 0) or None
+        )
 
         self.agent = MidsceneAgent(
             deepseek_api_key=deepseek_api_key,
@@ -88,9 +128,30 @@ class TextTestExecutor:
             midscene_config=midscene_config,
             tool_set="full",
             enable_websocket=True,
+            llm_cache_path=llm_cache_path,
+            fast_model=os.getenv("DEEPSEEK_FAST_MODEL") or None,
+            memory_store_path=memory_store_path,
+            similarity_threshold=similarity_threshold,
+            session_id=self.session_id,
         )
 
         await self.agent.initialize()
+
+        pipeline_enabled = getattr(self.args, "pipeline", False)
+        if self.plan_store is not None or pipeline_enabled:
+            self.plan_replayer = PlanReplayer(self.agent.http_client)
+        if pipeline_enabled:
+            self.pipeline = StepPipeline(self.agent)
+
+        if getattr(self.args, "fast_path", False):
+            patterns_path = getattr(self.args, "fast_path_patterns", None)
+            recognizer = (
+                IntentRecognizer.from_file(patterns_path)
+                if patterns_path
+                else IntentRecognizer()
+            )
+            self.fast_path = FastPathRouter(self.agent.http_client, recognizer)
+
         return self.agent
 
     async def navigate_to_url(self, url: str):
@@ -198,16 +259,21 @@ class TextTestExecutor:
         # 统一格式：所有步骤都使用 ai 动作，让大模型自动判断要做什么
         return {"ai": content}
 
-    async def execute_step(self, step: Dict[str, Any]):
+    async def execute_step(
+        self, step: Dict[str, Any], next_step: Optional[Dict[str, Any]] = None
+    ):
         """执行单个步骤
 
         新版本：简化逻辑，所有步骤都通过 AI 自动判断和执行
+        next_step 用于流水线模式下提前规划下一步
         """
         for action_type, action_content in step.items():
             try:
                 if action_type == "ai":
                     # 新版本：所有步骤都通过 AI 自动规划执行
-                    await self._execute_ai_action(action_content)
+                    await self._execute_ai_action(
+                        action_content, (next_step or {}).get("ai")
+                    )
                 else:
                     # 保留其他类型以防万一，但实际上不会用到
                     print(f"  ⚠️ 未知操作类型: {action_type}")
@@ -217,7 +283,7 @@ class TextTestExecutor:
 
                 traceback.print_exc()
 
-    async def _execute_ai_action(self, content: Any):
+    async def _execute_ai_action(self, content: Any, next_content: Any = None):
         """执行 AI 自动规划操作
 
         新版本：增强自然语言理解，自动判断操作类型
@@ -231,13 +297,113 @@ class TextTestExecutor:
         print(f"\n🤖 AI 自动操作:")
         print(f"  📝 指令: {prompt}")
 
+        start_url = ""
+        if self.plan_replayer is not None:
+            start_url = await self.plan_replayer.get_current_url()
+
+        # 流水线模式：在本步骤执行期间开始规划下一步
+        if self.pipeline is not None:
+            page_state = await self.plan_replayer.get_page_state()
+            self.pipeline.start_step(
+                prompt, page_state, str(next_content) if next_content else None
+            )
+
+        # 优先回放已录制的执行计划，失败时再交给 LLM
+        if self.plan_store is not None and await self._replay_recorded_plan(
+            prompt, start_url
+        ):
+            if self.fast_path is not None:
+                self.fast_path.record_replayed()
+            if self.pipeline is not None:
+                self.pipeline.finish_step(True)
+            return
+
+        # 简单步骤直接执行对应动作，不经过 LLM 规划
+        if self.fast_path is not None and await self._execute_fast_path(prompt):
+            if self.pipeline is not None:
+                self.pipeline.finish_step(True)
+            return
+
+        planned = None
+        if self.pipeline is not None:
+            planned = await self.pipeline.take()
+        recorder = PlanRecorder()
+        if planned is not None:
+            print(f"  ⚡ 使用预先规划的结果")
+
         # 直接使用原始提示词，不添加额外指导，避免干扰 AI 执行
-        async for event in self.agent.execute(prompt, stream=True):
+        async for event in self.agent.execute(prompt, stream=True, planned=planned):
+            recorder.observe(event)
             if "messages" in event:
                 msg = event["messages"][-1]
                 if hasattr(msg, "content") and msg.content:
                     print(f"  💬 {msg.content}")
 
+        if self.pipeline is not None:
+            self.pipeline.finish_step(not recorder.failed)
+
+        if self.plan_store is not None and recorder.replayable:
+            self.plan_store.record(prompt, start_url, recorder.tool_calls)
+
+    async def _replay_recorded_plan(self, prompt: str, start_url: str) -> bool:
+        """回放已录制的执行计划
+
+        Returns:
+            回放成功返回 True；没有计划或回放失败返回 False
+        """
+        if self.agent is None or self.plan_store is None or self.plan_replayer is None:
+            return False
+
+        plan = self.plan_store.lookup(prompt, start_url)
+        if plan is None:
+            return False
+
+        print(f"  ♻️ 回放已录制的执行计划 ({len(plan.tool_calls)} 个调用)")
+        results: List[Any] = []
+        if await self.plan_replayer.replay(plan, results):
+            self.plan_store.mark_replayed(plan)
+            # 写入线程，后续步骤的 LLM 调用能看到回放执行过的工具调用
+            await self.agent.record_step(prompt, plan.tool_calls, results)
+            await self.agent.refresh_page_context()
+            self.agent.memory.add_record(
+                action="replay",
+                params={"user_input": prompt},
+                result="回放成功",
+                success=True,
+            )
+            print(f"  ✅ 回放成功，跳过 LLM 规划")
+            return True
+
+        self.plan_store.mark_failed(prompt, start_url)
+        print(f"  ⚠️ 回放失败，交给 AI 重新规划")
+        return False
+
+    async def _execute_fast_path(self, prompt: str) -> bool:
+        """通过快速通道执行简单步骤
+
+        Returns:
+            执行成功返回 True；没有匹配的规则或执行失败返回 False
+        """
+        intent = await self.fast_path.try_execute(prompt)
+        if intent is None:
+            return False
+
+        await self.agent.refresh_page_context()
+
+        await self.agent.record_step(
+            prompt,
+            [{"name": f"midscene_{intent.api}", "args": intent.params}],
+            [intent.result if intent.result is not None else "执行完成"],
+        )
+        self.agent.memory.add_record(
+            action=intent.api,
+            params={"user_input": prompt, **intent.params},
+            result="快速通道执行成功",
+            success=True,
+        )
+        print(f"  ⚡ 快速通道: {intent.api} {intent.params}")
+        return True
+
     async def _execute_ai_assert(self, content: Any):
         """执行断言"""
         if self.agent is None:
@@ -553,10 +719,11 @@ class TextTestExecutor:
 
             task_result = {"name": task_name, "success": True, "steps": []}
 
-            for step in flow:
+            for index, step in enumerate(flow):
                 step_result = {"action": list(step.keys())[0], "success": True}
+                next_step = flow[index + 1] if index + 1 < len(flow) else None
                 try:
-                    await self.execute_step(step)
+                    await self.execute_step(step, next_step)
                     step_result["success"] = True
                 except Exception as e:
                     print(f"❌ 步骤执行失败: {e}")
@@ -575,9 +742,15 @@ class TextTestExecutor:
                 print(f"\n❌ 任务失败: {task_name}")
 
         # 清理
+        if self.pipeline is not None:
+            await self.pipeline.close()
+
         if self.agent:
             await self.agent.cleanup()
 
+        if self.plan_store is not None:
+            self.plan_store.save()
+
         # 打印总结
         self.print_summary()
 
@@ -604,6 +777,40 @@ class TextTestExecutor:
             status = "✅" if result["success"] else "❌"
             print(f"\n{status} {result['name']}")
 
+        if self.plan_store is not None:
+            report = self.plan_store.get_report()
+            print(
+                f"\n♻️ 计划回放: 命中 {report['replay_hits']}, "
+                f"未命中 {report['replay_misses']}, "
+                f"失败 {report['replay_failures']}, "
+                f"新录制 {report['recorded']}"
+            )
+
+        if self.pipeline is not None:
+            report = self.pipeline.get_report()
+            print(
+                f"\n🔮 流水线规划: 预先规划 {report['speculated']}, "
+                f"采用 {report['committed']}, "
+                f"丢弃 {sum(report['discarded'].values())}"
+            )
+
+        if self.fast_path is not None:
+            report = self.fast_path.get_report()
+            print(
+                f"\n⚡ 快速通道: {report['fast_path']}/{report['steps']} 步 "
+                f"({report['fast_path_ratio']:.0%}), 回退 {report['fallbacks']}"
+            )
+
+        if self.agent is not None:
+            stats = self.agent.metrics.get_stats()
+            print(
+                f"\n⏱️ 耗时分布: LLM {stats['llm']['latency']['total_ms'] / 1000:.1f}s "
+                f"({stats['llm']['calls']} 次, "
+                f"{stats['llm']['prompt_tokens']}+{stats['llm']['completion_tokens']} tokens), "
+                f"工具 {stats['tools']['latency']['total_ms'] / 1000:.1f}s "
+                f"(服务端 {stats['tools']['server']['total_ms'] / 1000:.1f}s)"
+            )
+
         print("\n" + "=" * 70)
 
 
@@ -616,6 +823,7 @@ def parse_arguments():
 示例:
   %(prog)s tests/basic_usage.txt
   %(prog)s tests/*.txt --concurrent 4
+  %(prog)s tests/*.txt --workers 8 --concurrent 4 --durations durations.json
   %(prog)s tests/basic_usage.txt --headed
   %(prog)s tests/*.txt --continue-on-error --summary output.json
         """,
@@ -629,6 +837,19 @@ def parse_arguments():
         "--concurrent", type=int, default=1, help="并发执行的数量 (默认: 1)"
     )
 
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="工作进程数量，每个进程内按 --concurrent 并发执行 (默认: 1，不启动工作进程)",
+    )
+
+    parser.add_argument(
+        "--durations",
+        type=str,
+        help="记录各文件历史耗时的 JSON 文件路径，多进程模式按历史耗时分配文件（也可通过 MIDSCENE_DURATION_HISTORY 设置）",
+    )
+
     parser.add_argument(
         "--continue-on-error",
         action="store_true",
@@ -649,6 +870,42 @@ def parse_arguments():
         "--summary", type=str, help="指定生成的 JSON 格式汇总报告文件的路径"
     )
 
+    parser.add_argument(
+        "--llm-cache",
+        type=str,
+        help="启用 LLM 响应缓存并指定 SQLite 缓存文件路径（也可通过 MIDSCENE_LLM_CACHE_PATH 设置）",
+    )
+
+    parser.add_argument(
+        "--memory-store",
+        type=str,
+        help="将操作记忆持久化到 SQLite 文件，多次运行和多个进程共享（也可通过 MIDSCENE_MEMORY_STORE_PATH 设置）",
+    )
+
+    parser.add_argument(
+        "--plan-replay",
+        type=str,
+        help="启用执行计划录制与回放，并指定计划文件路径（JSON）",
+    )
+
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="在当前步骤执行期间提前规划下一步（步骤失败或页面变化时丢弃预先规划）",
+    )
+
+    parser.add_argument(
+        "--fast-path",
+        action="store_true",
+        help="按规则识别简单步骤（导航、点击、输入等）并直接执行，不经过 LLM 规划",
+    )
+
+    parser.add_argument(
+        "--fast-path-patterns",
+        type=str,
+        help="快速通道的自定义识别规则文件路径（JSON，优先于默认规则）",
+    )
+
     parser.add_argument(
         "--web.userAgent",
         type=str,
@@ -681,6 +938,56 @@ def parse_arguments():
     return args
 
 
+async def execute_text_file(
+    txt_file: str, args: argparse.Namespace, index: int = 1, total: int = 1
+) -> Dict[str, Any]:
+    """执行单个文本文件并返回文件结果（不抛出异常）"""
+    print(f"\n{'='*70}")
+    print(f"执行 {index}/{total}: {txt_file}")
+    print(f"{'='*70}")
+
+    if not os.path.exists(txt_file):
+        print(f"❌ 文件不存在: {txt_file}")
+        return {"file": txt_file, "success": False, "error": "文件不存在"}
+
+    try:
+        stem = os.path.splitext(os.path.basename(txt_file))[0]
+        executor = TextTestExecutor(
+            {}, args, session_id=f"session_{os.getpid()}_{index}_{stem}"
+        )
+        config = executor.parse_text_file(txt_file)
+        executor.config = config
+
+        if not config.get("tasks"):
+            print(f"❌ 文件中没有任务: {txt_file}")
+            return {"file": txt_file, "success": False, "error": "文件中没有任务"}
+
+        await executor.run()
+
+        file_result = {
+            "file": txt_file,
+            "success": all(r["success"] for r in executor.results),
+            "results": executor.results,
+        }
+        if executor.plan_store is not None:
+            file_result["plan_replay"] = executor.plan_store.get_report()
+        if executor.pipeline is not None:
+            file_result["pipeline"] = executor.pipeline.get_report()
+        if executor.fast_path is not None:
+            file_result["fast_path"] = executor.fast_path.get_report()
+        if executor.agent is not None:
+            file_result["timing"] = executor.agent.metrics.get_stats()
+        return file_result
+
+    except Exception as e:
+        print(f"❌ 执行失败: {e}")
+        import traceback
+
+        traceback.print_exc(file=sys.stdout)
+
+        return {"file": txt_file, "success": False, "error": str(e)}
+
+
 async def main():
     """主函数 - 支持多个文件和命令行参数"""
     args = parse_arguments()
@@ -715,59 +1022,30 @@ async def main():
     print("🚀 开始执行自然语言测试")
     print("=" * 70)
 
-    all_results = []
-
-    if args.concurrent > 1:
-        print(f"\n⚡ 并发执行模式 ({args.concurrent} 个并发)")
-
-    for i, txt_file in enumerate(txt_files, 1):
-        print(f"\n{'='*70}")
-        print(f"执行 {i}/{len(txt_files)}: {txt_file}")
-        print(f"{'='*70}")
-
-        if not os.path.exists(txt_file):
-            print(f"❌ 文件不存在: {txt_file}")
-            if not args.continue_on_error:
-                break
-            all_results.append(
-                {"file": txt_file, "success": False, "error": "文件不存在"}
-            )
-            continue
-
-        try:
-            executor = TextTestExecutor({}, args)
-            config = executor.parse_text_file(txt_file)
-            executor.config = config
-
-            if not config.get("tasks"):
-                print(f"❌ 文件中没有任务: {txt_file}")
-                if not args.continue_on_error:
-                    break
-                all_results.append(
-                    {"file": txt_file, "success": False, "error": "文件中没有任务"}
-                )
-                continue
-
-            await executor.run()
-
-            all_results.append(
-                {
-                    "file": txt_file,
-                    "success": all(r["success"] for r in executor.results),
-                    "results": executor.results,
-                }
-            )
-
-        except Exception as e:
-            print(f"❌ 执行失败: {e}")
-            import traceback
-
-            traceback.print_exc()
-
-            all_results.append({"file": txt_file, "success": False, "error": str(e)})
+    history = DurationHistory(
+        args.durations or os.getenv("MIDSCENE_DURATION_HISTORY") or None
+    )
 
-            if not args.continue_on_error:
-                break
+    if args.workers > 1:
+        print(f"\n🧩 多进程执行模式 ({args.workers} 个进程 × {args.concurrent} 个并发)")
+        all_results = await run_sharded(txt_files, args, args.workers, history)
+    else:
+        if args.concurrent > 1:
+            print(f"\n⚡ 并发执行模式 ({args.concurrent} 个并发)")
+
+        async def run_file(txt_file: str, index: int) -> Dict[str, Any]:
+            return await execute_text_file(txt_file, args, index, len(txt_files))
+
+        all_results = await run_files(
+            txt_files,
+            run_file,
+            concurrency=args.concurrent,
+            continue_on_error=args.continue_on_error,
+        )
+        for result in all_results:
+            if "results" in result:
+                history.update(result["file"], result["duration"])
+        history.save()
 
     # 生成汇总报告
     if args.summary:
@@ -44,11 +44,14 @@ export function createSessionRoutes(orchestrator: MidsceneOrchestrator): {
       const { sessionId } = req.params;
       const { action, params } = req.body as { action: ActionType; params: ActionParams };
 
+      const startTime = Date.now();
+
       try {
         const result = await orchestrator.executeAction(sessionId, action, params);
         res.json({
           success: true,
           result,
+          duration: Date.now() - startTime,
           timestamp: Date.now(),
         });
       } catch (error) {
@@ -57,6 +60,7 @@ export function createSessionRoutes(orchestrator: MidsceneOrchestrator): {
         res.status(500).json({
           success: false,
           error: err.message,
+          duration: Date.now() - startTime,
           timestamp: Date.now(),
         });
       }
@@ -69,11 +73,14 @@ export function createSessionRoutes(orchestrator: MidsceneOrchestrator): {
       const { sessionId } = req.params;
       const { query, params } = req.body as { query: QueryType; params: QueryParams };
 
+      const startTime = Date.now();
+
       try {
         const result = await orchestrator.executeQuery(sessionId, query, params);
         res.json({
           success: true,
           result,
+          duration: Date.now() - startTime,
           timestamp: Date.now(),
         });
       } catch (error) {
@@ -82,6 +89,7 @@ export function createSessionRoutes(orchestrator: MidsceneOrchestrator): {
         res.status(500).json({
           success: false,
           error: err.message,
+          duration: Date.now() - startTime,
           timestamp: Date.now(),
         });
       }
@@ -28,6 +28,9 @@ export interface ApiResponse<T = unknown> {
   /** 响应时间戳（Unix 毫秒时间戳） */
   timestamp: number;
 
+  /** 服务端处理耗时（毫秒，可选） */
+  duration?: number;
+
   /** 响应数据（可选） */
   result?: T;
 
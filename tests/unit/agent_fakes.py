@@ -0,0 +1,116 @@
+"""单元测试用的替身：不依赖 Midscene 服务和真实 LLM"""
+
+import asyncio
+import itertools
+import json
+import time
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+
+
+class StreamingFakeChatModel(GenericFakeChatModel):
+    """按顺序返回预设消息的流式聊天模型（保留工具调用和 token 用量）"""
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._generate(messages).generations[0].message
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content=message.content,
+                tool_call_chunks=[
+                    {
+                        "name": tc["name"],
+                        "args": json.dumps(tc["args"], ensure_ascii=False),
+                        "id": tc["id"],
+                        "index": i,
+                    }
+                    for i, tc in enumerate(message.tool_calls)
+                ],
+                usage_metadata={
+                    "input_tokens": 100,
+                    "output_tokens": 10,
+                    "total_tokens": 110,
+                },
+            )
+        )
+
+
+class FakeHTTPClient:
+    """记录调用的 Midscene HTTP 客户端替身
+
+    每次调用返回的 timestamp 和 duration 都不同，与真实服务一致。
+    """
+
+    def __init__(self, url: str = "https://example.com/"):
+        self.calls = []
+        self.url = url
+        self.dom = "dom"
+        self.session_id = "session_fake"
+        self.websocket = None
+        self.session = None
+        self.base_url = "http://fake"
+        self.sessions_created = 0
+        self.sessions_closed = 0
+        self._ticks = itertools.count(1)
+
+    async def connect(self):
+        pass
+
+    async def health_check(self):
+        return {"status": "ok"}
+
+    async def create_session(self, config=None):
+        self.sessions_created += 1
+        self.session_id = f"session_fake_{self.sessions_created}"
+        return self.session_id
+
+    async def close_session(self):
+        self.sessions_closed += 1
+        self.session_id = None
+
+    async def connect_websocket(self):
+        return False
+
+    async def execute_action(self, action, params=None, stream=False):
+        self.calls.append((action, params))
+        await asyncio.sleep(0)
+        if action == "navigate":
+            self.url = params["url"]
+        result = {"success": True, "action": action}
+        if action == "evaluateJavaScript":
+            result["result"] = self.dom
+        yield {
+            "success": True,
+            "result": result,
+            "timestamp": time.time(),
+            "duration": next(self._ticks),
+        }
+
+    async def execute_query(self, query, params=None):
+        self.calls.append((query, params))
+        await asyncio.sleep(0)
+        if query == "location":
+            return {"success": True, "result": {"url": self.url, "title": "t"}}
+        return {
+            "success": True,
+            "result": {"items": [1, 2, 3], "text": "页面内容"},
+            "timestamp": time.time(),
+            "duration": next(self._ticks),
+        }
+
+    async def cleanup(self):
+        pass
+
+
+def tool_call(name, args, index=0):
+    return {"name": name, "args": args, "id": f"call_{index}", "type": "tool_call"}
+
+
+def ai_tool_calls(*calls):
+    return AIMessage(content="", tool_calls=list(calls))
+
+
+async def run_step(agent, prompt, thread_id=None):
+    """执行一个步骤并返回所有事件"""
+    return [event async for event in agent.execute(prompt, thread_id=thread_id)]
@@ -0,0 +1,33 @@
+"""单元测试公共夹具"""
+
+import pytest
+from agent_fakes import FakeHTTPClient, StreamingFakeChatModel
+
+from runner.agent.agent import MidsceneAgent
+
+
+@pytest.fixture
+def make_agent():
+    """创建跳过 initialize() 的智能体，LLM 按顺序返回 responses"""
+    agents = []
+
+    async def factory(responses, **kwargs):
+        kwargs.setdefault("enable_websocket", False)
+        agent = MidsceneAgent(deepseek_api_key="test", **kwargs)
+        agent.http_client = FakeHTTPClient()
+        agent.tools = await agent._create_tools()
+        agent.llm = StreamingFakeChatModel(messages=iter(responses))
+        agent.agent_executor = await agent._build_graph()
+        agent.initialized = True
+        agents.append(agent)
+        return agent
+
+    yield factory
+
+    for agent in agents:
+        for resource in (agent.llm_cache, getattr(agent.memory, "store", None)):
+            if resource is not None:
+                try:
+                    resource.close()
+                except Exception:
+                    pass
@@ -0,0 +1,124 @@
+"""智能体初始化阶段单元测试"""
+
+import asyncio
+
+import pytest
+from agent_fakes import FakeHTTPClient
+
+from runner.agent.agent import MidsceneAgent
+
+PHASE_DELAY = 0.2
+
+
+class SlowHTTPClient(FakeHTTPClient):
+    """创建会话较慢、WebSocket 连接由测试控制的 HTTP 客户端替身"""
+
+    def __init__(self, healthy: bool = True):
+        super().__init__()
+        self.healthy = healthy
+        self.websocket_ready = asyncio.Event()
+        self.cleaned = False
+
+    async def health_check(self):
+        return {"status": "ok" if self.healthy else "down"}
+
+    async def create_session(self, config=None):
+        await asyncio.sleep(PHASE_DELAY)
+        return await super().create_session(config)
+
+    async def connect_websocket(self):
+        await self.websocket_ready.wait()
+        return True
+
+    async def cleanup(self):
+        self.cleaned = True
+
+
+def make_agent(http_client, tools_error=None, **kwargs):
+    kwargs.setdefault("enable_websocket", False)
+    agent = MidsceneAgent(deepseek_api_key="test", **kwargs)
+    agent.http_client = http_client
+    create_tools = agent._create_tools
+
+    async def slow_create_tools():
+        await asyncio.sleep(PHASE_DELAY)
+        if tools_error:
+            raise tools_error
+        return await create_tools()
+
+    agent._create_tools = slow_create_tools
+    return agent
+
+
+async def test_browser_and_local_phases_overlap():
+    http_client = SlowHTTPClient()
+    agent = make_agent(http_client)
+
+    await agent.initialize()
+    try:
+        timings = agent.init_timings
+        assert agent.initialized
+        assert http_client.sessions_created == 1
+        assert agent.agent_executor is not None
+        assert timings["browser_ms"] >= PHASE_DELAY * 1000
+        assert timings["local_ms"] >= PHASE_DELAY * 1000
+        # 两个阶段并发执行，总耗时小于两者之和
+        assert timings["total_ms"] < timings["browser_ms"] + timings["local_ms"]
+        assert agent.get_session_info()["init_timings"] == timings
+    finally:
+        await agent.cleanup()
+
+
+async def test_unhealthy_server_fails_and_cleans_up():
+    http_client = SlowHTTPClient(healthy=False)
+    agent = make_agent(http_client)
+
+    with pytest.raises(RuntimeError, match="服务器不健康"):
+        await agent.initialize()
+
+    assert not agent.initialized
+    assert http_client.cleaned
+    assert http_client.sessions_created == 0
+
+
+async def test_local_failure_waits_for_browser_phase_before_cleanup():
+    http_client = SlowHTTPClient()
+    agent = make_agent(http_client, tools_error=ValueError("工具创建失败"))
+
+    with pytest.raises(RuntimeError, match="工具创建失败"):
+        await agent.initialize()
+
+    # 浏览器阶段完成了会话创建，随后才统一清理
+    assert http_client.sessions_created == 1
+    assert http_client.cleaned
+    assert not agent.initialized
+
+
+async def test_websocket_connects_in_background():
+    http_client = SlowHTTPClient()
+    agent = make_agent(http_client, enable_websocket=True)
+
+    await agent.initialize()
+    try:
+        # WebSocket 尚未连接时初始化已经完成
+        assert agent.initialized
+        assert not agent._websocket_task.done()
+        assert "websocket_ms" not in agent.init_timings
+
+        http_client.websocket_ready.set()
+        await agent._websocket_task
+        assert "websocket_ms" in agent.init_timings
+    finally:
+        await agent.cleanup()
+
+
+async def test_cleanup_cancels_pending_websocket_task():
+    http_client = SlowHTTPClient()
+    agent = make_agent(http_client, enable_websocket=True)
+
+    await agent.initialize()
+    task = agent._websocket_task
+    await agent.cleanup()
+
+    assert task.cancelled()
+    assert agent._websocket_task is None
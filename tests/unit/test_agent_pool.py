@@ -0,0 +1,93 @@
+"""AgentPool 单元测试"""
+
+import asyncio
+
+import pytest
+from agent_fakes import FakeHTTPClient, StreamingFakeChatModel
+
+from runner.agent.agent import MidsceneAgent
+from runner.agent.agent_pool import AgentPool, AgentPoolTimeout
+
+
+def fake_agent(connector):
+    """初始化时只创建（替身）浏览器会话，不连接真实服务和 LLM"""
+    agent = MidsceneAgent(deepseek_api_key="test", enable_websocket=False)
+    agent.http_client = FakeHTTPClient()
+
+    async def initialize(llm_source=None):
+        await agent._init_browser_session()
+        agent.tools = await agent._create_tools()
+        agent.llm = StreamingFakeChatModel(messages=iter([]))
+        agent.agent_executor = await agent._build_graph()
+        agent.initialized = True
+
+    agent.initialize = initialize
+    return agent
+
+
+@pytest.fixture
+async def pool():
+    pool = AgentPool(fake_agent, size=1, lease_timeout=0.05)
+    yield pool
+    await pool.close()
+
+
+async def test_release_recreates_browser_session(pool):
+    async with pool.agent() as agent:
+        first_session = agent.http_client.session_id
+        agent.memory.add_record(action="aiTap", params={}, result="ok", success=True)
+
+    async with pool.agent() as reused:
+        assert reused is agent
+        assert reused.http_client.session_id != first_session
+        assert reused.http_client.sessions_closed == 1
+        assert len(reused.memory.records) == 0
+
+    assert pool.get_stats()["created"] == 1
+
+
+async def test_failed_reset_discards_agent(pool):
+    agent = await pool.lease()
+
+    async def broken_session(config=None):
+        raise RuntimeError("浏览器启动失败")
+
+    agent.http_client.create_session = broken_session
+    await pool.release(agent)
+    await pool._wait_recycling()
+
+    assert pool.get_stats()["discarded"] == 1
+    assert pool.get_stats()["idle"] == 0
+    assert not agent.initialized
+
+
+async def test_lease_times_out_when_pool_is_full(pool):
+    async with pool.agent():
+        with pytest.raises(AgentPoolTimeout):
+            await pool.lease()
+    assert pool.get_stats()["timeouts"] == 1
+
+
+async def test_release_returns_before_reset(pool):
+    agent = await pool.lease()
+    gate = asyncio.Event()
+    create_session = agent.http_client.create_session
+
+    async def slow_session(config=None):
+        await gate.wait()
+        return await create_session(config)
+
+    agent.http_client.create_session = slow_session
+    await asyncio.wait_for(pool.release(agent), 0.01)
+    assert pool.get_stats()["in_use"] == 0
+
+    # 重置完成前名额仍被占用，lease() 等待而不是拿到未重置的智能体
+    waiting = asyncio.create_task(pool.lease(timeout=1))
+    await asyncio.sleep(0.01)
+    assert not waiting.done()
+
+    gate.set()
+    reused = await waiting
+    assert reused is agent
+    assert reused.http_client.sessions_closed == 1
+    await pool.release(reused)
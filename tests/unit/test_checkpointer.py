@@ -0,0 +1,131 @@
+"""检查点存储单元测试"""
+
+import operator
+from typing import Annotated, List, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+from runner.agent.checkpointer import BoundedMemorySaver, SQLiteCheckpointSaver
+
+
+class CounterState(TypedDict):
+    items: Annotated[List[int], operator.add]
+
+
+def build_graph(checkpointer):
+    graph = StateGraph(CounterState)
+    graph.add_node("step", lambda state: {"items": [len(state["items"])]})
+    graph.add_edge(START, "step")
+    graph.add_edge("step", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def run(graph, thread_id, times):
+    for _ in range(times):
+        graph.invoke({"items": []}, config(thread_id))
+
+
+def test_sqlite_keeps_last_checkpoints_per_thread(tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "ckpt.db"), keep_last=3)
+    graph = build_graph(saver)
+
+    run(graph, "a", 5)
+    run(graph, "b", 1)
+
+    checkpoints = list(saver.list(config("a")))
+    assert len(checkpoints) == 3
+    assert saver.compacted_checkpoints > 0
+    # 最新的检查点保留完整状态
+    assert graph.get_state(config("a")).values["items"] == [0, 1, 2, 3, 4]
+    assert saver.get_stats()["threads"] == 2
+    saver.close()
+
+
+def test_sqlite_restores_thread_after_reopen(tmp_path):
+    path = str(tmp_path / "ckpt.db")
+    saver = SQLiteCheckpointSaver(path)
+    run(build_graph(saver), "a", 2)
+    saver.close()
+
+    reopened = SQLiteCheckpointSaver(path)
+    graph = build_graph(reopened)
+    assert graph.get_state(config("a")).values["items"] == [0, 1]
+
+    run(graph, "a", 1)
+    assert graph.get_state(config("a")).values["items"] == [0, 1, 2]
+    reopened.close()
+
+
+def test_sqlite_delete_thread(tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "ckpt.db"))
+    graph = build_graph(saver)
+    run(graph, "a", 2)
+
+    saver.delete_thread("a")
+
+    assert saver.get_tuple(config("a")) is None
+    assert saver.get_stats()["pending_writes"] == 0
+    saver.close()
+
+
+async def test_sqlite_async_interface(tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "ckpt.db"))
+    graph = build_graph(saver)
+
+    await graph.ainvoke({"items": []}, config("a"))
+    await graph.ainvoke({"items": []}, config("a"))
+
+    state = await graph.aget_state(config("a"))
+    assert state.values["items"] == [0, 1]
+    saver.close()
+
+
+def test_bounded_saver_evicts_least_recently_used_thread():
+    saver = BoundedMemorySaver(max_threads=2, idle_ttl=None, max_bytes=None)
+    graph = build_graph(saver)
+
+    run(graph, "a", 1)
+    run(graph, "b", 1)
+    # 读取 a 使其成为最近访问的线程
+    graph.get_state(config("a"))
+    run(graph, "c", 1)
+
+    assert saver.get_tuple(config("b")) is None
+    assert graph.get_state(config("a")).values["items"] == [0]
+    assert saver.get_stats()["evictions_by_reason"]["count"] == 1
+
+
+def test_bounded_saver_evicts_idle_threads():
+    saver = BoundedMemorySaver(max_threads=None, idle_ttl=0, max_bytes=None)
+    graph = build_graph(saver)
+
+    run(graph, "a", 1)
+    run(graph, "b", 1)
+
+    # 正在写入的线程不会被淘汰
+    assert saver.get_tuple(config("a")) is None
+    assert graph.get_state(config("b")).values["items"] == [0]
+    assert saver.evictions_by_reason["ttl"] == 1
+
+
+def test_bounded_saver_tracks_bytes_and_memory_limit():
+    saver = BoundedMemorySaver(max_threads=None, idle_ttl=None, max_bytes=None)
+    graph = build_graph(saver)
+    run(graph, "a", 3)
+    per_thread = saver.total_bytes
+    assert per_thread > 0
+
+    saver.max_bytes = per_thread
+    run(graph, "b", 3)
+
+    assert saver.get_tuple(config("a")) is None
+    assert saver.evictions_by_reason["memory"] >= 1
+    assert saver.total_bytes <= per_thread * 1.5
+
+    saver.delete_thread("b")
+    assert saver.total_bytes == 0
+    assert saver.get_stats()["live_threads"] == 0
@@ -0,0 +1,165 @@
+"""快速通道意图识别单元测试"""
+
+import argparse
+
+import pytest
+from agent_fakes import FakeHTTPClient
+from langchain_core.messages import AIMessage
+
+from runner.executor.fast_path import FastPathRouter, IntentRecognizer, is_compound
+from runner.executor.plan_replay import PlanReplayer
+from runner.executor.text_executor import TextTestExecutor
+
+
+@pytest.fixture
+def recognizer():
+    return IntentRecognizer()
+
+
+@pytest.mark.parametrize(
+    "step, url",
+    [
+        ("导航到 https://example.com/login", "https://example.com/login"),
+        ("打开 example.com", "https://example.com"),
+        ("访问 https://example.com 并等待页面加载完成", "https://example.com"),
+    ],
+)
+def test_navigate(recognizer, step, url):
+    intent = recognizer.recognize(step)
+    assert intent.api == "navigate"
+    assert intent.params == {"url": url}
+
+
+def test_tap_and_input(recognizer):
+    assert recognizer.recognize("点击登录按钮。").params == {"locate": "登录按钮"}
+    # 引号内的动词是元素名称的一部分
+    assert recognizer.recognize("点击“选择文件”按钮").params == {
+        "locate": "“选择文件”按钮"
+    }
+
+    intent = recognizer.recognize('在搜索框中输入"耳机，蓝牙"')
+    assert intent.api == "aiInput"
+    assert intent.params == {"locate": "搜索框", "value": "耳机，蓝牙"}
+
+
+def test_unquoted_input(recognizer):
+    intent = recognizer.recognize("在搜索框输入 蓝牙耳机")
+    assert intent.api == "aiInput"
+    assert intent.params == {"locate": "搜索框", "value": "蓝牙耳机"}
+    assert recognizer.recognize("在输入框里输入 admin").params == {
+        "locate": "输入框",
+        "value": "admin",
+    }
+
+    # 不带引号时值里的逗号和动词无法与复合步骤区分，交给 LLM
+    assert recognizer.recognize("在搜索框输入 耳机，蓝牙") is None
+    assert recognizer.recognize("在搜索框输入 手机然后点击搜索") is None
+    assert recognizer.recognize("在搜索框输入") is None
+
+
+@pytest.mark.parametrize(
+    "step",
+    [
+        "点击搜索按钮等待结果出现",
+        "点击登录按钮然后输入密码",
+        "点击搜索按钮，等待结果出现",
+        "点击下一页。检查商品数量",
+        "点击第一个商品并验证价格",
+        "如果出现弹窗则点击关闭",
+        "验证页面标题包含首页",
+    ],
+)
+def test_compound_or_unknown_steps_fall_back(recognizer, step):
+    assert recognizer.recognize(step) is None
+
+
+def test_is_compound():
+    assert is_compound("点击搜索按钮等待结果出现")
+    assert not is_compound("点击搜索按钮")
+    assert not is_compound("点击输入框")
+    assert not is_compound('在输入框输入"然后，等待"')
+
+
+def test_custom_patterns_take_priority():
+    recognizer = IntentRecognizer(
+        [
+            {
+                "name": "login",
+                "pattern": r"^登录$",
+                "api": "aiTap",
+                "params": {"locate": "登录按钮"},
+            }
+        ]
+    )
+    assert recognizer.recognize("登录").name == "login"
+
+    with pytest.raises(ValueError):
+        IntentRecognizer([{"pattern": "^x$", "api": "aiQuery"}])
+
+
+async def test_router_executes_and_reports():
+    http = FakeHTTPClient()
+    router = FastPathRouter(http, IntentRecognizer())
+
+    assert (await router.try_execute("点击登录按钮")).name == "tap"
+    assert await router.try_execute("点击搜索按钮等待结果出现") is None
+
+    assert http.calls == [("aiTap", {"locate": "登录按钮"})]
+    report = router.get_report()
+    assert report["fast_path"] == 1
+    assert report["steps"] == 2
+
+
+async def test_fast_path_step_is_written_to_thread(make_agent):
+    agent = await make_agent([])
+    executor = TextTestExecutor({}, argparse.Namespace())
+    executor.agent = agent
+    executor.fast_path = FastPathRouter(agent.http_client, IntentRecognizer())
+
+    await executor._execute_ai_action("点击登录按钮")
+
+    snapshot = await agent.agent_executor.aget_state(
+        agent._thread_config(agent.session_id)
+    )
+    messages = snapshot.values["messages"]
+    assert [m.type for m in messages] == ["human", "ai", "tool", "ai"]
+    assert messages[1].tool_calls[0]["name"] == "midscene_aiTap"
+    assert messages[1].tool_calls[0]["args"] == {"locate": "登录按钮"}
+    assert snapshot.next == ()
+
+
+async def test_fast_path_navigate_updates_page_context(make_agent):
+    agent = await make_agent([])
+    executor = TextTestExecutor({}, argparse.Namespace())
+    executor.agent = agent
+    executor.fast_path = FastPathRouter(agent.http_client, IntentRecognizer())
+
+    await executor._execute_ai_action("打开 example.com/shop")
+    await executor._execute_ai_action("点击购物车")
+
+    assert agent.memory.page_context["url"] == "https://example.com/shop"
+    record = agent.memory.records[-1]
+    assert record.action == "aiTap"
+    assert record.context["url"] == "https://example.com/shop"
+
+
+async def test_steps_include_replayed_and_llm_steps(make_agent, tmp_path):
+    agent = await make_agent([AIMessage(content="已确认")])
+    args = argparse.Namespace(plan_replay=str(tmp_path / "plans.json"))
+    executor = TextTestExecutor({}, args)
+    executor.agent = agent
+    executor.plan_replayer = PlanReplayer(agent.http_client)
+    executor.fast_path = FastPathRouter(agent.http_client, IntentRecognizer())
+    executor.plan_store.record(
+        "点击登录", "https://example.com/", [{"name": "midscene_aiTap", "args": {}}]
+    )
+
+    await executor._execute_ai_action("点击登录")
+    await executor._execute_ai_action("点击注册")
+    await executor._execute_ai_action("确认页面显示欢迎信息")
+
+    report = executor.fast_path.get_report()
+    assert report["steps"] == 3
+    assert report["replayed"] == 1
+    assert report["fast_path"] == 1
+    assert report["fast_path_ratio"] == 1 / 3
@@ -0,0 +1,74 @@
+"""并发执行多个测试文件的单元测试"""
+
+import asyncio
+import logging
+
+from runner.executor.file_pool import run_files
+
+logger = logging.getLogger("test_file_pool")
+
+
+async def run_file(path, index):
+    for i in range(3):
+        print(f"{path} 第 {i} 行")
+        logger.warning(f"{path} 日志 {i}")
+        await asyncio.sleep(0)
+    if path == "missing.txt":
+        return {"file": path, "success": False, "error": "文件不存在"}
+    return {"file": path, "success": path != "bad.txt"}
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+async def test_buffered_output_is_grouped_per_file(capsys):
+    results = await run_files(["a.txt", "b.txt"], run_file, concurrency=2)
+
+    assert [r["file"] for r in results] == ["a.txt", "b.txt"]
+    assert all("duration" in r for r in results)
+    out = capsys.readouterr().out
+    for path in ("a.txt", "b.txt"):
+        lines = [line for line in out.splitlines() if line.startswith(path)]
+        start = out.splitlines().index(lines[0])
+        assert out.splitlines()[start : start + 3] == lines
+
+
+async def test_log_lines_are_prefixed_with_file_tag():
+    handler = ListHandler()
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        await run_files(["a.txt", "b.txt"], run_file, concurrency=2)
+        logger.warning("结束后")
+    finally:
+        root.removeHandler(handler)
+
+    assert "[1/2] a.txt 日志 0" in handler.lines
+    assert "[2/2] b.txt 日志 2" in handler.lines
+    # 执行结束后移除过滤器
+    assert handler.lines[-1] == "结束后"
+    assert handler.filters == []
+
+
+async def test_stops_after_error_unless_continue_on_error():
+    files = ["missing.txt", "a.txt", "b.txt"]
+
+    stopped = await run_files(files, run_file, concurrency=1)
+    assert [r["file"] for r in stopped] == ["missing.txt"]
+
+    all_results = await run_files(
+        files, run_file, concurrency=1, continue_on_error=True
+    )
+    assert [r["success"] for r in all_results] == [False, True, True]
+
+
+async def test_failed_tasks_do_not_stop_other_files():
+    # 与串行执行一致：文件中的任务失败不会停止后续文件，只有文件出错才会
+    results = await run_files(["bad.txt", "a.txt", "b.txt"], run_file, concurrency=1)
+    assert [r["success"] for r in results] == [False, True, True]
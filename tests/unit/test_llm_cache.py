@@ -0,0 +1,98 @@
+"""LLMResponseCache 单元测试"""
+
+from agent_fakes import ai_tool_calls, run_step, tool_call
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from runner.agent.llm_cache import LLMResponseCache, strip_volatile_fields
+
+TOOLS = [{"type": "function", "function": {"name": "midscene_aiTap"}}]
+
+
+def test_make_key_ignores_message_and_tool_call_ids():
+    first = [
+        HumanMessage(content="点击登录", id="a"),
+        AIMessage(
+            content="",
+            tool_calls=[tool_call("midscene_aiTap", {"locate": "登录"}, 1)],
+            id="b",
+        ),
+        ToolMessage(content="ok", tool_call_id="call_1"),
+    ]
+    second = [
+        HumanMessage(content="点击登录", id="c"),
+        AIMessage(
+            content="",
+            tool_calls=[tool_call("midscene_aiTap", {"locate": "登录"}, 2)],
+            id="d",
+        ),
+        ToolMessage(content="ok", tool_call_id="call_2"),
+    ]
+
+    assert LLMResponseCache.make_key(first, TOOLS, "m") == LLMResponseCache.make_key(
+        second, TOOLS, "m"
+    )
+
+
+def test_make_key_depends_on_content_tools_and_model():
+    messages = [HumanMessage(content="点击登录")]
+    key = LLMResponseCache.make_key(messages, TOOLS, "m")
+
+    assert key != LLMResponseCache.make_key(
+        [HumanMessage(content="点击注册")], TOOLS, "m"
+    )
+    assert key != LLMResponseCache.make_key(messages, [], "m")
+    assert key != LLMResponseCache.make_key(messages, TOOLS, "other")
+
+
+def test_strip_volatile_fields():
+    result = {"success": True, "result": {"a": 1}, "timestamp": 1.5, "duration": 12}
+    assert strip_volatile_fields(result) == {"success": True, "result": {"a": 1}}
+    assert strip_volatile_fields("text") == "text"
+    plain = {"success": True}
+    assert strip_volatile_fields(plain) is plain
+
+
+def test_put_get_roundtrip_regenerates_tool_call_ids(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"))
+    response = ai_tool_calls(tool_call("midscene_aiTap", {"locate": "登录"}, 7))
+
+    cache.put("k", "m", response)
+    cached = cache.get("k")
+
+    assert cached.tool_calls[0]["name"] == "midscene_aiTap"
+    assert cached.tool_calls[0]["args"] == {"locate": "登录"}
+    assert cached.tool_calls[0]["id"] != "call_7"
+    assert cache.get("missing") is None
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+    cache.close()
+
+
+def test_evicts_over_capacity(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"), max_entries=2)
+    for i in range(4):
+        cache.put(f"k{i}", "m", AIMessage(content=str(i)))
+
+    assert cache.evict() == 2
+    assert cache.get_stats()["entries"] == 2
+    cache.close()
+
+
+async def test_identical_runs_with_query_tools_hit_cache(make_agent, tmp_path):
+    """两次相同的运行（查询结果中的时间戳和耗时不同）得到相同的缓存键"""
+    path = str(tmp_path / "cache.db")
+    responses = [
+        ai_tool_calls(tool_call("midscene_aiQuery", {"dataDemand": "标题"}, 0)),
+        ai_tool_calls(tool_call("midscene_aiTap", {"locate": "登录"}, 1)),
+        AIMessage(content="完成"),
+    ]
+
+    first = await make_agent(responses, llm_cache_path=path)
+    await run_step(first, "读取标题后点击登录", thread_id="t")
+    assert first.llm_cache.stores == 3
+
+    # 第二次运行的所有 LLM 调用都应命中缓存；模型没有预设响应，被调用会报错
+    second = await make_agent([], llm_cache_path=path)
+    await run_step(second, "读取标题后点击登录", thread_id="t")
+    assert second.llm_cache.hits == 3
+    assert second.llm_cache.misses == 0
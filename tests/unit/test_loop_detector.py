@@ -0,0 +1,99 @@
+"""LoopDetector 单元测试"""
+
+from agent_fakes import ai_tool_calls, run_step, tool_call
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from runner.agent.loop_detector import (
+    LOOP_HINT_KEY,
+    LOOP_OSCILLATION,
+    LOOP_REPEAT,
+    LoopDetector,
+)
+from runner.agent.memory.simple_memory import SimpleMemory
+
+
+def history(*calls, hint_at=None):
+    """构造当前步骤的消息历史：每个元素是一批工具调用 (name, args)"""
+    messages = [HumanMessage(content="步骤")]
+    for i, (name, args) in enumerate(calls):
+        message = ai_tool_calls(tool_call(name, args, i))
+        if i == hint_at:
+            message.response_metadata[LOOP_HINT_KEY] = LOOP_REPEAT
+        messages += [message, ToolMessage(content="ok", tool_call_id=f"call_{i}")]
+    return messages
+
+
+TAP = ("midscene_aiTap", {"locate": "登录按钮"})
+
+
+def test_identical_calls_are_a_repeat():
+    detector = LoopDetector(SimpleMemory())
+
+    assert detector.check(history(TAP, TAP)) is None
+    verdict = detector.check(history(TAP, TAP, TAP))
+    assert verdict.kind == LOOP_REPEAT
+    assert verdict.action == "hint"
+
+
+def test_hint_resets_count_then_stops():
+    detector = LoopDetector(SimpleMemory(), max_hints=1)
+
+    assert detector.check(history(TAP, TAP, TAP, TAP, hint_at=2)) is None
+    verdict = detector.check(history(TAP, TAP, TAP, TAP, TAP, hint_at=2))
+    assert verdict.action == "stop"
+    assert detector.get_stats()["stops"] == 1
+
+
+def test_progress_is_not_a_loop():
+    detector = LoopDetector(SimpleMemory(), similarity_threshold=0.8)
+    pages = [
+        ("midscene_navigate", {"url": f"https://example.com/list/page/{i}"})
+        for i in range(1, 4)
+    ]
+    scroll = ("midscene_aiScroll", {"direction": "down"})
+
+    assert detector.check(history(*pages)) is None
+    assert detector.check(history(scroll, scroll, scroll, scroll)) is None
+
+
+def test_similarity_is_opt_in():
+    wordings = [
+        ("midscene_aiTap", {"locate": "登录按钮"}),
+        ("midscene_aiTap", {"locate": "点击登录按钮"}),
+        ("midscene_aiTap", {"locate": "登录按钮"}),
+    ]
+
+    assert LoopDetector(SimpleMemory()).check(history(*wordings)) is None
+    verdict = LoopDetector(SimpleMemory(), similarity_threshold=0.8).check(
+        history(*wordings)
+    )
+    assert verdict.kind == LOOP_REPEAT
+
+
+def test_oscillation():
+    other = ("midscene_aiTap", {"locate": "取消按钮"})
+    verdict = LoopDetector(SimpleMemory()).check(history(TAP, other, TAP, other))
+    assert verdict.kind == LOOP_OSCILLATION
+
+
+def test_hint_is_deterministic():
+    memory = SimpleMemory()
+    memory.add_record(action="aiTap", params=TAP[1], result="ok", success=True)
+    detector = LoopDetector(memory)
+
+    first = detector.check(history(TAP, TAP, TAP)).hint
+    memory.records[-1].timestamp -= 60
+    assert detector.check(history(TAP, TAP, TAP)).hint == first
+    assert "aiTap 已执行过，结果成功" in first
+
+
+async def test_loop_stopped_step_is_reported_as_failed(make_agent):
+    tap = tool_call(*TAP)
+    agent = await make_agent([ai_tool_calls(tap) for _ in range(6)])
+
+    events = await run_step(agent, "点击登录", thread_id="t")
+
+    assert any("error" in event for event in events)
+    assert agent.memory.records[-1].action == "execute"
+    assert not agent.memory.records[-1].success
+    assert agent.loop_detector.get_stats()["stops"] == 1
@@ -0,0 +1,94 @@
+"""SimpleMemory 上下文渲染缓存单元测试"""
+
+from runner.agent.memory.simple_memory import SimpleMemory
+
+RESULTS = [{"success": True, "text": "页面内容"}, "已点击", None, {"items": [1, 2]}]
+
+
+def reference_context(memory, limit):
+    """逐条渲染最近记录（缓存前的实现），用于逐字节比对"""
+    recent = memory.get_recent_actions(limit)
+    if not recent:
+        return "无历史操作记录"
+    lines = ["=== 最近操作历史 ==="]
+    for record in recent:
+        status = "✅" if record.success else "❌"
+        lines.append(
+            f"{status} [{record.action}] "
+            f"参数: {record.params}, "
+            f"结果: {memory._format_result(record.result)}, "
+            f"页面: {record.context.get('url', 'unknown')}"
+        )
+    return "\n".join(lines)
+
+
+def fill(memory, count, start=0):
+    for i in range(start, start + count):
+        if i % 3 == 0:
+            memory.update_context({"url": f"https://example.com/{i}"})
+        memory.add_record(
+            "tap" if i % 2 else "query",
+            {"locate": f"按钮{i}"},
+            RESULTS[i % len(RESULTS)],
+            success=i % 5 != 0,
+        )
+
+
+def assert_matches_reference(memory):
+    for limit in (1, 3, 5, 20):
+        assert memory.get_recent_context(limit) == reference_context(memory, limit)
+
+
+def test_context_matches_uncached_rendering():
+    memory = SimpleMemory(max_size=6)
+    assert memory.get_recent_context() == "无历史操作记录"
+
+    fill(memory, 4)
+    assert_matches_reference(memory)
+
+    # 淘汰最旧的记录后，缓存的行同步移除
+    fill(memory, 7, start=4)
+    assert_matches_reference(memory)
+    assert len(memory._lines) == len(memory.records)
+
+
+def test_repeated_calls_return_identical_string():
+    memory = SimpleMemory()
+    fill(memory, 5)
+
+    first = memory.get_recent_context(5)
+    assert memory.get_recent_context(5) is first
+
+    # 不同的 limit 重新拼接
+    assert memory.get_recent_context(2) != first
+
+    memory.add_record("tap", {"locate": "新按钮"}, "已点击")
+    updated = memory.get_recent_context(5)
+    assert updated != first
+    assert updated.endswith("结果: 已点击, 页面: https://example.com/3")
+
+
+def test_page_change_does_not_rewrite_older_lines():
+    memory = SimpleMemory()
+    memory.update_context({"url": "https://example.com/a"})
+    memory.add_record("tap", {"locate": "登录"}, "ok")
+    before = memory.get_recent_context()
+
+    memory.update_context({"url": "https://example.com/b"})
+    assert memory.get_recent_context() == before
+
+
+def test_clear_and_restore_keep_bytes_stable():
+    memory = SimpleMemory(max_size=5)
+    fill(memory, 8)
+    expected = memory.get_recent_context(5)
+
+    restored = SimpleMemory(max_size=5)
+    restored.from_dict(memory.to_dict())
+    assert restored.get_recent_context(5) == expected
+
+    memory.clear()
+    assert memory.get_recent_context(5) == "无历史操作记录"
+    assert memory._lines == {}
+    fill(memory, 8)
+    assert memory.get_recent_context(5) == expected
@@ -0,0 +1,115 @@
+"""SimpleMemory 过期清理单元测试"""
+
+import asyncio
+import time
+
+from agent_fakes import FakeHTTPClient
+
+from runner.agent.agent import MidsceneAgent
+from runner.agent.memory.persistent_store import PersistentMemoryStore
+from runner.agent.memory.simple_memory import SimpleMemory
+
+
+class CountingMemory(SimpleMemory):
+    """统计 _uncount 调用次数的记忆"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.uncounted = 0
+
+    def _uncount(self, record):
+        self.uncounted += 1
+        super()._uncount(record)
+
+
+def fill(memory, ages):
+    """按时间顺序添加记录，ages 为各记录距今的秒数（从旧到新）"""
+    now = time.time()
+    for i, age in enumerate(ages):
+        memory.add_record("tap" if i % 2 else "query", {"index": i}, "ok")
+        memory.records[-1].timestamp = now - age
+
+
+def test_cleanup_touches_only_expired_records():
+    memory = CountingMemory(max_size=1000)
+    fill(memory, [500 - i for i in range(500)])
+
+    removed = memory.cleanup_old_records(max_age=100.5)
+
+    assert removed == 400
+    assert memory.uncounted == 400
+    assert len(memory.records) == 100
+    assert memory.records[0].params == {"index": 400}
+    assert memory.get_stats()["action_counts"] == {"query": 50, "tap": 50}
+    assert memory.find_similar_action("tap", {"index": 1}, time_window=1000) is None
+
+    # 没有过期记录时不处理任何记录
+    assert memory.cleanup_old_records(max_age=100.5) == 0
+    assert memory.uncounted == 400
+
+
+def test_cleanup_everything():
+    memory = SimpleMemory()
+    fill(memory, [30, 20, 10])
+
+    assert memory.cleanup_old_records(max_age=5) == 3
+    assert len(memory.records) == 0
+    assert memory.get_recent_context() == "无历史操作记录"
+
+
+def test_loaded_records_keep_time_order(tmp_path):
+    path = str(tmp_path / "memory.db")
+    previous = SimpleMemory(store=PersistentMemoryStore(path))
+    previous.add_record("aiTap", {"locate": "旧按钮"}, "ok")
+    previous.store.close()
+
+    memory = SimpleMemory(store=PersistentMemoryStore(path))
+    memory.add_record("aiTap", {"locate": "新按钮"}, "ok")
+    assert memory.load_from_store() == 1
+
+    timestamps = [record.timestamp for record in memory.records]
+    assert timestamps == sorted(timestamps)
+    assert [r.params["locate"] for r in memory.records] == ["旧按钮", "新按钮"]
+
+    # 旧记录过期后从最旧的一端被清理
+    memory.records[0].timestamp = time.time() - 3600
+    assert memory.cleanup_old_records(max_age=60) == 1
+    assert [r.params["locate"] for r in memory.records] == ["新按钮"]
+    memory.store.close()
+
+
+async def test_background_expiry_task():
+    memory = SimpleMemory()
+    fill(memory, [3600, 0])
+
+    task = memory.start_expiry(max_age=60, interval=0.01)
+    await asyncio.sleep(0.05)
+
+    assert [record.params["index"] for record in memory.records] == [1]
+    assert not task.done()
+
+    # 重复启动会替换已有任务
+    replacement = memory.start_expiry(max_age=60, interval=0.01)
+    await asyncio.sleep(0)
+    assert task.cancelled()
+
+    memory.stop_expiry()
+    await asyncio.gather(replacement, return_exceptions=True)
+    assert replacement.cancelled()
+    assert memory._expiry_task is None
+
+
+async def test_agent_runs_expiry_between_initialize_and_cleanup():
+    agent = MidsceneAgent(
+        deepseek_api_key="test", enable_websocket=False, memory_max_age=600
+    )
+    agent.http_client = FakeHTTPClient()
+
+    await agent.initialize()
+    task = agent.memory._expiry_task
+    assert task is not None and not task.done()
+
+    await agent.cleanup()
+    await asyncio.gather(task, return_exceptions=True)
+    assert task.cancelled()
+    assert agent.memory._expiry_task is None
@@ -0,0 +1,71 @@
+"""SimpleMemory 参数指纹索引单元测试"""
+
+import time
+
+from runner.agent.memory.simple_memory import SimpleMemory, param_fingerprint
+
+
+def test_param_fingerprint_ignores_key_order():
+    assert param_fingerprint({"a": 1, "b": "登录"}) == param_fingerprint(
+        {"b": "登录", "a": 1}
+    )
+    assert param_fingerprint({"a": 1}) != param_fingerprint({"a": 2})
+    # 无法排序的键退化为 repr，不抛出异常
+    assert param_fingerprint({1: "x", "a": "y"})
+
+
+def test_fingerprint_is_computed_once_on_add():
+    memory = SimpleMemory()
+    memory.add_record("tap", {"locate": "登录", "index": 0}, "ok")
+
+    assert memory.records[0].fingerprint == param_fingerprint(
+        {"index": 0, "locate": "登录"}
+    )
+
+
+def test_find_similar_action_returns_newest_match():
+    memory = SimpleMemory()
+    memory.add_record("tap", {"locate": "登录"}, "first")
+    memory.add_record("tap", {"locate": "注册"}, "other")
+    memory.add_record("input", {"locate": "登录"}, "other action")
+    memory.add_record("tap", {"locate": "登录"}, "second")
+
+    record = memory.find_similar_action("tap", {"locate": "登录"})
+
+    assert record is memory.records[3]
+    assert memory.find_similar_action("tap", {"locate": "不存在"}) is None
+    assert memory.find_similar_action("hover", {"locate": "登录"}) is None
+
+
+def test_find_similar_action_respects_time_window():
+    memory = SimpleMemory()
+    memory.add_record("tap", {"locate": "登录"}, "ok")
+    memory.records[-1].timestamp = time.time() - 600
+
+    assert memory.find_similar_action("tap", {"locate": "登录"}) is None
+    assert memory.find_similar_action("tap", {"locate": "登录"}, time_window=900)
+
+
+def test_index_follows_evictions():
+    memory = SimpleMemory(max_size=2)
+    memory.add_record("tap", {"locate": "登录"}, "ok")
+    memory.add_record("tap", {"locate": "注册"}, "ok")
+    memory.add_record("tap", {"locate": "退出"}, "ok")
+
+    assert memory.find_similar_action("tap", {"locate": "登录"}) is None
+    assert memory.find_similar_action("tap", {"locate": "注册"}) is not None
+    assert ("tap", param_fingerprint({"locate": "登录"})) not in memory._index
+
+    memory.clear()
+    assert memory._index == {}
+    assert memory.find_similar_action("tap", {"locate": "退出"}) is None
+
+
+def test_restored_records_are_indexed():
+    source = SimpleMemory()
+    source.add_record("tap", {"locate": "登录"}, "ok")
+
+    memory = SimpleMemory()
+    memory.from_dict(source.to_dict())
+
+    assert memory.find_similar_action("tap", {"locate": "登录"}) is memory.records[0]
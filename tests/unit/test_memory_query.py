@@ -0,0 +1,108 @@
+"""SimpleMemory 范围查询单元测试"""
+
+import itertools
+import time
+
+from langchain_core.messages import HumanMessage
+
+from runner.agent.memory.simple_memory import SimpleMemory
+from runner.agent.model_router import ROUTE_STRONG, ModelRouter
+
+URLS = ["https://example.com/a", "https://example.com/b", "https://example.com/c"]
+ACTIONS = ["aiTap", "aiInput", "aiQuery"]
+NOW = time.time()
+
+
+def build_memory(count=60, max_size=100):
+    """按时间顺序添加记录，第 i 条记录的时间戳为 NOW - (count - i)"""
+    memory = SimpleMemory(max_size=max_size)
+    for i in range(count):
+        memory.update_context({"url": URLS[i % 3]})
+        memory.add_record(ACTIONS[(i // 3) % 3], {"index": i}, "ok", success=i % 4 != 0)
+        memory.records[-1].timestamp = NOW - (count - i)
+    return memory
+
+
+def brute_force(memory, action=None, url=None, success=None, since=None, until=None):
+    return [
+        r
+        for r in memory.records
+        if (action is None or r.action == action)
+        and (url is None or r.context.get("url") == url)
+        and (success is None or r.success == success)
+        and (since is None or r.timestamp >= since)
+        and (until is None or r.timestamp <= until)
+    ]
+
+
+def test_query_matches_full_scan():
+    memory = build_memory()
+    combos = itertools.product(
+        [None, *ACTIONS],
+        [None, *URLS],
+        [None, True, False],
+        [None, NOW - 30],
+        [None, NOW - 10],
+    )
+    for action, url, success, since, until in combos:
+        expected = brute_force(memory, action, url, success, since, until)
+        result = memory.query_records(
+            action=action, url=url, success=success, since=since, until=until
+        )
+        assert result == expected, (action, url, success, since, until)
+
+
+def test_query_limit_returns_newest_in_time_order():
+    memory = build_memory()
+
+    result = memory.query_records(url=URLS[0], limit=3)
+
+    assert [r.params["index"] for r in result] == [51, 54, 57]
+    assert memory.query_records(limit=0) == []
+    assert memory.query_records(action="missing") == []
+
+
+def test_failures_in_time_window():
+    memory = build_memory()
+
+    result = memory.query_records(url=URLS[0], success=False, since=NOW - 20)
+
+    assert [r.params["index"] for r in result] == [48]
+    assert all(not r.success for r in result)
+
+
+def test_buckets_follow_evictions():
+    memory = build_memory(count=60, max_size=10)
+
+    assert memory.query_records() == list(memory.records)
+    assert memory.query_records(success=False) == brute_force(memory, success=False)
+    for action in ACTIONS:
+        assert memory.get_action_history(action) == brute_force(memory, action=action)
+    assert sum(len(b) for b in memory._by_url.values()) == 10
+    assert sum(len(b) for b in memory._by_action.values()) == 10
+
+    memory.clear()
+    assert memory.query_records(url=URLS[0]) == []
+    assert memory.get_stats()["failed_records"] == 0
+
+
+def test_page_history_without_store():
+    memory = build_memory()
+
+    history = memory.get_page_history(URLS[1], limit=2)
+    assert [r.params["index"] for r in history] == [55, 58]
+    assert all(r.success for r in history)
+
+    everything = memory.get_page_history(URLS[1], limit=100, successful_only=False)
+    assert everything == brute_force(memory, url=URLS[1])
+
+
+def test_router_sees_failures_beyond_last_ten_actions():
+    memory = SimpleMemory()
+    memory.add_record("aiTap", {"locate": "登录"}, "找不到元素", success=False)
+    for i in range(20):
+        memory.add_record("aiTap", {"index": i}, "ok")
+    router = ModelRouter(memory, "deepseek-fast", "deepseek-chat")
+
+    assert router.choose([HumanMessage(content="点击登录按钮")]) == ROUTE_STRONG
+    assert router.reasons == {"recent_failures": 1}
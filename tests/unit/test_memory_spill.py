@@ -0,0 +1,143 @@
+"""记忆大结果落盘单元测试"""
+
+import os
+import sqlite3
+
+import pytest
+from agent_fakes import FakeHTTPClient, ai_tool_calls, run_step, tool_call
+from langchain_core.messages import AIMessage
+
+from runner.agent.memory.persistent_store import PersistentMemoryStore
+from runner.agent.memory.simple_memory import SimpleMemory
+
+LARGE = {"items": ["商品" * 20 for _ in range(200)]}
+
+
+def add_large(memory):
+    memory.add_record(action="aiQuery", params={"dataDemand": "列表"}, result=LARGE)
+    return memory.records[-1]
+
+
+@pytest.mark.parametrize("spill_dir", ["spill/", "spill", "./spill/../spill"])
+def test_spill_files_are_removed_on_eviction(tmp_path, monkeypatch, spill_dir):
+    # 相对路径和末尾带分隔符的目录都能正确识别自己的落盘文件
+    monkeypatch.chdir(tmp_path)
+    memory = SimpleMemory(max_size=1, max_result_bytes=256, spill_dir=spill_dir)
+
+    record = add_large(memory)
+    assert os.path.isabs(record.spill_path)
+    assert memory.load_full_result(record) == LARGE
+
+    add_large(memory)
+    assert not os.path.exists(record.spill_path)
+    assert len(os.listdir(tmp_path / "spill")) == 1
+
+    memory.clear()
+    assert os.listdir(tmp_path / "spill") == []
+
+
+def test_foreign_spill_files_are_kept(tmp_path):
+    memory = SimpleMemory(max_result_bytes=256, spill_dir=str(tmp_path / "mine"))
+    record = add_large(memory)
+    foreign = tmp_path / "other.json"
+    foreign.write_text("{}")
+    record.spill_path = str(foreign)
+
+    memory.clear()
+
+    assert foreign.exists()
+
+
+def test_store_owns_spill_files(tmp_path):
+    """配置了持久化存储时，缓冲区淘汰和 clear() 不删除其他进程可能加载的文件"""
+    path = str(tmp_path / "memory.db")
+    memory = SimpleMemory(
+        max_size=1,
+        max_result_bytes=256,
+        spill_dir=str(tmp_path / "spill"),
+        store=PersistentMemoryStore(path),
+    )
+    first = add_large(memory)
+    add_large(memory)
+    memory.clear()
+    assert os.path.exists(first.spill_path)
+
+    other = SimpleMemory(max_result_bytes=256, store=PersistentMemoryStore(path))
+    assert other.load_from_store() == 2
+    assert other.load_full_result(other.records[0]) == LARGE
+
+    # 存储淘汰记录时删除对应的文件
+    other.store.max_records = 1
+    assert other.store.evict() == 1
+    assert not os.path.exists(first.spill_path)
+    assert len(os.listdir(tmp_path / "spill")) == 1
+
+    other.store.clear()
+    assert os.listdir(tmp_path / "spill") == []
+    memory.store.close()
+    other.store.close()
+
+
+def test_store_adds_spill_column_to_old_database(tmp_path):
+    path = str(tmp_path / "memory.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE memory_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp REAL NOT NULL,
+            pid INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            url TEXT NOT NULL,
+            success INTEGER NOT NULL,
+            record TEXT NOT NULL
+        )
+        """)
+    conn.close()
+
+    memory = SimpleMemory(
+        max_result_bytes=256,
+        spill_dir=str(tmp_path / "spill"),
+        store=PersistentMemoryStore(path),
+    )
+    record = add_large(memory)
+    memory.store.clear()
+
+    assert not os.path.exists(record.spill_path)
+    memory.store.close()
+
+
+class LongResultHTTPClient(FakeHTTPClient):
+    """查询结果很长的 HTTP 客户端替身"""
+
+    async def execute_query(self, query, params=None):
+        self.calls.append((query, params))
+        return {"success": True, "result": {"text": "商品" * 5000}}
+
+
+async def test_agent_spill_survives_pool_reset(make_agent, tmp_path):
+    path = str(tmp_path / "memory.db")
+    query = tool_call("midscene_aiQuery", {"dataDemand": "页面文字"})
+    agent = await make_agent(
+        [ai_tool_calls(query), AIMessage(content="完成")],
+        memory_store_path=path,
+        memory_spill_dir=str(tmp_path / "spill"),
+    )
+    agent.http_client = LongResultHTTPClient()
+
+    await run_step(agent, "读取页面文字")
+    (record,) = [r for r in agent.memory.records if r.action == "aiQuery"]
+    assert record.spill_path is not None
+
+    # 智能体池归还时清空记忆，落盘文件仍被持久化存储中的记录引用
+    agent.memory.clear()
+    assert os.path.exists(record.spill_path)
+
+    other = SimpleMemory(store=PersistentMemoryStore(path))
+    other.load_from_store()
+    (loaded,) = [r for r in other.records if r.action == "aiQuery"]
+    assert other.load_full_result(loaded) == {
+        "success": True,
+        "result": {"text": "商品" * 5000},
+    }
+    other.store.close()
@@ -0,0 +1,104 @@
+"""MessageCompactor 单元测试"""
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from runner.agent.memory.message_compactor import (
+    MessageCompactor,
+    estimate_tokens,
+    message_tokens,
+)
+
+SYSTEM_PROMPT = "你是一个网页自动化助手。" * 20
+
+
+def make_turn(index: int, result_size: int = 2000):
+    call_id = f"call_{index}"
+    return [
+        HumanMessage(content=f"{SYSTEM_PROMPT}\n\n任务 {index}: 点击按钮{index}"),
+        AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": "midscene_aiTap",
+                    "args": {"locate": f"按钮{index}"},
+                    "id": call_id,
+                    "type": "tool_call",
+                }
+            ],
+        ),
+        ToolMessage(content="x" * result_size, tool_call_id=call_id),
+        AIMessage(content=f"完成 {index}"),
+    ]
+
+
+def make_thread(turns: int, result_size: int = 2000):
+    messages = []
+    for index in range(turns):
+        messages.extend(make_turn(index, result_size))
+    return messages
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("点击按钮") == 4
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_message_tokens_includes_tool_call_args():
+    plain = AIMessage(content="")
+    with_call = make_turn(0)[1]
+    assert message_tokens(with_call) > message_tokens(plain)
+
+
+def test_under_budget_returns_same_list():
+    compactor = MessageCompactor(token_budget=10**6)
+    messages = make_thread(3)
+    assert compactor.compact(messages) is messages
+    assert compactor.compaction_count == 0
+
+
+def test_over_budget_keeps_prefix_and_recent_turns():
+    compactor = MessageCompactor(
+        token_budget=2000, keep_recent_turns=2, stable_prefix=SYSTEM_PROMPT
+    )
+    messages = make_thread(10, result_size=500)
+
+    compacted = compactor.compact(messages)
+
+    # 稳定前缀保持原样，便于命中提示缓存
+    assert compacted[0] is messages[0]
+    # 旧轮次被合并为一条摘要
+    assert isinstance(compacted[1], AIMessage)
+    assert "早期对话摘要" in compacted[1].content
+    assert "midscene_aiTap(locate=按钮1)" in compacted[1].content
+    # 最近的轮次原样保留（去掉重复的系统提示）
+    assert compacted[-1].content == "完成 9"
+    assert compacted[-4].content == "任务 9: 点击按钮9"
+    assert sum(message_tokens(m) for m in compacted) <= 2000
+    assert compactor.compaction_count == 1
+    assert compactor.tokens_saved > 0
+
+
+def test_truncates_tool_results_when_still_over_budget():
+    compactor = MessageCompactor(
+        token_budget=600, keep_recent_turns=1, max_tool_result_chars=100
+    )
+    messages = make_thread(3, result_size=5000)
+
+    compacted = compactor.compact(messages)
+
+    tool_messages = [m for m in compacted if isinstance(m, ToolMessage)]
+    assert tool_messages
+    assert all("已截断" in m.content for m in tool_messages)
+    assert all(len(m.content) < 200 for m in tool_messages)
+
+
+def test_compaction_does_not_modify_input():
+    compactor = MessageCompactor(token_budget=500, stable_prefix=SYSTEM_PROMPT)
+    messages = make_thread(5)
+    snapshot = [m.content for m in messages]
+
+    compactor.compact(messages)
+
+    assert [m.content for m in messages] == snapshot
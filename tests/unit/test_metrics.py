@@ -0,0 +1,92 @@
+"""AgentMetrics 单元测试"""
+
+import time
+
+from agent_fakes import ai_tool_calls, tool_call
+from langchain_core.messages import AIMessage
+
+from runner.agent.metrics import AgentMetrics, PhaseMetrics, TimingStats
+
+
+def test_timing_stats():
+    stats = TimingStats()
+    stats.add(10)
+    stats.add(30)
+    assert stats.to_dict() == {
+        "count": 2,
+        "total_ms": 40.0,
+        "avg_ms": 20.0,
+        "max_ms": 30.0,
+    }
+
+
+def test_tool_wall_time_merges_overlapping_intervals():
+    phase = PhaseMetrics()
+    phase.add_tool_interval(0.0, 0.1)
+    phase.add_tool_interval(0.05, 0.15)
+    phase.add_tool_interval(0.3, 0.4)
+
+    assert round(phase.tool_wall_ms()) == 250
+
+
+def test_overhead_is_not_hidden_by_concurrent_tool_calls():
+    metrics = AgentMetrics()
+    metrics.start_run()
+    time.sleep(0.1)
+    now = time.perf_counter()
+    # 两个并发的 80ms 查询：延迟之和 160ms 超过墙钟时间，但只占用 80ms
+    for name in ("midscene_aiQuery", "midscene_aiString"):
+        metrics.record_tool_call(name, 80, started_at=now - 0.08)
+
+    summary = metrics.end_run()
+
+    assert summary["tools"]["latency"]["total_ms"] == 160
+    assert 79 <= summary["tools"]["wall_ms"] <= 81
+    assert summary["overhead_ms"] >= 10
+    assert summary["overhead_ms"] <= summary["wall_ms"] - 79
+
+
+def test_overhead_is_clamped_at_zero():
+    metrics = AgentMetrics()
+    metrics.start_run()
+    metrics.record_llm_call(10_000)
+
+    assert metrics.end_run()["overhead_ms"] == 0.0
+
+
+def test_session_and_run_accounting():
+    metrics = AgentMetrics()
+    metrics.record_llm_call(5, usage={"input_tokens": 7, "output_tokens": 3})
+    metrics.start_run()
+    metrics.record_llm_call(10, ttft_ms=2, usage={"input_tokens": 100})
+    metrics.record_llm_call(0.1, cached=True)
+    metrics.record_tool_call("midscene_aiTap", 20, server_ms=15, success=False)
+    run = metrics.end_run()
+
+    assert run["llm"]["calls"] == 2
+    assert run["llm"]["cache_hits"] == 1
+    assert run["llm"]["prompt_tokens"] == 100
+    assert run["tools"]["failures"] == 1
+    assert run["tools"]["network"]["total_ms"] == 5.0
+
+    session = metrics.get_stats()
+    assert session["runs"] == 1
+    assert session["llm"]["calls"] == 3
+    assert session["llm"]["prompt_tokens"] == 107
+    # 会话统计包含空闲时间，不计算墙钟时间，也不保留工具区间
+    assert "wall_ms" not in session
+    assert metrics.session._tool_intervals == []
+
+
+async def test_run_ends_when_caller_stops_early(make_agent):
+    tap = tool_call("midscene_aiTap", {"locate": "登录按钮"})
+    agent = await make_agent([ai_tool_calls(tap), AIMessage(content="完成")])
+
+    stream = agent.execute("点击登录按钮")
+    async for _ in stream:
+        break
+    await stream.aclose()
+
+    # 提前结束的执行不会留下进行中的统计，之后的调用不会计入它
+    assert agent.metrics._current.get() is None
+    assert agent.metrics.runs == 1
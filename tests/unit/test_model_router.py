@@ -0,0 +1,129 @@
+"""模型路由单元测试"""
+
+import time
+
+from agent_fakes import StreamingFakeChatModel, ai_tool_calls, run_step, tool_call
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from runner.agent.memory.simple_memory import SimpleMemory
+from runner.agent.model_router import ROUTE_FAST, ROUTE_STRONG, ModelRouter
+
+TAP = tool_call("midscene_aiTap", {"locate": "登录按钮"})
+
+
+def make_router(**kwargs):
+    return ModelRouter(SimpleMemory(), "deepseek-fast", "deepseek-chat", **kwargs)
+
+
+def step_messages(step):
+    # 用户消息由系统提示、记忆上下文和指令以空行拼接而成
+    return [HumanMessage(content=f"你是浏览器自动化助手\n\n最近的操作：无\n\n{step}")]
+
+
+def test_simple_step_uses_fast_model():
+    router = make_router()
+
+    assert router.choose(step_messages("点击登录按钮")) == ROUTE_FAST
+    assert router.choose(step_messages("在用户名框输入 'admin'")) == ROUTE_FAST
+    # 末尾的句号不是步骤分隔
+    assert router.choose(step_messages("点击登录按钮。")) == ROUTE_FAST
+    assert router.model_for(ROUTE_FAST) == "deepseek-fast"
+    assert router.get_stats()["reasons"] == {"simple_step": 3}
+
+
+def test_complex_steps_use_strong_model():
+    router = make_router(max_simple_chars=20)
+
+    assert router.choose(step_messages("点击登录然后输入密码")) == ROUTE_STRONG
+    # 与快速通道相同，句号分隔的也是复合步骤
+    assert router.choose(step_messages("点击下一页。点击第一个商品")) == ROUTE_STRONG
+    assert router.choose(step_messages("验证页面标题")) == ROUTE_STRONG
+    assert router.choose(step_messages("提取商品列表为 JSON")) == ROUTE_STRONG
+    assert router.choose(step_messages("点击" + "很长的按钮名称" * 4)) == ROUTE_STRONG
+    assert router.choose([]) == ROUTE_STRONG
+
+    assert router.get_stats()["reasons"] == {
+        "compound_step": 2,
+        "reasoning_step": 2,
+        "long_step": 2,
+    }
+
+
+def test_only_last_paragraph_is_the_step():
+    router = make_router()
+    messages = [HumanMessage(content="请验证并检查每一步\n\n然后继续\n\n点击提交")]
+
+    assert router.choose(messages) == ROUTE_FAST
+
+
+def test_recovery_after_failed_tool_call():
+    router = make_router()
+    messages = step_messages("点击登录按钮") + [
+        ai_tool_calls(TAP),
+        ToolMessage(content="执行失败: 找不到元素", tool_call_id="call_0"),
+    ]
+
+    assert router.choose(messages) == ROUTE_STRONG
+    assert router.reasons == {"recovery": 1}
+
+    messages[-1] = ToolMessage(content="boom", tool_call_id="call_0", status="error")
+    assert router.choose(messages) == ROUTE_STRONG
+    assert router.reasons == {"recovery": 2}
+
+
+def test_later_turns_of_a_step_use_strong_model():
+    router = make_router(max_fast_turns=2)
+    ok = ToolMessage(content="{'success': True}", tool_call_id="call_0")
+    messages = step_messages("点击登录按钮") + [ai_tool_calls(TAP), ok]
+
+    assert router.choose(messages) == ROUTE_FAST
+
+    messages += [ai_tool_calls(TAP), ok]
+    assert router.choose(messages) == ROUTE_STRONG
+    assert router.reasons == {"simple_step": 1, "multi_turn": 1}
+
+
+def test_recent_failures_in_memory_use_strong_model():
+    router = make_router(failure_window=60)
+    router.memory.add_record("tap", {"locate": "登录"}, "找不到元素", success=False)
+
+    assert router.choose(step_messages("点击登录按钮")) == ROUTE_STRONG
+    assert router.reasons == {"recent_failures": 1}
+
+    # 时间窗口之外的失败不再影响路由
+    router.memory.records[-1].timestamp = time.time() - 120
+    assert router.choose(step_messages("点击登录按钮")) == ROUTE_FAST
+
+
+def test_record_tracks_latency_and_tokens_per_route():
+    router = make_router()
+    router.record(ROUTE_FAST, 120.0, {"input_tokens": 50, "output_tokens": 5})
+    router.record(ROUTE_FAST, 80.0, {"input_tokens": 30, "output_tokens": 3})
+    router.record(ROUTE_STRONG, 900.0, None)
+
+    routes = router.get_stats()["routes"]
+    assert routes[ROUTE_FAST]["model"] == "deepseek-fast"
+    assert routes[ROUTE_FAST]["latency"]["count"] == 2
+    assert routes[ROUTE_FAST]["latency"]["avg_ms"] == 100.0
+    assert routes[ROUTE_FAST]["prompt_tokens"] == 80
+    assert routes[ROUTE_FAST]["completion_tokens"] == 8
+    assert routes[ROUTE_STRONG]["latency"]["count"] == 1
+    assert routes[ROUTE_STRONG]["prompt_tokens"] == 0
+
+
+async def test_agent_sends_simple_steps_to_fast_llm(make_agent):
+    agent = await make_agent(
+        [AIMessage(content="标题正确")], fast_model="deepseek-fast"
+    )
+    agent.fast_llm = StreamingFakeChatModel(
+        messages=iter([ai_tool_calls(TAP), AIMessage(content="已点击")])
+    )
+
+    await run_step(agent, "点击登录按钮")
+    await run_step(agent, "验证页面标题")
+
+    stats = agent.get_session_info()["model_router_stats"]
+    assert stats["routes"][ROUTE_FAST]["latency"]["count"] == 2
+    assert stats["routes"][ROUTE_STRONG]["latency"]["count"] == 1
+    assert stats["reasons"] == {"simple_step": 2, "reasoning_step": 1}
+    assert agent.http_client.calls[0][0] == "aiTap"
@@ -0,0 +1,77 @@
+"""持久化记忆单元测试"""
+
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+from agent_fakes import StreamingFakeChatModel
+
+from runner.agent.memory.persistent_store import PersistentMemoryStore
+from runner.agent.memory.simple_memory import SimpleMemory
+
+URL = "https://example.com/login"
+
+
+def previous_run(path):
+    """模拟之前的一次运行：在登录页上执行了两个操作"""
+    memory = SimpleMemory(store=PersistentMemoryStore(path))
+    memory.add_record(
+        action="aiInput",
+        params={"locate": "用户名", "value": "u"},
+        result="ok",
+        context={"url": URL},
+    )
+    memory.add_record(
+        action="aiTap",
+        params={"locate": "登录"},
+        result=None,
+        context={"url": URL},
+        success=False,
+        error_message="找不到元素",
+    )
+    memory.store.close()
+
+
+def test_load_from_store_skips_own_records(tmp_path):
+    path = str(tmp_path / "memory.db")
+    previous_run(path)
+
+    memory = SimpleMemory(store=PersistentMemoryStore(path))
+    assert memory.load_from_store() == 2
+    assert memory.load_from_store() == 0
+    assert [r.action for r in memory.records] == ["aiInput", "aiTap"]
+    memory.store.close()
+
+
+async def test_agent_loads_store_on_initialize(make_agent, tmp_path):
+    path = str(tmp_path / "memory.db")
+    previous_run(path)
+    agent = await make_agent([], memory_store_path=path)
+    source = SimpleNamespace(
+        llm=StreamingFakeChatModel(messages=iter([])), fast_llm=None, tool_schemas=[]
+    )
+
+    await agent._init_local_components(llm_source=source)
+
+    assert len(agent.memory.records) == 2
+    history = agent.get_page_history(URL)
+    assert [r["action"] for r in history] == ["aiInput"]
+    assert len(agent.get_page_history(URL, successful_only=False)) == 2
+
+
+async def test_cleanup_closes_store_and_llm_cache(make_agent, tmp_path):
+    agent = await make_agent(
+        [],
+        memory_store_path=str(tmp_path / "memory.db"),
+        llm_cache_path=str(tmp_path / "cache.db"),
+    )
+    store, cache = agent.memory.store, agent.llm_cache
+
+    await agent.cleanup()
+
+    assert agent.memory.store is None
+    assert agent.llm_cache is None
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.count()
+    with pytest.raises(sqlite3.ProgrammingError):
+        cache.get("k")
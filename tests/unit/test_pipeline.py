@@ -0,0 +1,119 @@
+"""StepPipeline 单元测试"""
+
+import argparse
+
+from langchain_core.messages import AIMessage
+
+from runner.executor.fast_path import FastPathRouter, IntentRecognizer
+from runner.executor.pipeline import StepPipeline
+from runner.executor.plan_replay import PlanReplayer
+from runner.executor.text_executor import TextTestExecutor
+
+STATE = "https://example.com/|dom"
+
+
+async def test_speculation_is_not_charged_to_current_run(make_agent):
+    agent = await make_agent([AIMessage(content="下一步规划")])
+    pipeline = StepPipeline(agent)
+
+    # 在第 N 步的执行期间发起第 N+1 步的预先规划
+    agent.metrics.start_run()
+    pipeline.start_step("打开首页", STATE, "点击登录")
+    await pipeline.pending.task
+    summary = agent.metrics.end_run()
+
+    assert summary["llm"]["calls"] == 0
+    assert agent.metrics.speculation.llm_latency.count == 1
+    assert agent.metrics.get_stats()["speculation"]["calls"] == 1
+    await pipeline.close()
+
+
+async def test_unchanged_page_commits_speculation(make_agent):
+    agent = await make_agent([AIMessage(content="下一步规划")])
+    pipeline = StepPipeline(agent)
+
+    pipeline.start_step("点击菜单", STATE, "点击登录")
+    pipeline.finish_step(True)
+    pipeline.start_step("点击登录", STATE)
+    planned = await pipeline.take()
+
+    assert planned is not None
+    assert planned[1].content == "下一步规划"
+    assert pipeline.get_report()["committed"] == 1
+
+
+async def test_changed_page_discards_speculation(make_agent):
+    agent = await make_agent([AIMessage(content="下一步规划")])
+    pipeline = StepPipeline(agent)
+
+    pipeline.start_step("点击菜单", STATE, "点击登录")
+    pipeline.finish_step(True)
+    pipeline.start_step("点击登录", "https://example.com/|dom with dialog")
+
+    assert await pipeline.take() is None
+    assert pipeline.get_report()["discarded"] == {"page_changed": 1}
+
+
+async def test_unknown_page_state_discards_speculation(make_agent):
+    agent = await make_agent([AIMessage(content="下一步规划")])
+    pipeline = StepPipeline(agent)
+
+    pipeline.start_step("点击菜单", None, "点击登录")
+    pipeline.finish_step(True)
+    pipeline.start_step("点击登录", None)
+
+    assert await pipeline.take() is None
+    assert pipeline.get_report()["discarded"] == {"page_changed": 1}
+
+
+async def test_failed_step_and_mismatch_discard_speculation(make_agent):
+    agent = await make_agent([AIMessage(content="a"), AIMessage(content="b")])
+    pipeline = StepPipeline(agent)
+
+    pipeline.start_step("步骤 1", STATE, "点击登录")
+    pipeline.finish_step(False)
+    pipeline.start_step("步骤 2", STATE, "点击登录")
+    pipeline.finish_step(True)
+    pipeline.start_step("点击注册", STATE)
+    assert await pipeline.take() is None
+
+    assert pipeline.get_report()["discarded"] == {
+        "step_failed": 1,
+        "prompt_mismatch": 1,
+    }
+
+
+async def test_step_without_llm_does_not_commit(make_agent):
+    agent = await make_agent([AIMessage(content="下一步规划")])
+    pipeline = StepPipeline(agent)
+
+    pipeline.start_step("点击菜单", STATE, "点击登录")
+    pipeline.finish_step(True)
+    # 本步骤由回放或快速通道完成，没有调用 take()
+    pipeline.start_step("点击登录", STATE)
+    pipeline.finish_step(True)
+
+    report = pipeline.get_report()
+    assert report["committed"] == 0
+    assert report["discarded"] == {"not_needed": 1}
+
+
+async def test_fast_path_action_keeps_next_speculation(make_agent):
+    """快速通道执行了动作但页面状态没变时，下一步仍使用预先规划"""
+    agent = await make_agent([AIMessage(content="订单数量正确")])
+    executor = TextTestExecutor({}, argparse.Namespace())
+    executor.agent = agent
+    executor.plan_replayer = PlanReplayer(agent.http_client)
+    executor.fast_path = FastPathRouter(agent.http_client, IntentRecognizer())
+    executor.pipeline = StepPipeline(agent)
+
+    await executor._execute_ai_action("点击订单标签", "订单数量是否大于 3")
+    await executor._execute_ai_action("订单数量是否大于 3")
+
+    report = executor.pipeline.get_report()
+    assert report["speculated"] == 1
+    assert report["committed"] == 1
+    assert report["discarded"] == {}
+    # 第二步直接使用预先规划的结果，唯一的 LLM 调用是预先规划
+    assert agent.metrics.session.llm_latency.count == 1
+    assert agent.metrics.speculation.llm_latency.count == 1
@@ -0,0 +1,197 @@
+"""执行计划录制与回放单元测试"""
+
+import argparse
+import time
+
+from agent_fakes import FakeHTTPClient, ai_tool_calls, run_step, tool_call
+from langchain_core.messages import AIMessage, ToolMessage
+
+from runner.executor.plan_replay import (
+    PAGE_STATE_SCRIPT,
+    PlanRecorder,
+    PlanReplayer,
+    PlanReplayStore,
+    RecordedPlan,
+    is_failed_tool_message,
+    normalize_url,
+)
+from runner.executor.text_executor import TextTestExecutor
+
+TAP = {"name": "midscene_aiTap", "args": {"locate": "登录"}}
+QUERY = {"name": "midscene_aiQuery", "args": {"dataDemand": "页面文字"}}
+
+
+def test_normalize_url():
+    assert normalize_url("https://Example.com/a/#top") == "https://example.com/a"
+    assert normalize_url("https://example.com") == "https://example.com/"
+    assert normalize_url("https://example.com/?q=1") == "https://example.com/?q=1"
+    assert normalize_url("") == ""
+
+
+def test_is_failed_tool_message():
+    def message(content, status="success"):
+        return ToolMessage(content=content, tool_call_id="c", status=status)
+
+    assert is_failed_tool_message(message("ok", status="error"))
+    assert is_failed_tool_message(message("执行失败: 找不到元素"))
+    assert is_failed_tool_message(message('{"success": false}'))
+    assert not is_failed_tool_message(message('{"success": true}'))
+    assert not is_failed_tool_message(message("完成"))
+
+
+def test_recorder_collects_tool_calls_and_failures():
+    recorder = PlanRecorder()
+    recorder.observe(
+        {
+            "agent": {
+                "messages": [
+                    ai_tool_calls(tool_call("midscene_aiTap", {"locate": "登录"}))
+                ]
+            }
+        }
+    )
+    recorder.observe(
+        {"tools": {"messages": [ToolMessage(content="ok", tool_call_id="call_0")]}}
+    )
+
+    assert recorder.tool_calls == [TAP]
+    assert recorder.replayable
+
+    recorder.observe(
+        {"tools": {"messages": [ToolMessage(content="执行失败: x", tool_call_id="c")]}}
+    )
+    assert not recorder.replayable
+
+
+def test_store_roundtrip_and_expiry(tmp_path):
+    path = str(tmp_path / "plans.json")
+    store = PlanReplayStore(path)
+    store.record("点击登录", "https://example.com/#a", [TAP])
+    store.save()
+
+    reloaded = PlanReplayStore(path)
+    plan = reloaded.lookup("点击登录", "https://example.com/")
+    assert plan is not None and plan.tool_calls == [TAP]
+    assert reloaded.lookup("点击注册", "https://example.com/") is None
+
+    expired = PlanReplayStore(path, max_age=0)
+    time.sleep(0.01)
+    assert expired.lookup("点击登录", "https://example.com/") is None
+    assert expired.invalidated == 1
+
+
+def test_mark_failed_invalidates_plan(tmp_path):
+    store = PlanReplayStore(str(tmp_path / "plans.json"))
+    store.record("点击登录", "https://example.com/", [TAP])
+
+    store.mark_failed("点击登录", "https://example.com/")
+
+    assert store.lookup("点击登录", "https://example.com/") is None
+    report = store.get_report()
+    assert report["replay_failures"] == 1
+    assert report["invalidated"] == 1
+
+
+async def test_replayer_replays_calls_in_order():
+    http = FakeHTTPClient()
+    plan = RecordedPlan(
+        step="s",
+        start_url="https://example.com/",
+        tool_calls=[TAP, {"name": "midscene_aiQuery", "args": {"dataDemand": "x"}}],
+    )
+
+    assert await PlanReplayer(http).replay(plan)
+    assert [call[0] for call in http.calls] == ["aiTap", "aiQuery"]
+    assert await PlanReplayer(http).get_current_url() == "https://example.com/"
+
+
+async def test_replayer_fails_on_false_assertion():
+    class AssertFalseHTTP(FakeHTTPClient):
+        async def execute_query(self, query, params=None):
+            return {"success": True, "result": False}
+
+    plan = RecordedPlan(
+        step="s",
+        start_url="",
+        tool_calls=[{"name": "midscene_aiBoolean", "args": {"prompt": "已登录"}}],
+    )
+
+    assert not await PlanReplayer(AssertFalseHTTP()).replay(plan)
+
+
+async def test_page_state_combines_url_and_dom():
+    http = FakeHTTPClient("https://example.com/login/#top")
+    replayer = PlanReplayer(http)
+
+    state = await replayer.get_page_state()
+    assert state == "https://example.com/login|dom"
+    assert http.calls[-1] == ("evaluateJavaScript", {"script": PAGE_STATE_SCRIPT})
+
+    # 同一 URL 上的 DOM 变化（弹窗、表单值）同样改变页面状态
+    http.dom = "dom with dialog"
+    assert await replayer.get_page_state() != state
+
+    http.url = ""
+    assert await replayer.get_page_state() is None
+
+
+def test_concurrent_stores_merge_on_save(tmp_path):
+    """共享同一文件的多个执行器保存时不会覆盖彼此的计划"""
+    path = str(tmp_path / "plans.json")
+    seed = PlanReplayStore(path)
+    seed.record("旧步骤", "https://example.com/", [TAP])
+    seed.record("已回放", "https://example.com/", [TAP])
+    seed.save()
+
+    first = PlanReplayStore(path)
+    second = PlanReplayStore(path)
+    first.record("点击登录", "https://example.com/", [TAP])
+    first.mark_replayed(first.lookup("已回放", "https://example.com/"))
+    second.record("点击注册", "https://example.com/", [TAP])
+    second.mark_failed("旧步骤", "https://example.com/")
+    second.mark_replayed(second.lookup("已回放", "https://example.com/"))
+    first.save()
+    second.save()
+
+    merged = PlanReplayStore(path)
+    assert merged.lookup("点击登录", "https://example.com/") is not None
+    assert merged.lookup("点击注册", "https://example.com/") is not None
+    assert merged.lookup("旧步骤", "https://example.com/") is None
+    assert merged.lookup("已回放", "https://example.com/").replay_count == 2
+    # 保存后实例也能看到其他执行器的计划
+    assert second.lookup("点击登录", "https://example.com/") is not None
+
+
+async def thread_messages(agent):
+    snapshot = await agent.agent_executor.aget_state(
+        agent._thread_config(agent.session_id)
+    )
+    return snapshot, snapshot.values["messages"]
+
+
+async def test_replayed_step_is_written_to_thread(make_agent, tmp_path):
+    agent = await make_agent([AIMessage(content="已登录")])
+    args = argparse.Namespace(plan_replay=str(tmp_path / "plans.json"))
+    executor = TextTestExecutor({}, args)
+    executor.agent = agent
+    executor.plan_replayer = PlanReplayer(agent.http_client)
+    executor.plan_store.record("点击登录", "https://example.com/", [TAP, QUERY])
+
+    await executor._execute_ai_action("点击登录")
+
+    snapshot, messages = await thread_messages(agent)
+    assert [m.type for m in messages] == ["human", "ai", "tool", "tool", "ai"]
+    assert messages[0].content.endswith("点击登录")
+    calls = messages[1].tool_calls
+    assert [c["name"] for c in calls] == ["midscene_aiTap", "midscene_aiQuery"]
+    assert [m.tool_call_id for m in messages[2:4]] == [c["id"] for c in calls]
+    assert "页面内容" in messages[3].content
+    # 时间戳和耗时不进入消息
+    assert "timestamp" not in messages[3].content
+    assert snapshot.next == ()
+
+    # 下一个由 LLM 执行的步骤接在回放的步骤之后
+    await run_step(agent, "确认已登录")
+    _, messages = await thread_messages(agent)
+    assert [m.type for m in messages][-2:] == ["human", "ai"]
+    assert len(messages) == 7
@@ -0,0 +1,73 @@
+"""ToolResultShaper 单元测试"""
+
+import json
+
+from agent_fakes import ai_tool_calls, run_step, tool_call
+from langchain_core.messages import AIMessage, ToolMessage
+
+from runner.agent.tools.result_shaper import ToolResultShaper, shape_value
+
+
+def test_shape_value_keeps_keys_and_marks_truncation():
+    shaped = shape_value({"items": list(range(10)), "text": "x" * 50}, 3, 10)
+
+    assert shaped["items"][:3] == [0, 1, 2]
+    assert "共 10 项" in shaped["items"][-1]
+    assert shaped["text"].startswith("x" * 10)
+    assert "原长度 50" in shaped["text"]
+
+
+def test_small_results_are_not_shaped():
+    shaper = ToolResultShaper(default_budget=1000)
+    text, shaped = shaper.shape("midscene_aiTap", {"success": True})
+
+    assert not shaped
+    assert json.loads(text) == {"success": True}
+
+
+def test_large_results_fit_budget_and_stay_valid_json():
+    shaper = ToolResultShaper(budgets={"aiQuery": 500})
+    result = {"items": [{"name": f"商品{i}", "desc": "描述" * 50} for i in range(100)]}
+
+    text, shaped = shaper.shape("midscene_aiQuery", result)
+
+    assert shaped
+    assert len(text.encode("utf-8")) <= 500
+    data = json.loads(text)
+    assert "共 100 项" in data["items"][-1]
+    stats = shaper.get_stats()
+    assert stats["results_shaped"] == 1
+    assert stats["bytes_saved"] > 0
+
+
+def test_oversized_text_is_truncated_on_character_boundary():
+    shaper = ToolResultShaper(budgets={"aiString": 100})
+    text, shaped = shaper.shape("midscene_aiString", "中" * 500)
+
+    assert shaped
+    assert len(text.encode("utf-8")) <= 100
+    assert "已截断" in text
+
+
+async def test_tool_messages_carry_only_shaped_content(make_agent):
+    """完整结果不作为 artifact 留在消息（以及检查点）中"""
+    agent = await make_agent(
+        [
+            ai_tool_calls(tool_call("midscene_aiQuery", {"dataDemand": "列表"}, 0)),
+            AIMessage(content="完成"),
+        ],
+    )
+    agent.result_shaper.budgets["aiQuery"] = 64
+    agent.http_client.execute_query = _large_query
+
+    await run_step(agent, "读取列表", thread_id="t")
+
+    state = await agent.get_thread_state("t")
+    tool_messages = [m for m in state["messages"] if isinstance(m, ToolMessage)]
+    assert len(tool_messages) == 1
+    assert tool_messages[0].artifact is None
+    assert len(tool_messages[0].content.encode("utf-8")) <= 64
+
+
+async def _large_query(query, params=None):
+    return {"success": True, "result": {"items": list(range(1000))}}
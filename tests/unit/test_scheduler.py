@@ -0,0 +1,109 @@
+"""ToolCallScheduler 单元测试"""
+
+import asyncio
+
+from langchain_core.tools import StructuredTool
+
+from runner.agent.tools.scheduler import ToolCallScheduler
+
+
+def make_tools(events, delay=0.05):
+    async def run(name, value):
+        events.append(("start", name, value))
+        await asyncio.sleep(delay)
+        events.append(("end", name, value))
+        if value == "boom":
+            raise RuntimeError("失败")
+        return f"{name}:{value}"
+
+    def make(name):
+        async def coroutine(value: str) -> str:
+            return await run(name, value)
+
+        return StructuredTool.from_function(
+            coroutine=coroutine, name=name, description=name
+        )
+
+    return [make("midscene_aiQuery"), make("midscene_aiString"), make("midscene_aiTap")]
+
+
+def call(name, value, index):
+    return {"name": name, "args": {"value": value}, "id": f"call_{index}"}
+
+
+async def test_read_only_calls_run_concurrently_in_order():
+    events = []
+    scheduler = ToolCallScheduler(make_tools(events))
+    calls = [
+        call("midscene_aiQuery", "a", 0),
+        call("midscene_aiString", "b", 1),
+        call("midscene_aiQuery", "c", 2),
+    ]
+
+    messages = await scheduler.run(calls)
+
+    assert [m.content for m in messages] == [
+        "midscene_aiQuery:a",
+        "midscene_aiString:b",
+        "midscene_aiQuery:c",
+    ]
+    assert [m.tool_call_id for m in messages] == ["call_0", "call_1", "call_2"]
+    # 三个查询都在第一个结束之前开始
+    assert [e[0] for e in events[:3]] == ["start", "start", "start"]
+    assert scheduler.get_stats() == {
+        "concurrent_batches": 1,
+        "concurrent_calls": 3,
+        "serial_calls": 0,
+    }
+
+
+async def test_actions_are_barriers():
+    events = []
+    scheduler = ToolCallScheduler(make_tools(events))
+    calls = [
+        call("midscene_aiQuery", "a", 0),
+        call("midscene_aiTap", "t", 1),
+        call("midscene_aiQuery", "b", 2),
+    ]
+
+    await scheduler.run(calls)
+
+    # 动作不与任何查询重叠
+    assert events == [
+        ("start", "midscene_aiQuery", "a"),
+        ("end", "midscene_aiQuery", "a"),
+        ("start", "midscene_aiTap", "t"),
+        ("end", "midscene_aiTap", "t"),
+        ("start", "midscene_aiQuery", "b"),
+        ("end", "midscene_aiQuery", "b"),
+    ]
+    assert scheduler.serial_calls == 3
+
+
+async def test_errors_and_unknown_tools_become_error_messages():
+    scheduler = ToolCallScheduler(make_tools([], delay=0))
+    calls = [
+        call("midscene_aiQuery", "boom", 0),
+        call("midscene_unknown", "x", 1),
+        call("midscene_aiQuery", "ok", 2),
+    ]
+
+    messages = await scheduler.run(calls)
+
+    assert [m.status for m in messages] == ["error", "error", "success"]
+    assert "执行错误" in messages[0].content
+    assert "未知的工具" in messages[1].content
+
+
+async def test_max_concurrency_limits_batch():
+    events = []
+    scheduler = ToolCallScheduler(make_tools(events), max_concurrency=2)
+    calls = [call("midscene_aiQuery", str(i), i) for i in range(4)]
+
+    await scheduler.run(calls)
+
+    running = peak = 0
+    for kind, _, _ in events:
+        running += 1 if kind == "start" else -1
+        peak = max(peak, running)
+    assert peak == 2
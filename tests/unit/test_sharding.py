@@ -0,0 +1,74 @@
+"""多进程分片执行单元测试"""
+
+import multiprocessing
+import os
+
+import pytest
+
+from runner.executor.plan_replay import PlanReplayStore
+from runner.executor.sharding import DurationHistory, plan_shards
+
+TAP = {"name": "midscene_aiTap", "args": {"locate": "登录"}}
+
+
+def test_plan_shards_balances_by_estimate():
+    estimates = {"a": 10.0, "b": 7.0, "c": 6.0, "d": 4.0, "e": 3.0}
+
+    shards = plan_shards(list(estimates), estimates, workers=2)
+
+    assert shards == [["a", "d"], ["b", "c", "e"]]
+    loads = [sum(estimates[f] for f in shard) for shard in shards]
+    assert abs(loads[0] - loads[1]) <= 4.0
+
+
+def test_plan_shards_caps_workers_at_file_count():
+    shards = plan_shards(["a", "b"], {}, workers=8)
+    assert sorted(f for shard in shards for f in shard) == ["a", "b"]
+    assert len(shards) == 2
+
+
+def test_duration_history_moving_average_and_roundtrip(tmp_path):
+    path = str(tmp_path / "durations.json")
+    history = DurationHistory(path, alpha=0.5)
+    history.update("a.txt", 10.0)
+    history.update("a.txt", 20.0)
+    history.save()
+
+    reloaded = DurationHistory(path)
+    assert reloaded.durations[DurationHistory.make_key("a.txt")] == 15.0
+    # 没有历史的文件使用已知耗时的平均值
+    assert reloaded.estimate(["a.txt", "b.txt"]) == {"a.txt": 15.0, "b.txt": 15.0}
+
+
+def test_duration_history_falls_back_to_file_size(tmp_path):
+    small, large = tmp_path / "small.txt", tmp_path / "large.txt"
+    small.write_text("1. 点击登录")
+    large.write_text("1. 点击登录\n" * 50)
+
+    estimates = DurationHistory().estimate([str(small), str(large)])
+
+    assert estimates[str(large)] > estimates[str(small)]
+
+
+def _record_plans(path, worker_id, count):
+    for i in range(count):
+        store = PlanReplayStore(path)
+        store.record(f"w{worker_id} 步骤 {i}", "https://example.com/", [TAP])
+        store.save()
+
+
+@pytest.mark.skipif(os.name != "posix", reason="跨进程文件锁依赖 fcntl")
+def test_plan_store_saves_from_processes_are_merged(tmp_path):
+    path = str(tmp_path / "plans.json")
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_record_plans, args=(path, worker_id, 10))
+        for worker_id in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    assert len(PlanReplayStore(path).plans) == 40
@@ -0,0 +1,59 @@
+"""近似重复索引单元测试"""
+
+from runner.agent.memory.similarity import MinHashLSH, jaccard, params_text, shingles
+from runner.agent.memory.simple_memory import SimpleMemory
+
+LOGIN = {"locate": "登录按钮"}
+REPHRASED = {"locate": "点击登录按钮图标"}
+
+
+def test_params_text_normalizes_action_prefix():
+    assert params_text({"locate": "点击 登录按钮！"}) == params_text(LOGIN)
+    assert params_text({"b": "X", "a": 1, "c": None}) == "1|x"
+
+
+def test_lsh_query_and_remove():
+    index = MinHashLSH(threshold=0.5)
+    index.add("登录按钮", "a", "aiTap")
+    index.add("注册按钮", "b", "aiTap")
+
+    matches = index.query("登录按钮", "aiTap")
+    assert matches[0] == ("a", 1.0)
+    assert all(value != "b" for value, _ in matches)
+    # 命名空间隔离
+    assert index.query("登录按钮", "aiInput") == []
+
+    index.remove("登录按钮", "a", "aiTap")
+    assert index.query("登录按钮", "aiTap") == []
+    assert len(index) == 1
+
+
+def test_signatures_are_stable():
+    grams = shingles("登录按钮")
+    assert MinHashLSH().signature(grams) == MinHashLSH().signature(grams)
+
+
+def test_index_is_opt_in():
+    memory = SimpleMemory()
+    memory.add_record(action="aiTap", params=LOGIN, result="ok", success=True)
+
+    assert memory.get_stats()["similarity_index"] is None
+    assert memory.find_near_duplicate_action("aiTap", LOGIN)[1] == 1.0
+    assert memory.find_near_duplicate_action("aiTap", REPHRASED) is None
+
+
+def test_near_duplicate_with_index_follows_eviction():
+    memory = SimpleMemory(max_size=2, similarity_threshold=0.5)
+    memory.add_record(action="aiTap", params=LOGIN, result="ok", success=True)
+
+    record, similarity = memory.find_near_duplicate_action("aiTap", REPHRASED)
+    assert record.params == LOGIN
+    assert similarity == jaccard(
+        shingles(params_text(LOGIN)), shingles(params_text(REPHRASED))
+    )
+
+    for i in range(2):
+        memory.add_record(
+            action="aiTap", params={"locate": f"商品{i}"}, result="ok", success=True
+        )
+    assert memory.find_near_duplicate_action("aiTap", REPHRASED) is None
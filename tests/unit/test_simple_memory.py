@@ -0,0 +1,124 @@
+"""SimpleMemory 环形缓冲区与增量统计单元测试"""
+
+import pytest
+from agent_fakes import ai_tool_calls, run_step, tool_call
+from langchain_core.messages import AIMessage
+
+from runner.agent.memory.simple_memory import MemoryRecord, SimpleMemory
+
+
+def fill(memory, actions):
+    for i, (action, success) in enumerate(actions):
+        memory.add_record(action, {"index": i}, "ok", success=success)
+
+
+def rescanned_stats(memory):
+    """按记录重新计算的统计，用于核对增量统计"""
+    records = list(memory.records)
+    counts = {}
+    for record in records:
+        counts[record.action] = counts.get(record.action, 0) + 1
+    failed = sum(1 for record in records if not record.success)
+    return {
+        "total_records": len(records),
+        "failed_records": failed,
+        "successful_records": len(records) - failed,
+        "action_counts": counts,
+    }
+
+
+def assert_stats_consistent(memory):
+    stats = memory.get_stats()
+    expected = rescanned_stats(memory)
+    assert {key: stats[key] for key in expected} == expected
+
+
+def test_full_buffer_evicts_oldest_record():
+    memory = SimpleMemory(max_size=3)
+    fill(memory, [("tap", True), ("input", False), ("tap", True), ("navigate", True)])
+
+    assert len(memory.records) == 3
+    assert [record.params["index"] for record in memory.records] == [1, 2, 3]
+    assert memory.get_stats()["action_counts"] == {"input": 1, "tap": 1, "navigate": 1}
+    assert_stats_consistent(memory)
+
+
+def test_counters_follow_evictions():
+    memory = SimpleMemory(max_size=4)
+    pattern = [("tap", False), ("tap", True), ("input", True), ("query", False)]
+    for round_ in range(5):
+        fill(memory, pattern[round_ % 4 :] + pattern[: round_ % 4])
+        assert_stats_consistent(memory)
+
+    # 失败记录被淘汰后，失败计数同步减少
+    fill(memory, [("tap", True)] * 4)
+    assert memory.get_stats()["failed_records"] == 0
+    assert memory.get_stats()["action_counts"] == {"tap": 4}
+
+
+def test_success_rate_uses_counters():
+    memory = SimpleMemory(max_size=10)
+    assert memory.get_success_rate() == 1.0
+
+    fill(memory, [("tap", True), ("tap", False), ("input", True), ("tap", True)])
+
+    assert memory.get_success_rate() == 0.75
+    assert memory.get_success_rate("tap") == pytest.approx(2 / 3)
+    assert memory.get_success_rate("input") == 1.0
+    assert memory.get_success_rate("missing") == 1.0
+
+
+def test_recent_queries_walk_the_tail():
+    memory = SimpleMemory(max_size=5)
+    fill(memory, [("tap", i % 2 == 0) for i in range(8)])
+
+    recent = memory.get_recent_actions(3)
+    assert [record.params["index"] for record in recent] == [5, 6, 7]
+    assert memory.get_recent_actions(0) == []
+    assert len(memory.get_recent_actions(50)) == 5
+
+    successful = memory.get_successful_actions(2)
+    assert [record.params["index"] for record in successful] == [4, 6]
+    assert memory.get_last_action().params["index"] == 7
+
+
+def test_from_dict_keeps_newest_records_and_recounts():
+    source = SimpleMemory(max_size=10)
+    fill(source, [("tap", i % 3 != 0) for i in range(10)])
+
+    memory = SimpleMemory(max_size=4)
+    memory.from_dict(source.to_dict())
+
+    assert [record.params["index"] for record in memory.records] == [6, 7, 8, 9]
+    assert_stats_consistent(memory)
+
+
+def test_clear_resets_counters():
+    memory = SimpleMemory(max_size=3)
+    fill(memory, [("tap", False), ("input", True)])
+
+    memory.clear()
+
+    assert len(memory.records) == 0
+    assert memory.get_success_rate("tap") == 1.0
+    assert_stats_consistent(memory)
+
+
+def test_records_use_slots():
+    memory = SimpleMemory()
+    fill(memory, [("tap", True)])
+
+    assert not hasattr(memory.records[0], "__dict__")
+    assert "latency_ms" in MemoryRecord.__slots__
+
+
+async def test_agent_history_returns_record_dicts(make_agent):
+    tap = tool_call("midscene_aiTap", {"locate": "登录按钮"})
+    agent = await make_agent([ai_tool_calls(tap), AIMessage(content="完成")])
+
+    await run_step(agent, "点击登录按钮")
+
+    history = agent.get_action_history()
+    assert [entry["action"] for entry in history] == ["aiTap", "execute"]
+    assert history[0]["params"] == {"locate": "登录按钮"}
+    assert agent.find_similar_action("aiTap", {"locate": "登录按钮"})["success"]
@@ -0,0 +1,161 @@
+"""工具调用记忆记录单元测试"""
+
+from agent_fakes import FakeHTTPClient, ai_tool_calls, run_step, tool_call
+from langchain_core.messages import AIMessage
+
+from runner.agent.tools.result_shaper import TOOL_RESULT_BUDGETS
+
+NAVIGATE = tool_call("midscene_navigate", {"url": "https://example.com/login"})
+TAP = tool_call("midscene_aiTap", {"locate": "登录按钮"})
+QUERY = tool_call("midscene_aiQuery", {"dataDemand": "页面文字"})
+
+
+class FailingHTTPClient(FakeHTTPClient):
+    """点击动作总是失败的 HTTP 客户端替身"""
+
+    async def execute_action(self, action, params=None, stream=False):
+        if action == "aiTap":
+            self.calls.append((action, params))
+            yield {"error": "找不到元素"}
+            return
+        async for event in super().execute_action(action, params, stream):
+            yield event
+
+
+class RedirectingHTTPClient(FakeHTTPClient):
+    """导航会被重定向、点击会跳转页面的 HTTP 客户端替身"""
+
+    async def execute_action(self, action, params=None, stream=False):
+        async for event in super().execute_action(action, params, stream):
+            if action == "navigate":
+                self.url = params["url"] + "?next=/"
+            elif action == "aiTap":
+                self.url = "https://example.com/home"
+            yield event
+
+
+class LongResultHTTPClient(FakeHTTPClient):
+    """查询结果很长的 HTTP 客户端替身"""
+
+    async def execute_query(self, query, params=None):
+        self.calls.append((query, params))
+        return {"success": True, "result": {"text": "商品" * 5000}}
+
+
+def tool_records(agent):
+    return [record for record in agent.memory.records if record.action != "execute"]
+
+
+async def test_each_tool_call_is_recorded(make_agent):
+    agent = await make_agent([ai_tool_calls(TAP), AIMessage(content="完成")])
+
+    await run_step(agent, "点击登录按钮")
+
+    records = list(agent.memory.records)
+    assert [record.action for record in records] == ["aiTap", "execute"]
+    tap = records[0]
+    assert tap.params == {"locate": "登录按钮"}
+    assert tap.success
+    assert tap.error_message is None
+    assert tap.latency_ms is not None and tap.latency_ms >= 0
+    assert tap.result is not None
+
+
+async def test_navigate_updates_page_context(make_agent):
+    agent = await make_agent(
+        [ai_tool_calls(TAP), AIMessage(content="完成")]
+        + [ai_tool_calls(NAVIGATE), AIMessage(content="完成")]
+        + [ai_tool_calls(TAP), AIMessage(content="完成")]
+    )
+
+    await run_step(agent, "点击登录按钮")
+    await run_step(agent, "打开登录页")
+    await run_step(agent, "点击登录按钮")
+
+    before, navigate, after = tool_records(agent)
+    assert before.context["url"] == "https://example.com/"
+    assert navigate.context["url"] == "https://example.com/login"
+    assert agent.memory.page_context["url"] == "https://example.com/login"
+    assert after.context["url"] == "https://example.com/login"
+
+
+async def test_failed_tool_call_is_recorded(make_agent):
+    agent = await make_agent([ai_tool_calls(TAP), AIMessage(content="失败")])
+    agent.http_client = FailingHTTPClient()
+
+    await run_step(agent, "点击登录按钮")
+
+    (tap,) = tool_records(agent)
+    assert not tap.success
+    assert tap.error_message == "找不到元素"
+    assert agent.memory.get_stats()["failed_records"] == 1
+
+
+async def test_memory_keeps_unshaped_result(make_agent):
+    agent = await make_agent([ai_tool_calls(QUERY), AIMessage(content="完成")])
+
+    await run_step(agent, "读取页面文字")
+
+    (query,) = tool_records(agent)
+    assert query.success
+    # 记忆中是服务端返回的结构化结果，而不是给 LLM 的整形文本
+    assert query.result == {
+        "success": True,
+        "result": {"items": [1, 2, 3], "text": "页面内容"},
+    }
+
+
+async def test_long_results_are_compacted_and_spilled(make_agent, tmp_path):
+    agent = await make_agent(
+        [ai_tool_calls(QUERY), AIMessage(content="完成")],
+        memory_spill_dir=str(tmp_path),
+    )
+    agent.http_client = LongResultHTTPClient()
+
+    events = await run_step(agent, "读取页面文字")
+
+    (query,) = tool_records(agent)
+    assert query.success
+    assert query.spill_path is not None
+    assert agent.memory.load_full_result(query) == {
+        "success": True,
+        "result": {"text": "商品" * 5000},
+    }
+    # 只有整形后的内容进入 ToolMessage
+    (tool_message,) = [
+        m for e in events for m in e.get("tools", {}).get("messages", [])
+    ]
+    assert len(tool_message.content.encode("utf-8")) <= TOOL_RESULT_BUDGETS["aiQuery"]
+    assert query.result != agent.memory.load_full_result(query)
+
+
+async def test_page_context_is_shared_until_page_changes(make_agent):
+    agent = await make_agent(
+        [ai_tool_calls(TAP, {**TAP, "id": "call_1"}), AIMessage(content="完成")]
+        + [ai_tool_calls(NAVIGATE), AIMessage(content="完成")]
+    )
+
+    await run_step(agent, "点击登录按钮两次")
+    first, second = tool_records(agent)
+    assert first.context is second.context
+
+    await run_step(agent, "打开登录页")
+    assert first.context["url"] == "https://example.com/"
+    assert tool_records(agent)[-1].context is not first.context
+
+
+async def test_page_url_comes_from_browser(make_agent):
+    """重定向和点击链接后的 URL 以浏览器位置为准，而不是导航参数"""
+    agent = await make_agent(
+        [ai_tool_calls(NAVIGATE), AIMessage(content="完成")]
+        + [ai_tool_calls(TAP), AIMessage(content="完成")]
+    )
+    agent.http_client = RedirectingHTTPClient()
+
+    await run_step(agent, "打开登录页")
+    await run_step(agent, "点击登录按钮")
+
+    navigate, tap = tool_records(agent)
+    assert navigate.context["url"] == "https://example.com/login?next=/"
+    assert tap.context["url"] == "https://example.com/home"
+    assert agent.memory.page_context["url"] == "https://example.com/home"